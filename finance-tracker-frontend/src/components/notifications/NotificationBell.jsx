@@ -8,19 +8,64 @@ export const NotificationBell = () => {
   const [showDropdown, setShowDropdown] = useState(false);
 
   useEffect(() => {
+    let interval = null;
+    let source = null;
+
     const fetchNotifications = async () => {
       try {
-        const response = await api.notifications.getAll();
-        setNotifications(response.data || []);
-        setUnreadCount(response.data?.filter(n => !n.read).length || 0);
+        const [listResponse, countResponse] = await Promise.all([
+          api.notifications.getAll(),
+          api.notifications.getUnreadCount()
+        ]);
+        setNotifications(listResponse.data?.results || []);
+        setUnreadCount(countResponse.data?.unread_count || 0);
       } catch (error) {
         console.error('Error fetching notifications:', error);
       }
     };
 
+    // Polling, only while the event stream is unavailable
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(fetchNotifications, 60000); // Refresh every minute
+      }
+    };
+
+    const stopPolling = () => {
+      clearInterval(interval);
+      interval = null;
+    };
+
     fetchNotifications();
-    const interval = setInterval(fetchNotifications, 60000); // Refresh every minute
-    return () => clearInterval(interval);
+
+    if (typeof EventSource === 'undefined') {
+      startPolling();
+    } else {
+      source = new EventSource(api.notifications.streamUrl());
+      source.addEventListener('open', () => {
+        // Back after an outage: catch up on what the stream missed
+        if (interval) {
+          stopPolling();
+          fetchNotifications();
+        }
+      });
+      source.addEventListener('unread_count', (event) => {
+        setUnreadCount(JSON.parse(event.data).unread_count || 0);
+      });
+      source.addEventListener('notification', (event) => {
+        const notification = JSON.parse(event.data);
+        setNotifications(prev => [notification, ...prev.filter(n => n.id !== notification.id)]);
+      });
+      // The browser keeps reconnecting unless the stream was refused; poll meanwhile
+      source.addEventListener('error', startPolling);
+    }
+
+    return () => {
+      stopPolling();
+      if (source) {
+        source.close();
+      }
+    };
   }, []);
 
   const handleMarkAsRead = async (id) => {
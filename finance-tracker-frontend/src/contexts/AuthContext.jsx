@@ -66,7 +66,12 @@ export const AuthProvider = ({ children }) => {
     setToken(getToken(), updatedUser); // Update stored user data
   };
 
-  const logout = () => {
+  const logout = async () => {
+    try {
+      await api.auth.logout(); // Revoke the token server side
+    } catch (error) {
+      console.error("Logout error:", error.response?.data || error);
+    }
     removeToken();
     setUser(null);
     window.location.href = '/login'; // Ensure clean state by forcing page reload
@@ -13,6 +13,7 @@ export const SettingsPage = () => {
 
   const [settings, setSettings] = useState({
     email_notifications: user?.email_notifications || false,
+    email_frequency: user?.email_frequency || 'immediate',
     preferred_currency: user?.preferred_currency || 'USD',
     budget_alert_threshold: user?.budget_alert_threshold || 80,
   });
@@ -58,6 +59,24 @@ export const SettingsPage = () => {
             </label>
           </div>
 
+          <div>
+            <label className="block text-sm font-medium text-gray-700 dark:text-gray-500">
+              Email Delivery
+            </label>
+            <select
+              value={settings.email_frequency}
+              disabled={!settings.email_notifications}
+              onChange={(e) => setSettings({
+                ...settings,
+                email_frequency: e.target.value
+              })}
+              className="mt-1 text-gray-900 dark:text-gray-400 block w-full pl-3 pr-10 py-2 text-base border-gray-300 focus:outline-none focus:ring-indigo-500 focus:border-indigo-500 sm:text-sm rounded-md"
+            >
+              <option value="immediate">Immediately</option>
+              <option value="daily">Daily digest</option>
+            </select>
+          </div>
+
           <div>
             <label className="block text-sm font-medium text-gray-700 dark:text-gray-500">
               Preferred Currency
@@ -39,10 +39,12 @@ axiosInstance.interceptors.response.use(
 
 const transactionsBase = 'transactions/transactions/';
 const categoriesBase = 'transactions/categories/';
+const recurringBase = 'transactions/recurring/';
 
 export const api = {
   auth: {
     login: (credentials) => axiosInstance.post('auth/login/', credentials),
+    logout: () => axiosInstance.post('auth/logout/'),
     register: (data) => axiosInstance.post('auth/register/', data),
     me: () => axiosInstance.get('auth/me/'),
     getProfile: () => axiosInstance.get('auth/me/'),
@@ -60,6 +62,8 @@ export const api = {
     markAsRead: (id) => axiosInstance.post(`notifications/${id}/read/`),
     markAllAsRead: () => axiosInstance.post('notifications/mark-all-read/'),
     getUnreadCount: () => axiosInstance.get('notifications/unread-count/'),
+    // EventSource can't send headers, so the token goes in the query string
+    streamUrl: () => `${baseURL}/api/notifications/stream/?token=${encodeURIComponent(getToken() || '')}`,
   },
 
   transactions: {
@@ -71,6 +75,8 @@ export const api = {
     getExpensesByCategory: () => axiosInstance.get(`${transactionsBase}by-category/`),
     getTrends: () => axiosInstance.get(`${transactionsBase}trends/`),
     getSummary: () => axiosInstance.get(`${transactionsBase}summary/`),
+    // params: start_date, end_date, optional compare_start_date/compare_end_date and type
+    compare: (params) => axiosInstance.get(`${transactionsBase}compare/`, { params }),
   },
 
   categories: {
@@ -96,6 +102,13 @@ export const api = {
     delete: (id) => axiosInstance.delete(`${categoriesBase}${id}/`),
   },
 
+  recurring: {
+    getAll: () => axiosInstance.get(recurringBase),
+    create: (data) => axiosInstance.post(recurringBase, data),
+    update: (id, data) => axiosInstance.patch(`${recurringBase}${id}/`, data),
+    delete: (id) => axiosInstance.delete(`${recurringBase}${id}/`),
+  },
+
   goals: {
     getAll: () => axiosInstance.get('goals/'),
     create: (data) => axiosInstance.post('goals/', data),
@@ -103,6 +116,14 @@ export const api = {
     delete: (id) => axiosInstance.delete(`goals/${id}/`),
     updateProgress: (goalId, data) => axiosInstance.patch(`goals/${goalId}/progress/`, data),
   },
+
+  budgets: {
+    getAll: () => axiosInstance.get('budgets/'),
+    create: (data) => axiosInstance.post('budgets/', data),
+    update: (id, data) => axiosInstance.patch(`budgets/${id}/`, data),
+    delete: (id) => axiosInstance.delete(`budgets/${id}/`),
+    getStatus: (month) => axiosInstance.get('budgets/status/', { params: month ? { month } : {} }),
+  },
 };
 
 export default api;
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Budget, BudgetAlert
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ('category', 'user', 'amount', 'created_at')
+    search_fields = ('category__name', 'user__username')
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(BudgetAlert)
+class BudgetAlertAdmin(admin.ModelAdmin):
+    list_display = ('budget', 'month', 'kind', 'created_at')
+    list_filter = ('kind', 'month')
+    readonly_fields = ('budget', 'month', 'kind', 'created_at')
@@ -0,0 +1,119 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from transactions.models import MonthlyRollup
+from transactions.rollups import month_start
+from .models import Budget, BudgetAlert
+
+
+def current_month():
+    return month_start(timezone.localdate())
+
+
+def spent(user_id, category_id, month):
+    """A category's expenses in one month, read from its rollup row."""
+    total = MonthlyRollup.objects.filter(
+        user_id=user_id, month=month_start(month), type='expense', category_id=category_id
+    ).values_list('total', flat=True).first()
+    return total or Decimal('0')
+
+
+def reached_alerts(amount, total, threshold):
+    """The alert kinds a budget of ``amount`` has reached with ``total`` spent, most severe first."""
+    if total > amount:
+        return [BudgetAlert.EXCEEDED, BudgetAlert.THRESHOLD]
+    if total * 100 >= amount * threshold:
+        return [BudgetAlert.THRESHOLD]
+    return []
+
+
+def evaluate(budget, month=None):
+    """
+    Record the alerts ``budget`` has reached in ``month`` and send the new ones.
+
+    Each kind is recorded once per budget and month, guarded by a unique
+    constraint, so concurrent writers can't send it twice. When one write
+    crosses both levels only the exceeded alert is sent. Returns the kinds
+    sent, most severe first.
+    """
+    month = month_start(month or current_month())
+    total = spent(budget.user_id, budget.category_id, month)
+    reached = reached_alerts(budget.amount, total, budget.user.budget_alert_threshold)
+    if not reached:
+        return []
+
+    recorded = set(BudgetAlert.objects.filter(budget=budget, month=month).values_list('kind', flat=True))
+    new = []
+    for kind in reached:
+        if kind in recorded:
+            continue
+        try:
+            with transaction.atomic():
+                BudgetAlert.objects.create(budget=budget, month=month, kind=kind)
+        except IntegrityError:
+            # Another writer recorded it first, and sends it
+            continue
+        new.append(kind)
+
+    if new:
+        from .tasks import send_budget_alert
+        budget_id, kind = budget.id, new[0]
+        transaction.on_commit(lambda: send_budget_alert.delay(budget_id, month.isoformat(), kind))
+    return new
+
+
+def evaluate_category(user_id, category_id, month):
+    """Evaluate the budget of a category, if it has one, after its rollup changed."""
+    if category_id is None or month_start(month) != current_month():
+        # Back-dated and imported history doesn't alert about past months
+        return []
+    budget = (
+        Budget.objects
+        .filter(user_id=user_id, category_id=category_id)
+        .select_related('user')
+        .only('id', 'amount', 'category_id', 'user_id', 'user__budget_alert_threshold')
+        .first()
+    )
+    if budget is None:
+        return []
+    return evaluate(budget, month)
+
+
+def status_report(user, month=None):
+    """
+    Response data of ``budgets/status/``.
+
+    Spending comes from the monthly rollups, so this is three queries
+    whatever the number of transactions.
+    """
+    month = month_start(month or current_month())
+    budgets = list(Budget.objects.filter(user=user).select_related('category'))
+    totals = dict(
+        MonthlyRollup.objects
+        .filter(user=user, month=month, type='expense', category_id__in=[budget.category_id for budget in budgets])
+        .values_list('category_id', 'total')
+    )
+    alerts = {}
+    for budget_id, kind in BudgetAlert.objects.filter(budget__user=user, month=month).values_list('budget_id', 'kind'):
+        alerts.setdefault(budget_id, []).append(kind)
+
+    rows = []
+    for budget in budgets:
+        total = totals.get(budget.category_id, Decimal('0'))
+        rows.append({
+            'id': budget.id,
+            'category': budget.category_id,
+            'category_name': budget.category.name,
+            'amount': budget.amount,
+            'spent': total,
+            'remaining': budget.amount - total,
+            'percent_used': round(total / budget.amount * 100, 2) if budget.amount else None,
+            'exceeded': total > budget.amount,
+            'alerts': sorted(alerts.get(budget.id, [])),
+        })
+    return {
+        'month': month,
+        'total_budgeted': sum((row['amount'] for row in rows), Decimal('0')),
+        'total_spent': sum((row['spent'] for row in rows), Decimal('0')),
+        'budgets': rows,
+    }
@@ -0,0 +1,41 @@
+from django.db import models
+from django.conf import settings
+from core.models import TimeStampedModel
+from transactions.models import Category
+
+class Budget(TimeStampedModel):
+    """A monthly spending limit for one expense category, the same every month."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='budgets')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+
+    class Meta:
+        ordering = ['category__name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='unique_category_budget'),
+        ]
+
+    def __str__(self):
+        return f"{self.category.name}: {self.amount}"
+
+class BudgetAlert(models.Model):
+    """An alert sent for a budget in one month; at most one of each kind per month."""
+    THRESHOLD = 'threshold'
+    EXCEEDED = 'exceeded'
+    KIND_CHOICES = [
+        (THRESHOLD, 'Threshold reached'),
+        (EXCEEDED, 'Exceeded'),
+    ]
+
+    budget = models.ForeignKey(Budget, on_delete=models.CASCADE, related_name='alerts')
+    month = models.DateField()  # First day of the month
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['budget', 'month', 'kind'], name='unique_budget_alert'),
+        ]
+
+    def __str__(self):
+        return f"{self.budget_id} - {self.month:%Y-%m} - {self.kind}"
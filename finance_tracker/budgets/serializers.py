@@ -0,0 +1,33 @@
+from decimal import Decimal
+from rest_framework import serializers
+from transactions.models import Category
+from .models import Budget
+
+class BudgetSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+
+    class Meta:
+        model = Budget
+        fields = ('id', 'category', 'category_name', 'amount', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'created_at', 'updated_at')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['category'].queryset = Category.objects.filter(user=request.user)
+
+    def validate_category(self, value):
+        if value.type != 'expense':
+            raise serializers.ValidationError("Budgets can only be set on expense categories.")
+        budgets = Budget.objects.filter(user=value.user, category=value)
+        if self.instance is not None:
+            budgets = budgets.exclude(pk=self.instance.pk)
+        if budgets.exists():
+            raise serializers.ValidationError("This category already has a budget.")
+        return value
+
+    def validate_amount(self, value):
+        if value <= Decimal('0'):
+            raise serializers.ValidationError("Amount must be greater than 0.")
+        return value
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from transactions.rollups import rollup_changed
+from .evaluator import evaluate, evaluate_category
+from .models import Budget
+
+
+@receiver(rollup_changed, dispatch_uid='evaluate-budget-on-rollup-change')
+def evaluate_budget_on_spending(sender, user_id, month, type, category_id, **kwargs):
+    # Every transaction write lands here through the rollups, bulk imports included
+    if type == 'expense':
+        evaluate_category(user_id, category_id, month)
+
+
+@receiver(post_save, sender=Budget, dispatch_uid='evaluate-budget-on-save')
+def evaluate_budget_on_save(sender, instance, raw=False, **kwargs):
+    # A lowered limit can be reached without any new spending
+    if not raw:
+        evaluate(instance)
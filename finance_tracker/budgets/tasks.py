@@ -0,0 +1,38 @@
+from celery import shared_task
+from django.utils.dateparse import parse_date
+from notifications import delivery
+from .evaluator import spent
+from .models import Budget, BudgetAlert
+
+@shared_task
+def send_budget_alert(budget_id, month, kind):
+    """Notify a user that a budget reached their alert threshold or was exceeded."""
+    budget = Budget.objects.select_related('category', 'user').filter(id=budget_id).first()
+    if budget is None:
+        return f"Budget {budget_id} not found"
+
+    month = parse_date(month)
+    total = spent(budget.user_id, budget.category_id, month)
+    if kind == BudgetAlert.EXCEEDED:
+        title = f"Budget exceeded: {budget.category.name}"
+        message = (
+            f"You have spent {total} of your {budget.amount} {budget.category.name} "
+            f"budget for {month:%B %Y}, {total - budget.amount} over."
+        )
+        notification_type = 'BUDGET_EXCEEDED'
+    else:
+        title = f"Approaching budget: {budget.category.name}"
+        message = (
+            f"You have spent {total} of your {budget.amount} {budget.category.name} "
+            f"budget for {month:%B %Y} ({budget.user.budget_alert_threshold}% alert threshold)."
+        )
+        notification_type = 'BUDGET_THRESHOLD'
+
+    delivery.notify([{
+        'user_id': budget.user_id,
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+    }])
+    delivery.send_queued_emails(user_ids=[budget.user_id])
+    return f"Sent {kind} alert for budget {budget_id}"
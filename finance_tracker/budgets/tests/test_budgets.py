@@ -0,0 +1,190 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from budgets.evaluator import current_month, status_report
+from budgets.models import Budget, BudgetAlert
+from budgets.tasks import send_budget_alert
+from notifications.models import Notification
+from transactions.models import Category, Transaction
+
+User = get_user_model()
+
+class BudgetTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.today = timezone.localdate()
+
+    def create_budget(self, amount='100.00', category=None):
+        return Budget.objects.create(user=self.user, category=category or self.category, amount=Decimal(amount))
+
+    def spend(self, amount, date=None, category=None):
+        return Transaction.objects.create(
+            user=self.user,
+            date=date or self.today,
+            description='Spending',
+            amount=Decimal(amount),
+            type='expense',
+            category=category or self.category
+        )
+
+class BudgetAlertTest(BudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch('budgets.tasks.send_budget_alert.delay')
+        self.send_alert = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent(self):
+        return [call.args[2] for call in self.send_alert.call_args_list]
+
+    def spend(self, amount, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().spend(amount, **kwargs)
+
+    def test_alerts_fire_once_per_period(self):
+        self.create_budget()
+        self.spend('50.00')
+        self.assertEqual(self.sent(), [])
+
+        self.spend('35.00')
+        self.assertEqual(self.sent(), ['threshold'])
+        self.spend('5.00')
+        self.assertEqual(self.sent(), ['threshold'])
+
+        transaction = self.spend('20.00')
+        self.assertEqual(self.sent(), ['threshold', 'exceeded'])
+        self.spend('20.00')
+        self.assertEqual(self.sent(), ['threshold', 'exceeded'])
+
+        # Dropping back under and crossing again stays silent for the month
+        transaction.amount = Decimal('1.00')
+        transaction.save()
+        self.spend('50.00')
+        self.assertEqual(self.sent(), ['threshold', 'exceeded'])
+        self.assertEqual(BudgetAlert.objects.count(), 2)
+
+    def test_crossing_both_levels_sends_the_exceeded_alert_only(self):
+        budget = self.create_budget()
+        self.spend('150.00')
+        self.assertEqual(self.sent(), ['exceeded'])
+        self.assertEqual(self.send_alert.call_args.args, (budget.id, current_month().isoformat(), 'exceeded'))
+        self.assertEqual(set(BudgetAlert.objects.values_list('kind', flat=True)), {'threshold', 'exceeded'})
+
+    def test_user_threshold(self):
+        self.user.budget_alert_threshold = 50
+        self.user.save()
+        self.create_budget()
+        self.spend('50.00')
+        self.assertEqual(self.sent(), ['threshold'])
+
+    def test_other_categories_and_past_months_do_not_alert(self):
+        self.create_budget()
+        self.spend('500.00', category=Category.objects.create(user=self.user, name='Rent', type='expense'))
+        self.spend('500.00', date=current_month() - timedelta(days=1))
+        self.assertEqual(self.sent(), [])
+
+    def test_lowering_the_budget_alerts(self):
+        budget = self.create_budget()
+        self.spend('60.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            budget.amount = Decimal('70.00')
+            budget.save()
+        self.assertEqual(self.sent(), ['threshold'])
+
+    def test_evaluation_does_not_rescan_transactions(self):
+        self.create_budget()
+        self.spend('10.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.spend('85.00')
+        scans = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'transactions_transaction' in query['sql']
+        ]
+        self.assertEqual(scans, [])
+        self.assertEqual(self.sent(), ['threshold'])
+
+class BudgetAlertTaskTest(BudgetTestCase):
+    def test_exceeded_alert_creates_notification_and_email(self):
+        budget = self.create_budget()
+        with patch('budgets.tasks.send_budget_alert.delay'):
+            self.spend('130.00')
+
+        send_budget_alert(budget.id, current_month().isoformat(), 'exceeded')
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.notification_type, 'BUDGET_EXCEEDED')
+        self.assertEqual(notification.title, 'Budget exceeded: Food')
+        self.assertIn('30.00 over', notification.message)
+        self.assertEqual(len(mail.outbox), 1)
+
+class BudgetAPITest(BudgetTestCase):
+    def test_create_budget(self):
+        url = reverse('budget-list')
+        response = self.client.post(url, {'category': self.category.id, 'amount': '250.00'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['category_name'], 'Food')
+
+        response = self.client.post(url, {'category': self.category.id, 'amount': '100.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        response = self.client.post(url, {'category': salary.id, 'amount': '100.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        theirs = Category.objects.create(user=other, name='Food', type='expense')
+        response = self.client.post(url, {'category': theirs.id, 'amount': '100.00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_status(self):
+        self.create_budget()
+        self.create_budget('50.00', Category.objects.create(user=self.user, name='Fun', type='expense'))
+        with patch('budgets.tasks.send_budget_alert.delay'):
+            self.spend('40.00')
+            transaction = self.spend('80.00')
+            transaction.delete()
+            self.spend('500.00', date=current_month() - timedelta(days=1))
+
+        response = self.client.get(reverse('budget-status'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['month'], current_month())
+        self.assertEqual(response.data['total_spent'], Decimal('40.00'))
+        rows = {row['category_name']: row for row in response.data['budgets']}
+        food, fun = rows['Food'], rows['Fun']
+        self.assertEqual(food['spent'], Decimal('40.00'))
+        self.assertEqual(food['remaining'], Decimal('60.00'))
+        self.assertEqual(food['percent_used'], Decimal('40.00'))
+        self.assertEqual(fun['spent'], Decimal('0'))
+
+        last_month = (current_month() - timedelta(days=1)).strftime('%Y-%m')
+        response = self.client.get(reverse('budget-status'), {'month': last_month})
+        food = next(row for row in response.data['budgets'] if row['category_name'] == 'Food')
+        self.assertTrue(food['exceeded'])
+
+        response = self.client.get(reverse('budget-status'), {'month': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_status_query_count_is_constant(self):
+        for i in range(5):
+            category = Category.objects.create(user=self.user, name=f'Category {i}', type='expense')
+            self.create_budget(category=category)
+            with patch('budgets.tasks.send_budget_alert.delay'):
+                for _ in range(3):
+                    self.spend('10.00', category=category)
+        with self.assertNumQueries(3):
+            status_report(self.user)
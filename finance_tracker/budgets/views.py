@@ -0,0 +1,32 @@
+from datetime import datetime
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from core.views import ConditionalGetMixin
+from .evaluator import status_report
+from .models import Budget
+from .serializers import BudgetSerializer
+
+class BudgetViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    serializer_class = BudgetSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user).select_related('category')
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['GET'])
+    def status(self, request):
+        """Spending against every budget in ``?month=YYYY-MM``, the current month by default."""
+        month = request.query_params.get('month')
+        if month:
+            try:
+                month = datetime.strptime(month, '%Y-%m').date()
+            except ValueError:
+                return Response(
+                    {'error': 'month must be formatted as YYYY-MM'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(status_report(request.user, month))
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from . import signals  # noqa: F401
+        from .instrumentation import install_query_recorder
+        from .metrics import install_query_metrics, install_task_metrics
+        from .queries import install_query_counter
+
+        connection_created.connect(install_query_recorder, dispatch_uid='install-query-recorder')
+        connection_created.connect(install_query_counter, dispatch_uid='install-query-counter')
+        connection_created.connect(install_query_metrics, dispatch_uid='install-query-metrics')
+        install_task_metrics()
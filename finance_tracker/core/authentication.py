@@ -0,0 +1,207 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, router, transaction
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from .cache import CacheStats
+
+TOKEN_KEY = 'auth-token:{digest}'
+# Left in the shared cache by an invalidation, so a lookup that read the token
+# before it can't cache it again (entries are only ever added, never replaced)
+REVOKED = 'revoked'
+REVOKED_TIMEOUT = 10
+# User fields kept out of the shared cache; a user built from it loads them
+# from the database when read
+SECRET_USER_FIELDS = ('password',)
+
+auth_cache_stats = CacheStats('auth')
+
+
+def _digest(key):
+    # Token keys are credentials, keep them out of the cache's key space
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _user_fields():
+    return [
+        field for field in get_user_model()._meta.concrete_fields
+        if field.name not in SECRET_USER_FIELDS
+    ]
+
+
+def _shared_entry(token):
+    """What the shared cache keeps of a token: no key, no secret user fields."""
+    return {
+        'created': token.created,
+        'user': [field.get_prep_value(field.value_from_object(token.user)) for field in _user_fields()],
+    }
+
+
+def _from_shared_entry(key, entry):
+    """A token and user rebuilt from ``_shared_entry``, as if loaded with the secrets deferred."""
+    User = get_user_model()
+    fields = _user_fields()
+    user = User.from_db(router.db_for_read(User), [field.attname for field in fields], entry['user'])
+    token = Token.from_db(router.db_for_read(Token), ['key', 'user_id', 'created'], [key, user.pk, entry['created']])
+    token.user = user
+    return token
+
+
+class TokenCache:
+    """
+    Token key -> token (with its user) lookups, in a bounded per-process LRU
+    in front of the shared cache.
+
+    The shared cache holds only the token's date and its user's fields,
+    minus ``SECRET_USER_FIELDS``; the loaded objects stay in this process.
+
+    Invalidation removes an entry from the shared cache and from this
+    process at once. Other processes keep their copy for at most
+    ``AUTH_TOKEN_LOCAL_TIMEOUT`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # digest -> (expires, token)
+        self._generation = 0
+        self.local_stats = CacheStats('auth.local')
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'AUTH_TOKEN_LOCAL_MAX_ENTRIES', 10000)
+
+    @property
+    def local_timeout(self):
+        return getattr(settings, 'AUTH_TOKEN_LOCAL_TIMEOUT', 10)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300)
+
+    @property
+    def generation(self):
+        """Changes on every invalidation; read it before loading a token to ``set``."""
+        return self._generation
+
+    def get(self, key):
+        """The cached token of a key with its user, or None."""
+        digest = _digest(key)
+        generation = self._generation
+        token = self._get_local(digest)
+        self.local_stats.record(hit=token is not None)
+        if token is None:
+            entry = cache.get(TOKEN_KEY.format(digest=digest))
+            if entry is None or entry == REVOKED:
+                return None
+            token = _from_shared_entry(key, entry)
+            self._set_local(digest, token, generation)
+
+        # Copies, so a request changing its user can't change other requests'
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+        return token
+
+    def set(self, key, token, generation):
+        """Cache a token loaded after ``generation`` was read, unless invalidated since."""
+        digest = _digest(key)
+        if cache.add(TOKEN_KEY.format(digest=digest), _shared_entry(token), timeout=self.timeout):
+            self._set_local(digest, token, generation)
+
+    def invalidate(self, keys):
+        keys = list(keys)
+        if not keys:
+            return
+        digests = [_digest(key) for key in keys]
+        with self._lock:
+            self._generation += 1
+            for digest in digests:
+                self._entries.pop(digest, None)
+        cache.set_many({TOKEN_KEY.format(digest=digest): REVOKED for digest in digests}, timeout=REVOKED_TIMEOUT)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'timeout': self.local_timeout,
+            }
+
+    def _get_local(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires, token = entry
+            if expires <= time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return token
+
+    def _set_local(self, digest, token, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[digest] = (time.monotonic() + self.local_timeout, token)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache()
+
+
+def invalidate_tokens(keys):
+    """Drop cached lookups of these token keys, again after commit inside a transaction."""
+    keys = list(keys)
+    token_cache.invalidate(keys)
+    if connection.in_atomic_block:
+        # A lookup between now and the commit still reads the old rows
+        transaction.on_commit(lambda: token_cache.invalidate(keys))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    ``TokenAuthentication`` that caches each token's lookup, sparing the
+    token and user query on repeated requests.
+
+    Cached users are dropped when their token is deleted or the user is
+    saved (password, active flag, settings), see ``core.signals``.
+    """
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        auth_cache_stats.record(hit=token is not None)
+        if token is not None:
+            return (token.user, token)
+
+        generation = token_cache.generation
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, token, generation)
+        return (user, token)
+
+
+class QueryParamTokenAuthentication(CachedTokenAuthentication):
+    """
+    Token authentication from a ``?token=`` query param.
+
+    Only for endpoints browsers open without custom headers, such as an
+    ``EventSource`` stream.
+    """
+
+    def authenticate(self, request):
+        key = request.query_params.get('token')
+        if not key:
+            return None
+        return self.authenticate_credentials(key)
@@ -0,0 +1,194 @@
+import hashlib
+from asgiref.sync import iscoroutinefunction, sync_to_async
+import threading
+import time
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from .instrumentation import record_cache_lookup
+from .metrics import cache_lookups
+
+VERSION_KEY = 'data-version:{scope}:{user_id}'
+MODIFIED_KEY = 'data-modified:{scope}:{user_id}'
+
+# Transactions, categories and goals (everything the analytics read)
+DATA_SCOPE = 'data'
+NOTIFICATIONS_SCOPE = 'notifications'
+# Transactions and categories only, for the per-process analytics snapshots
+TRANSACTIONS_SCOPE = 'transactions'
+SCOPES = (DATA_SCOPE, NOTIFICATIONS_SCOPE)
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one cache layer in this process."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        record_cache_lookup(self.name, hit)
+        cache_lookups.inc(cache=self.name, result='hit' if hit else 'miss')
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+analytics_cache_stats = CacheStats('analytics')
+
+
+def _new_version():
+    # Time based, so a version key that was evicted never restarts at a
+    # number whose cache entries may still be around
+    return time.time_ns()
+
+
+def get_data_version(user_id, scope=DATA_SCOPE):
+    """Current data version of a user, created on first use."""
+    key = VERSION_KEY.format(scope=scope, user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_versions(user_ids, scope=DATA_SCOPE):
+    """``{user_id: version}`` of many users in one cache round trip, plus one per missing version."""
+    keys = {VERSION_KEY.format(scope=scope, user_id=user_id): user_id for user_id in user_ids}
+    versions = {keys[key]: version for key, version in cache.get_many(list(keys)).items()}
+    for user_id in set(keys.values()) - set(versions):
+        versions[user_id] = get_data_version(user_id, scope)
+    return versions
+
+
+def get_validators(user_id, scope=DATA_SCOPE):
+    """
+    ``(version, last_modified)`` of a user's data in one cache round trip.
+
+    ``last_modified`` is the epoch time of the last bump, or None if unknown.
+    """
+    version_key = VERSION_KEY.format(scope=scope, user_id=user_id)
+    modified_key = MODIFIED_KEY.format(scope=scope, user_id=user_id)
+    values = cache.get_many([version_key, modified_key])
+    version = values.get(version_key)
+    if version is None:
+        version = get_data_version(user_id, scope)
+    return version, values.get(modified_key)
+
+
+def bump_data_version(user_id, scope=DATA_SCOPE):
+    """Invalidate every versioned cache entry of a user."""
+    key = VERSION_KEY.format(scope=scope, user_id=user_id)
+    cache.set(MODIFIED_KEY.format(scope=scope, user_id=user_id), time.time(), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key missing (never set or evicted)
+        version = _new_version()
+        cache.set(key, version, timeout=None)
+        return version
+
+
+def versioned_key(user_id, name, params=(), version=None):
+    if version is None:
+        version = get_data_version(user_id)
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f'analytics:{user_id}:{version}:{name}:{digest}'
+
+
+def cache_params(query_params):
+    """
+    The part of a cache key that comes from a request: its query params and
+    today's date (summaries depend on the current month).
+    """
+    return (sorted(query_params.lists()), timezone.localdate().isoformat())
+
+
+def _timeout(timeout):
+    return timeout or getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 3600)
+
+
+def cached_for_user(user_id, name, params, compute, timeout=None):
+    """Return the cached value of ``compute()`` for the user's current data version."""
+    key = versioned_key(user_id, name, params)
+    data = cache.get(key)
+    if data is not None:
+        analytics_cache_stats.record(hit=True)
+        return data
+
+    analytics_cache_stats.record(hit=False)
+    data = compute()
+    cache.set(key, data, timeout=_timeout(timeout))
+    return data
+
+
+def cache_per_user(name, timeout=None):
+    """
+    Cache a view method's successful response data per user and data version.
+
+    Entries go stale only by a version bump, which happens on any write to
+    the user's data. Callers of ``cached_for_user`` using the same name and
+    ``cache_params`` share the entries.
+    """
+    def decorator(view_method):
+        if iscoroutinefunction(view_method):
+            @wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                user = request.user
+                if not user.is_authenticated:
+                    return await view_method(self, request, *args, **kwargs)
+
+                key = await sync_to_async(versioned_key)(user.id, name, cache_params(request.query_params))
+                data = await cache.aget(key)
+                if data is not None:
+                    analytics_cache_stats.record(hit=True)
+                    return Response(data)
+
+                analytics_cache_stats.record(hit=False)
+                response = await view_method(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    await cache.aset(key, response.data, timeout=_timeout(timeout))
+                return response
+            return async_wrapper
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            user = request.user
+            if not user.is_authenticated:
+                return view_method(self, request, *args, **kwargs)
+
+            key = versioned_key(user.id, name, cache_params(request.query_params))
+            data = cache.get(key)
+            if data is not None:
+                analytics_cache_stats.record(hit=True)
+                return Response(data)
+
+            analytics_cache_stats.record(hit=False)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, timeout=_timeout(timeout))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,108 @@
+"""
+Per-request performance counters.
+
+``RequestTimingMiddleware`` starts a ``RequestTiming`` for a sample of
+requests and makes it current for the request's context. Database queries
+(through an execute wrapper on every connection) and ``CacheStats`` lookups
+made in that context add to it, and the middleware times the rendering of
+the response body. Code outside a sampled request only pays a context
+variable lookup.
+"""
+import contextvars
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+_current = contextvars.ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Counters of one request. Thread-safe, as sections may run in worker threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start = perf_counter()
+        self.duration = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.cache = {}
+
+    def add_query(self, seconds):
+        with self._lock:
+            self.db_queries += 1
+            self.db_time += seconds
+
+    def add_cache_lookup(self, name, hit):
+        with self._lock:
+            counts = self.cache.setdefault(name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def add_serializer_time(self, seconds):
+        with self._lock:
+            self.serializer_time += seconds
+
+    def finish(self):
+        self.duration = perf_counter() - self.start
+
+    def server_timing(self):
+        """The ``Server-Timing`` header value."""
+        metrics = [
+            f'total;dur={self.duration * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'serialize;dur={self.serializer_time * 1000:.1f}',
+        ]
+        for name, counts in sorted(self.cache.items()):
+            metrics.append(
+                f'cache-{name.replace(".", "-")};desc="{counts["hits"]}/{counts["hits"] + counts["misses"]} hits"'
+            )
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'duration_ms': round(self.duration * 1000, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'cache': self.cache,
+        }
+
+
+def current_timing():
+    """The ``RequestTiming`` of the sampled request being handled, or None."""
+    return _current.get()
+
+
+@contextmanager
+def timing_request():
+    timing = RequestTiming()
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        timing.finish()
+        _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request."""
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(perf_counter() - start)
+
+
+def record_cache_lookup(name, hit):
+    timing = _current.get()
+    if timing is not None:
+        timing.add_cache_lookup(name, hit)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver, wrapping every new connection's queries."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
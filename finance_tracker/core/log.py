@@ -0,0 +1,89 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Attributes every LogRecord has; anything else was passed in ``extra``
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with the fields passed in ``extra`` at the top level."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Appends records to a file from a background thread.
+
+    Logging a record only puts it on a bounded queue. When the writer falls
+    behind by ``max_queued`` records, new ones are dropped and counted in
+    ``dropped`` rather than blocking the request that logs them.
+    """
+
+    def __init__(self, filename, max_queued=10000):
+        super().__init__(queue.Queue(max_queued))
+        self.target = logging.FileHandler(filename, delay=True)
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        # Records are formatted by the writer thread
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Keep the record's own message and extra fields for the target's formatter
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        # Started lazily and again after a fork, which doesn't copy the writer thread
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._listener = QueueListener(self.queue, self.target)
+                self._listener.start()
+                self._pid = os.getpid()
+
+    def flush(self):
+        """Wait for the queued records to be written."""
+        if self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+        self.target.flush()
+
+    def close(self):
+        self.flush()
+        self.target.close()
+        super().close()
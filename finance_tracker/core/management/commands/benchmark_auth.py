@@ -0,0 +1,58 @@
+import statistics
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from core.authentication import CachedTokenAuthentication, token_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Time authenticating one request with a user's token: the token and user "
+        "query of TokenAuthentication against the shared and per-process caches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose token the requests carry')
+        parser.add_argument('--repeat', type=int, default=1000, help='Requests per path')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        token, _ = Token.objects.get_or_create(user=user)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {token.key}')
+        uncached, cached = TokenAuthentication(), CachedTokenAuthentication()
+        cached.authenticate(request)
+
+        def shared_cache_hit():
+            # As in a process that hasn't seen the token yet
+            token_cache.clear()
+            cached.authenticate(request)
+
+        paths = (
+            ('TokenAuthentication', lambda: uncached.authenticate(request)),
+            ('shared cache hit', shared_cache_hit),
+            ('per-process hit', lambda: cached.authenticate(request)),
+        )
+        baseline = None
+        self.stdout.write(f"{'path':<22}{'median us':>12}{'p99 us':>10}{'speedup':>10}")
+        for name, authenticate in paths:
+            timings = self.measure(authenticate, options['repeat'])
+            median = statistics.median(timings)
+            p99 = statistics.quantiles(timings, n=100)[98]
+            baseline = baseline or median
+            self.stdout.write(f'{name:<22}{median * 1e6:>12.1f}{p99 * 1e6:>10.1f}{baseline / median:>9.1f}x')
+
+    def measure(self, compute, repeat):
+        """Seconds of each call."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute()
+            timings.append(time.perf_counter() - start)
+        return timings
@@ -0,0 +1,452 @@
+"""
+In-process metrics, exposed in the Prometheus text format.
+
+Counters and fixed-bucket histograms live in ``registry`` and are updated
+under a lock, so recording costs a dictionary update. Every metric is
+defined here, so each process knows the full set.
+
+With ``METRICS_MULTIPROCESS_DIR`` set (gunicorn or Celery workers), each
+process also writes its values to a file of its own in that directory,
+every ``METRICS_FLUSH_INTERVAL`` seconds from a background thread and once
+more on exit, and exposition sums the files of every process, past ones
+included, so counters don't go back when a worker is recycled. Exposition
+also merges the files of exited processes into one, so the directory holds
+a file per live process plus that one. The directory is per host; empty it
+before the workers start, as a deploy would.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+TASK_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        self.registry = None
+
+    def _key(self, labels):
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([str(labels[name]) for name in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+
+    def _changed(self):
+        if self.registry is not None:
+            self.registry.changed()
+
+    def samples(self):
+        """``{label values: value}``, a copy."""
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def merge(self, total, value):
+        raise NotImplementedError
+
+    def expose(self, samples):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self._changed()
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def merge(self, total, value):
+        return (total or 0) + value
+
+    def expose(self, samples):
+        for key, value in sorted(samples.items()):
+            yield f'{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    """
+    Observations counted in fixed ``buckets`` (upper bounds, plus +Inf),
+    with their sum and count. Stored per bucket, cumulated on exposition.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Bucket counts, +Inf included, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+        self._changed()
+
+    @contextmanager
+    def time(self, **labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def _copy(self, value):
+        return list(value)
+
+    def merge(self, total, value):
+        if total is None:
+            return list(value)
+        return [a + b for a, b in zip(total, value)]
+
+    def expose(self, samples):
+        bounds = self.buckets + (float('inf'),)
+        for key, counts in sorted(samples.items()):
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = _format_labels(pairs + [('le', _format_value(bound))])
+                yield f'{self.name}_bucket{le} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(pairs)} {_format_value(counts[-1])}'
+            yield f'{self.name}_count{_format_labels(pairs)} {cumulative}'
+
+
+class MultiProcessFiles:
+    """
+    One JSON file of metric values per process, in a shared directory, and
+    one of the merged values of exited processes.
+    """
+    AGGREGATE = 'metrics-aggregate.json'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.renew()
+
+    def renew(self):
+        # Not the pid alone: a recycled worker may get a pid a past one had
+        self.path = os.path.join(self.directory, f'metrics-{os.getpid()}-{uuid.uuid4().hex[:8]}.json')
+
+    @contextmanager
+    def locked(self, operation):
+        """Readers share the directory; merging exited processes' files excludes them."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            fcntl.flock(f, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def write(self, values, path=None):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix='.metrics-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(values, f)
+        # Readers see the old file or the new one, never a partial write
+        os.replace(temporary, path or self.path)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Removed or replaced since listing
+            return None
+
+    def _paths(self):
+        return glob.glob(os.path.join(self.directory, 'metrics-*.json'))
+
+    def read_all(self):
+        with self.locked(fcntl.LOCK_SH):
+            snapshots = [self._read(path) for path in self._paths()]
+        return [snapshot for snapshot in snapshots if snapshot is not None]
+
+    def exited(self):
+        """Files of processes no longer running, the aggregate aside."""
+        paths = []
+        for path in self._paths():
+            try:
+                pid = int(os.path.basename(path).split('-')[1])
+            except ValueError:
+                continue
+            if not _process_alive(pid):
+                paths.append(path)
+        return paths
+
+    def compact(self, merge):
+        """Fold exited processes' files into the aggregate with ``merge(snapshots)``."""
+        if not self.exited():
+            return
+        with self.locked(fcntl.LOCK_EX):
+            paths = self.exited()
+            aggregate = os.path.join(self.directory, self.AGGREGATE)
+            snapshots = [self._read(path) for path in [aggregate, *paths]]
+            self.write(merge([snapshot for snapshot in snapshots if snapshot is not None]), aggregate)
+            for path in paths:
+                os.remove(path)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user
+        return True
+    return True
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._files = None
+        self._dirty = threading.Event()
+        self._flusher = None
+        self._flush_at_exit = False
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        metric.registry = self
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    @property
+    def files(self):
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return None
+        files = self._files
+        if files is not None and files.directory == directory:
+            return files
+        with self._lock:
+            if self._files is None or self._files.directory != directory:
+                self._files = MultiProcessFiles(directory)
+            return self._files
+
+    def snapshot(self):
+        """This process's values, as ``{name: [[label values, value], ...]}``."""
+        return {
+            name: [[list(key), value] for key, value in metric.samples().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def changed(self):
+        if self._dirty.is_set() or self.files is None:
+            return
+        self._dirty.set()
+        if self._flusher is None or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or not self._flusher.is_alive():
+                    self._flusher = threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True)
+                    self._flusher.start()
+                if not self._flush_at_exit:
+                    # The daemon thread dies with the process; what it hadn't written yet would be lost
+                    atexit.register(self.flush)
+                    self._flush_at_exit = True
+
+    def _flush_periodically(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        while True:
+            self._dirty.wait()
+            self.flush()
+            time.sleep(interval)
+
+    def flush(self):
+        """Write this process's values to its multiprocess file, if any."""
+        files = self.files
+        if files is None:
+            return
+        self._dirty.clear()
+        with self._lock:
+            files.write(self.snapshot())
+
+    def _after_fork(self):
+        # A forked worker starts from zero under a file of its own; what the
+        # parent recorded stays in the parent's file
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._flusher = None
+        for metric in self._metrics.values():
+            metric._lock = threading.Lock()
+            metric._values.clear()
+        if self._files is not None:
+            self._files.renew()
+
+    def merge(self, snapshots):
+        """``{name: {label values: value}}``, the sum of ``snapshot()`` results."""
+        totals = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None:
+                    continue
+                for key, value in samples:
+                    key = tuple(key)
+                    totals[name][key] = metric.merge(totals[name].get(key), value)
+        return totals
+
+    def collect(self):
+        """``{name: {label values: value}}`` of this process, or of every process."""
+        files = self.files
+        if files is None:
+            return {name: metric.samples() for name, metric in self._metrics.items()}
+        self.flush()
+        files.compact(lambda snapshots: {
+            name: [[list(key), value] for key, value in samples.items()]
+            for name, samples in self.merge(snapshots).items()
+        })
+        return self.merge(files.read_all())
+
+    def expose(self):
+        """The Prometheus text exposition of ``collect()``."""
+        lines = []
+        for name, samples in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            lines.extend(metric.expose(samples))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    'http_requests_total', 'Requests handled, by view, method and status.', ('view', 'method', 'status')
+)
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Request latency, by view and method.', ('view', 'method')
+)
+db_query_duration = registry.histogram(
+    'db_query_duration_seconds', 'Database query time, by connection.', ('alias',), buckets=QUERY_BUCKETS
+)
+cache_lookups = registry.counter(
+    'cache_lookups_total', 'Cache layer lookups, by layer and result.', ('cache', 'result')
+)
+task_runs = registry.counter(
+    'celery_task_runs_total', 'Celery task runs, by task and final state.', ('task', 'state')
+)
+task_duration = registry.histogram(
+    'celery_task_duration_seconds', 'Celery task run time, by task.', ('task',), buckets=TASK_BUCKETS
+)
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper timing every query."""
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        db_query_duration.observe(perf_counter() - start, alias=context['connection'].alias)
+
+
+def install_query_metrics(sender, connection, **kwargs):
+    """``connection_created`` receiver, timing every new connection's queries."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+_task_starts = {}
+_task_starts_lock = threading.Lock()
+
+
+def task_started(sender=None, task_id=None, **kwargs):
+    with _task_starts_lock:
+        _task_starts[task_id] = perf_counter()
+
+
+def task_finished(sender=None, task_id=None, state=None, **kwargs):
+    with _task_starts_lock:
+        start = _task_starts.pop(task_id, None)
+    if start is None:
+        return
+    task_duration.observe(perf_counter() - start, task=sender.name)
+    task_runs.inc(task=sender.name, state=state or 'UNKNOWN')
+
+
+def flush_metrics(**kwargs):
+    # Pool processes leave through os._exit, skipping atexit
+    registry.flush()
+
+
+def install_task_metrics():
+    """Time every Celery task run in this process."""
+    from celery.signals import task_postrun, task_prerun, worker_process_shutdown
+
+    task_prerun.connect(task_started, dispatch_uid='metrics-task-started')
+    task_postrun.connect(task_finished, dispatch_uid='metrics-task-finished')
+    worker_process_shutdown.connect(flush_metrics, dispatch_uid='metrics-flush')
@@ -1,30 +1,137 @@
 import logging
-import time
+import random
+from time import perf_counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.functional import SimpleLazyObject, empty
+from .instrumentation import current_timing, timing_request
+from .metrics import http_request_duration, http_requests
+from .queries import QueryBudget
 
-logger = logging.getLogger('django')
+logger = logging.getLogger('core.requests')
+
+
+class MetricsMiddleware:
+    """
+    Counts every request and its latency per view (the URL pattern's name,
+    so label values stay few) in ``core.metrics``.
+    """
+    sync_capable = True
+    async_capable = True
 
-class RequestLoggingMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        start_time = time.time()
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = perf_counter()
+        response = self.get_response(request)
+        self.record(request, response, perf_counter() - start)
+        return response
 
-        # Log request
-        logger.info(f"Request: {request.method} {request.path} from {request.META.get('REMOTE_ADDR')}")
+    async def __acall__(self, request):
+        start = perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, perf_counter() - start)
+        return response
 
-        response = self.get_response(request)
+    def record(self, request, response, seconds):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match is not None else 'unmatched'
+        http_request_duration.observe(seconds, view=view, method=request.method)
+        http_requests.inc(view=view, method=request.method, status=response.status_code)
+
+
+class RequestTimingMiddleware:
+    """
+    Measures a sample of requests: wall time, database queries and time,
+    cache hits and the time spent rendering the response body (serializing).
+
+    Sampled responses carry them in a ``Server-Timing`` header, and each is
+    logged as one structured record on the ``core.requests`` logger.
+    ``REQUEST_TIMING_SAMPLE_RATE`` is the fraction of requests sampled; the
+    others pass through untouched.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
-        # Log response
-        duration = time.time() - start_time
-        logger.info(
-            f"Response: {request.method} {request.path} completed in {duration:.2f}s "
-            f"with status {response.status_code}"
-        )
+    def sampled(self):
+        rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 1.0)
+        return rate >= 1 or random.random() < rate
 
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        with timing_request() as timing:
+            response = self.get_response(request)
+        return self.finish(request, response, timing)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        with timing_request() as timing:
+            response = await self.get_response(request)
+        return self.finish(request, response, timing)
+
+    def process_template_response(self, request, response):
+        # Rendered here, timed, instead of by the handler right after. Listed
+        # near the top, this runs after the other middleware's hooks
+        timing = current_timing()
+        if timing is not None:
+            start = perf_counter()
+            response.render()
+            timing.add_serializer_time(perf_counter() - start)
         return response
 
-    def process_exception(self, request, exception):
-        logger.error(f"Exception in {request.method} {request.path}: {str(exception)}")
-        return None 
\ No newline at end of file
+    def finish(self, request, response, timing):
+        response['Server-Timing'] = timing.server_timing()
+        user = getattr(request, 'user', None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Not looked up by the view; don't load a session just to log it
+            user = None
+        # The path only: query strings can carry credentials (?token=)
+        logger.info('request', extra={
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'user_id': user.id if user is not None and user.is_authenticated else None,
+            **timing.as_dict(),
+        })
+        return response
+
+
+class QueryBudgetMiddleware:
+    """
+    Checks every request for repeated queries (see ``core.queries``) when
+    ``QUERY_REPEAT_DETECTION`` is on, as it is under DEBUG.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_REPEAT_DETECTION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryBudget(name=f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with QueryBudget(name=f'{request.method} {request.path}'):
+            return await self.get_response(request)
@@ -0,0 +1,178 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on every ordering column.
+
+    Unlike DRF's ``CursorPagination``, which positions on the first ordering
+    field and skips ties with an OFFSET, the cursor stores the full row key
+    (e.g. ``(date, id)``), so each page is a single indexed range scan no
+    matter how deep the client is. No ``COUNT(*)`` is issued.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = None
+    max_page_size = 100
+    ordering = ('-id',)
+    tiebreaker = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        cursor = self.decode_cursor(request, queryset)
+        reverse = bool(cursor and cursor['r'])
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self.seek_filter(cursor['values'], reverse))
+        if reverse:
+            queryset = queryset.reverse()
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = not reverse and has_more or reverse
+        self.has_previous = reverse and has_more or (not reverse and cursor is not None)
+        self.first_key = self.row_key(results[0]) if results else None
+        self.last_key = self.row_key(results[-1]) if results else None
+        if not results and cursor:
+            # Empty page reached through a cursor: keep it as the anchor
+            self.first_key = self.last_key = cursor['v']
+            self.has_next = reverse
+            self.has_previous = not reverse
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if hasattr(backend, 'get_ordering'):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        ordering = list(ordering or self.ordering)
+
+        # Always end on a unique column so every row has a distinct key
+        fields = [field.lstrip('-') for field in ordering]
+        if self.tiebreaker not in fields:
+            descending = ordering[0].startswith('-')
+            ordering.append(f'-{self.tiebreaker}' if descending else self.tiebreaker)
+        return ordering
+
+    def seek_filter(self, values, reverse):
+        """Build ``(a, b) < (x, y)`` style row comparisons for mixed directions."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith('-')
+            name = field.lstrip('-')
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def row_key(self, obj):
+        key = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            elif isinstance(value, Decimal):
+                value = str(value)
+            key.append(value)
+        return key
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def parse_values(self, queryset, values):
+        """The cursor's key as Python values of the ordering fields (or annotations), or ValueError."""
+        parsed = []
+        for field, value in zip(self.ordering, values):
+            if value is None:
+                # Every row has a key; NULL can't be compared with anyway
+                raise ValueError(field)
+            name = field.lstrip('-')
+            annotation = queryset.query.annotations.get(name)
+            if annotation is not None:
+                field = annotation.output_field
+            else:
+                field = queryset.model._meta.get_field(name)
+            parsed.append(field.to_python(value))
+        return parsed
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            valid = (
+                cursor['o'] == self.ordering
+                and isinstance(cursor['v'], list)
+                and len(cursor['v']) == len(self.ordering)
+                and cursor['r'] in (0, 1)
+            )
+            if valid:
+                cursor['values'] = self.parse_values(queryset, cursor['v'])
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return self.encode_cursor(self.last_key, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_key is None:
+            return None
+        return self.encode_cursor(self.first_key, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,139 @@
+"""
+Query budgets and repeated-query (N+1) detection.
+
+A ``QueryBudget`` counts the queries run in its scope, on any connection
+and in threads running a copy of its context. On exit it reports going
+over ``max_queries``, and the same SQL running ``repeat_threshold`` or more
+times with different parameters (one query per row of something). Reports
+raise ``QueryBudgetExceeded`` or are logged to ``core.queries``, depending
+on ``QUERY_BUDGET_MODE``.
+
+    @method_decorator(query_budget(6), name='list')
+    class TransactionViewSet(...):
+
+    @shared_task
+    @query_budget(10)
+    def notify_goal_deadlines(batch):
+"""
+import contextvars
+import logging
+import os
+import threading
+import traceback
+from collections import Counter
+from contextlib import ContextDecorator
+from functools import wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger('core.queries')
+
+_active = contextvars.ContextVar('query_budgets', default=())
+
+RAISE = 'raise'
+LOG = 'log'
+_DEFAULT = object()
+# Transaction control, whose count depends on the caller's nesting rather than on the work
+_TRANSACTION_PREFIXES = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Execute wrappers, never the caller of interest
+_INTERNAL_FILES = {__file__, os.path.join(os.path.dirname(__file__), 'instrumentation.py')}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def _caller():
+    """``file:line in function`` of the innermost project frame issuing the query."""
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()):
+        if (frame.filename.startswith(base) and frame.filename not in _INTERNAL_FILES
+                and f'{os.sep}site-packages{os.sep}' not in frame.filename):
+            return f'{os.path.relpath(frame.filename, base)}:{frame.lineno} in {frame.name}'
+    return 'unknown'
+
+
+class QueryBudget(ContextDecorator):
+    """
+    At most ``max_queries`` queries (None for no limit), and no SQL repeated
+    ``repeat_threshold`` times (``QUERY_REPEAT_THRESHOLD`` by default, None
+    to allow repeats, as in chunked loops).
+    """
+
+    def __init__(self, max_queries=None, name=None, repeat_threshold=_DEFAULT, mode=None):
+        self.max_queries = max_queries
+        self.name = name
+        if repeat_threshold is _DEFAULT:
+            repeat_threshold = getattr(settings, 'QUERY_REPEAT_THRESHOLD', 5)
+        self.repeat_threshold = repeat_threshold
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.count = 0
+        self.statements = Counter()
+        self.repeated_at = {}
+
+    def __call__(self, func):
+        # Not named in place: method_decorator applies a decorator to more than one function
+        budget = QueryBudget(self.max_queries, self.name or func.__qualname__, self.repeat_threshold, self.mode)
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with budget._recreate_cm():
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        return ContextDecorator.__call__(budget, func)
+
+    def _recreate_cm(self):
+        # A decorated function gets a fresh budget per call, concurrent calls included
+        return QueryBudget(self.max_queries, self.name, self.repeat_threshold, self.mode)
+
+    def record(self, sql):
+        with self._lock:
+            self.count += 1
+            self.statements[sql] += 1
+            if self.statements[sql] == self.repeat_threshold:
+                self.repeated_at[sql] = _caller()
+
+    def problems(self):
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f'{self.count} queries, over its budget of {self.max_queries}')
+        for sql, location in self.repeated_at.items():
+            problems.append(f'the same query ran {self.statements[sql]} times, from {location}: {sql}')
+        return problems
+
+    def __enter__(self):
+        self._token = _active.set(_active.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active.reset(self._token)
+        problems = self.problems()
+        if not problems or exc_type is not None:
+            return False
+        message = f"{self.name or 'Query budget'}: " + '; '.join(problems)
+        mode = self.mode or getattr(settings, 'QUERY_BUDGET_MODE', LOG)
+        if mode == RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return False
+
+
+def query_budget(max_queries=None, name=None, repeat_threshold=_DEFAULT):
+    """Decorator or context manager limiting the queries of a view, task or block."""
+    return QueryBudget(max_queries, name, repeat_threshold)
+
+
+def count_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query, transaction control aside, to the active budgets."""
+    budgets = _active.get()
+    if budgets and not sql.startswith(_TRANSACTION_PREFIXES):
+        for budget in budgets:
+            budget.record(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """``connection_created`` receiver, counting every new connection's queries."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_tokens
+from .cache import bump_data_version, DATA_SCOPE, NOTIFICATIONS_SCOPE, TRANSACTIONS_SCOPE
+
+# Models whose writes change what a user's endpoints return, and the versions they bump
+VERSIONED_MODELS = {
+    'transactions.Transaction': (DATA_SCOPE, TRANSACTIONS_SCOPE),
+    'transactions.Category': (DATA_SCOPE, TRANSACTIONS_SCOPE),
+    'transactions.RecurringTransaction': (DATA_SCOPE,),
+    'goals.Goal': (DATA_SCOPE,),
+    'budgets.Budget': (DATA_SCOPE,),
+    'notifications.Notification': (NOTIFICATIONS_SCOPE,),
+}
+VERSIONED_SCOPES = tuple(dict.fromkeys(scope for scopes in VERSIONED_MODELS.values() for scope in scopes))
+
+
+def bump_versions(user_id, scopes):
+    for scope in scopes:
+        bump_data_version(user_id, scope)
+
+
+def bump_version_on_write(sender, instance, **kwargs):
+    user_id = instance.user_id
+    scopes = VERSIONED_MODELS[sender._meta.label]
+    bump_versions(user_id, scopes)
+    if connection.in_atomic_block:
+        # Bump again after commit so a concurrent read can't cache pre-commit data under the new version
+        transaction.on_commit(lambda: bump_versions(user_id, scopes))
+
+
+def start_version_for_new_user(sender, instance, created=False, **kwargs):
+    # A new account never inherits cache entries of a deleted user with the same id
+    if created:
+        for scope in VERSIONED_SCOPES:
+            bump_data_version(instance.pk, scope)
+
+
+def invalidate_cached_token(sender, instance, created=False, **kwargs):
+    # A new token has nothing cached, and its tombstone would keep it from being cached
+    if not created:
+        invalidate_tokens([instance.key])
+
+
+def invalidate_cached_user_tokens(sender, instance, created=False, **kwargs):
+    # Password, active flag and settings changes must reach the cached users
+    if not created:
+        invalidate_tokens(Token.objects.filter(user=instance).values_list('key', flat=True))
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version_on_write, sender=model, dispatch_uid=f'bump-version-save-{model}')
+    post_delete.connect(bump_version_on_write, sender=model, dispatch_uid=f'bump-version-delete-{model}')
+
+post_save.connect(start_version_for_new_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='start-version-new-user')
+
+post_save.connect(invalidate_cached_token, sender=Token, dispatch_uid='invalidate-cached-token-save')
+post_delete.connect(invalidate_cached_token, sender=Token, dispatch_uid='invalidate-cached-token-delete')
+post_save.connect(invalidate_cached_user_tokens, sender=settings.AUTH_USER_MODEL, dispatch_uid='invalidate-cached-user-tokens')
@@ -0,0 +1,109 @@
+import re
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .queries import QueryBudget, QueryBudgetExceeded, RAISE
+
+SEQ_SCAN_PATTERNS = {
+    # PostgreSQL: "Seq Scan on transactions_transaction"
+    'postgresql': r'Seq Scan on "?{table}"?\b',
+    # SQLite: "SCAN transactions_transaction" (an index scan reads "SCAN t USING INDEX")
+    'sqlite': r'\bSCAN "?{table}"?(?! USING)(?:\s|$)',
+}
+
+
+def explain(sql):
+    """Return the query plan of ``sql`` as a single string."""
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+
+
+class QueryPlanAssertionsMixin:
+    """
+    Test mixin that runs EXPLAIN on every query a block issues.
+
+    On PostgreSQL sequential scans are disabled for the duration of the check,
+    so a ``Seq Scan`` in the plan means no index can serve the query at all,
+    independent of how small the seeded tables are.
+    """
+
+    def skip_unless_plans_supported(self):
+        if connection.vendor not in SEQ_SCAN_PATTERNS:
+            self.skipTest(f'Query plan checks are not supported on {connection.vendor}')
+
+    def assertNoSequentialScans(self, func, tables):
+        self.skip_unless_plans_supported()
+        with CaptureQueriesContext(connection) as captured:
+            func()
+
+        pattern = SEQ_SCAN_PATTERNS[connection.vendor]
+        checked = 0
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        try:
+            for query in captured.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                plan = explain(sql)
+                for table in tables:
+                    if re.search(pattern.format(table=re.escape(table)), plan):
+                        self.fail(f'Sequential scan on {table}:\n{sql}\n\n{plan}')
+                checked += 1
+        finally:
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = on')
+        self.assertGreater(checked, 0, 'No SELECT queries were captured')
+
+
+class QueryBudgetAssertionsMixin:
+    """
+    Test mixin for query budgets (see ``core.queries``).
+
+    ``assertQueriesDoNotScale`` grows the data through several sizes and
+    fails if any endpoint's query count changes with it, or if one runs the
+    same SQL ``QUERY_REPEAT_THRESHOLD`` times: the N+1 patterns that stay
+    hidden with a row or two of test data.
+    """
+    query_budget_sizes = (1, 5, 20)
+
+    @contextmanager
+    def assertQueryBudget(self, max_queries=None, name=None):
+        budget = QueryBudget(max_queries, name=name, mode=RAISE)
+        try:
+            with budget:
+                yield budget
+        except QueryBudgetExceeded as e:
+            self.fail(str(e))
+
+    def reset_query_budget_caches(self):
+        """Start each request cold, so cached responses don't hide its queries."""
+        cache.clear()
+
+    def assertQueriesDoNotScale(self, requests, populate, sizes=None):
+        """
+        Call ``populate(size)`` for each of ``sizes``, then every
+        ``requests`` callable (by name) on a cold cache. The callables make
+        a request or run a task. Returns the query counts of each by size.
+        """
+        counts = {name: {} for name in requests}
+        for size in sizes or self.query_budget_sizes:
+            populate(size)
+            for name, request in requests.items():
+                self.reset_query_budget_caches()
+                with self.assertQueryBudget(name=f'{name} with {size} rows') as budget:
+                    response = request()
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+                if hasattr(response, 'status_code'):
+                    self.assertLess(response.status_code, 400, f'{name}: {response.status_code}')
+                counts[name][size] = budget.count
+
+        growing = {name: by_size for name, by_size in counts.items() if len(set(by_size.values())) > 1}
+        self.assertEqual(growing, {}, 'Query counts grow with the data')
+        return counts
@@ -1,3 +1,99 @@
-from django.shortcuts import render
+import hashlib
+from inspect import iscoroutine
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.views import APIView
+from .cache import get_validators, DATA_SCOPE
 
-# Create your views here.
+
+class _NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Conditional GET for per-user read endpoints.
+
+    ETag and Last-Modified come from the user's data version in the cache,
+    so a matching If-None-Match/If-Modified-Since is answered with 304 right
+    after authentication, before the view runs any query. Views whose data
+    isn't covered by the default version set ``conditional_scopes``.
+    """
+    conditional_scopes = (DATA_SCOPE,)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method in ('GET', 'HEAD') and request.user.is_authenticated:
+            etag, last_modified = self._validators = self.get_validators(request)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                raise _NotModified(response)
+
+    def get_validators(self, request):
+        validators = [get_validators(request.user.id, scope) for scope in self.conditional_scopes]
+        versions = [version for version, modified in validators]
+        modified = [modified for version, modified in validators]
+        # Summaries depend on the current date as well as on the data
+        representation = (
+            request.user.id, versions, request.get_full_path(),
+            request.accepted_media_type, timezone.localdate().isoformat()
+        )
+        etag = quote_etag(hashlib.md5(repr(representation).encode()).hexdigest())
+        last_modified = int(max(modified)) if None not in modified else None
+        return etag, last_modified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            # Clients may keep the response but must revalidate before reuse
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class AsyncAPIView(APIView):
+    """
+    An ``APIView`` whose handlers are coroutines, for serving under ASGI.
+
+    Authentication, permissions, throttling and (with ConditionalGetMixin)
+    the 304 check are synchronous in DRF and run in a worker thread; the
+    handler itself runs on the event loop and should use the async ORM.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
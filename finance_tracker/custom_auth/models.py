@@ -1,4 +1,5 @@
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from core.models import TimeStampedModel
 # This can be empty if you're not defining custom models 
@@ -11,6 +12,15 @@ class User(AbstractUser, TimeStampedModel):
     
     # Settings fields
     email_notifications = models.BooleanField(default=True)
+    email_frequency = models.CharField(
+        max_length=20,
+        choices=[('immediate', 'Immediately'), ('daily', 'Daily digest')],
+        default='immediate'
+    )
+    # Percentage of a budget at which the "approaching budget" alert is sent
+    budget_alert_threshold = models.PositiveSmallIntegerField(
+        default=80, validators=[MinValueValidator(1), MaxValueValidator(100)]
+    )
     theme_preference = models.CharField(
         max_length=20,
         choices=[('light', 'Light'), ('dark', 'Dark'), ('system', 'System')],
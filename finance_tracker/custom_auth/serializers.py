@@ -15,7 +15,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'username', 'email', 'password', 'first_name', 'last_name',
             'phone_number', 'profile_picture', 'email_notifications',
-            'theme_preference', 'currency_preference'
+            'email_frequency', 'budget_alert_threshold', 'theme_preference', 'currency_preference'
         )
         read_only_fields = ('id',)
         extra_kwargs = {
@@ -24,6 +24,8 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name': {'required': False},
             'phone_number': {'required': False},
             'email_notifications': {'required': False},
+            'email_frequency': {'required': False},
+            'budget_alert_threshold': {'required': False},
             'theme_preference': {'required': False},
             'currency_preference': {'required': False}
         }
@@ -0,0 +1,142 @@
+from django.core.cache import cache
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from core.authentication import TOKEN_KEY, CachedTokenAuthentication, _digest, auth_cache_stats, token_cache
+
+User = get_user_model()
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        auth_cache_stats.reset()
+        token_cache.local_stats.reset()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def authenticate(self):
+        return CachedTokenAuthentication().authenticate(self.request)
+
+    def test_repeated_lookups_skip_the_database(self):
+        with self.assertNumQueries(1):
+            user, token = self.authenticate()
+        with self.assertNumQueries(0):
+            cached_user, cached_token = self.authenticate()
+        self.assertEqual((cached_user, cached_token), (self.user, self.token))
+        self.assertEqual(auth_cache_stats.as_dict(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+        # Each request gets its own copy
+        cached_user.first_name = 'Changed'
+        self.assertEqual(self.authenticate()[0].first_name, '')
+
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        # As seen by a process with nothing cached locally
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate()[0], self.user)
+        self.assertEqual(token_cache.local_stats.as_dict()['misses'], 2)
+
+    def test_shared_cache_holds_no_credentials(self):
+        self.authenticate()
+        entry = repr(cache.get(TOKEN_KEY.format(digest=_digest(self.token.key))))
+        self.assertNotIn(self.user.password, entry)
+        self.assertNotIn(self.token.key, entry)
+
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual((user.email, token.key, token.user_id), (self.user.email, self.token.key, self.user.pk))
+        # Loaded when needed, and never overwritten by a save
+        user.first_name = 'Changed'
+        user.save()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password('testpass123'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('testpass123'))
+
+    @override_settings(AUTH_TOKEN_LOCAL_TIMEOUT=0)
+    def test_local_entries_expire(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.authenticate()
+        self.assertEqual(token_cache.local_stats.as_dict()['hits'], 0)
+
+    @override_settings(AUTH_TOKEN_LOCAL_MAX_ENTRIES=2)
+    def test_local_cache_is_bounded(self):
+        for i in range(3):
+            user = User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='x')
+            key = Token.objects.create(user=user).key
+            CachedTokenAuthentication().authenticate_credentials(key)
+        self.assertEqual(token_cache.as_dict()['entries'], 2)
+
+    def test_user_changes_invalidate(self):
+        self.authenticate()
+        self.user.set_password('newpass456')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_lookup_racing_an_invalidation_is_not_cached(self):
+        key = self.token.key
+        generation = token_cache.generation
+        token = Token.objects.select_related('user').get(key=key)
+        self.token.delete()
+        token_cache.set(key, token, generation)
+        self.assertIsNone(token_cache.get(key))
+
+        # Nor by another process, which can't see this one's generation
+        token_cache.set(key, token, token_cache.generation)
+        self.assertIsNone(token_cache.get(key))
+
+class LogoutTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+
+    def test_logout_revokes_the_cached_token(self):
+        response = self.client.post(reverse('login'), {'identifier': 'testuser', 'password': 'testpass123'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {response.data['token']}")
+        self.assertEqual(self.client.get(reverse('me')).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(reverse('logout'))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Token.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get(reverse('me')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_stats_report_auth(self):
+        self.user.is_staff = True
+        self.user.save()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.client.get(reverse('me'))
+        response = self.client.get(reverse('dashboard-cache-stats'))
+        self.assertEqual(set(response.data['auth']), {'hits', 'misses', 'hit_rate', 'local'})
+        self.assertEqual(response.data['auth']['local']['entries'], 1)
@@ -0,0 +1,157 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+ENDPOINTS = (
+    '/api/dashboard/stats/',
+    '/api/transactions/transactions/summary/',
+    '/api/transactions/transactions/trends/',
+    '/api/transactions/transactions/by-category/',
+    '/api/notifications/',
+)
+
+HOST = 'localhost'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure requests per second of the analytics endpoints under concurrent load, '
+        'served by the WSGI handler (sync views) and the ASGI handler (async views)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose data the endpoints read')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and server')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Only benchmark this path (can be repeated)'
+        )
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Disable the analytics cache so every request runs its queries'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+        token, _ = Token.objects.get_or_create(user=user)
+        authorization = f'Token {token.key}'
+        total, concurrency = options['requests'], options['concurrency']
+
+        with ExitStack() as stack:
+            stack.enter_context(override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]))
+            if options['no_cache']:
+                stack.enter_context(override_settings(CACHES={
+                    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+                }))
+
+            self.stdout.write(
+                f"{'endpoint':<48}{'server':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+            )
+            for path in options['endpoints'] or ENDPOINTS:
+                wsgi = self.run_wsgi(path, authorization, total, concurrency)
+                with override_settings(ROOT_URLCONF='finance_tracker.asgi_urls'):
+                    asgi = asyncio.run(self.run_asgi(path, authorization, total, concurrency))
+                for server, result in (('WSGI', wsgi), ('ASGI', asgi)):
+                    self.stdout.write(f'{path:<48}{server:>6}' + self.format_result(*result))
+
+    def format_result(self, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+        return (
+            f'{len(latencies) / elapsed:>10.1f}'
+            f'{statistics.median(latencies) * 1000:>10.1f}'
+            f'{p95 * 1000:>10.1f}'
+        )
+
+    def check_status(self, path, status):
+        if status != 200:
+            raise CommandError(f'GET {path} returned {status}')
+
+    def run_wsgi(self, path, authorization, total, concurrency):
+        application = get_wsgi_application()
+
+        def get(_):
+            environ = {
+                'PATH_INFO': path,
+                'HTTP_HOST': HOST,
+                'HTTP_AUTHORIZATION': authorization,
+                'wsgi.input': BytesIO(),
+            }
+            setup_testing_defaults(environ)
+            statuses = []
+            start = time.perf_counter()
+            response = application(environ, lambda status, headers: statuses.append(status))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            self.check_status(path, int(statuses[0].split()[0]))
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(get, range(total)))
+        elapsed = time.perf_counter() - start
+        # Worker threads opened their own connections
+        connections.close_all()
+        return elapsed, latencies
+
+    async def run_asgi(self, path, authorization, total, concurrency):
+        application = get_asgi_application()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def get():
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': b'',
+                'root_path': '',
+                'headers': [(b'host', HOST.encode()), (b'authorization', authorization.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': (HOST, 80),
+            }
+            body_sent = False
+            statuses = []
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client never disconnects; Django cancels this once it has responded
+                await asyncio.Future()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            async with semaphore:
+                start = time.perf_counter()
+                await application(scope, receive, send)
+                self.check_status(path, statuses[0])
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(get() for _ in range(total)))
+        return time.perf_counter() - start, latencies
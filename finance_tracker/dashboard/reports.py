@@ -0,0 +1,122 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, close_old_connections
+from django.http import QueryDict
+from django.utils import timezone
+from core.cache import cached_for_user, cache_params
+from goals.forecasting import current_forecasts
+from goals.models import Goal
+from goals.serializers import GoalSerializer
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from transactions import rollups
+from transactions.aggregates import user_category_report, summary_report, trends_report
+
+RECENT_NOTIFICATIONS = 10
+
+
+def _stats_period():
+    # The last 30 days
+    end_date = timezone.now()
+    start_date = end_date - timedelta(days=30)
+    return start_date.date(), end_date.date()
+
+
+def _active_goals(user):
+    return Goal.objects.filter(user=user, status='in_progress')
+
+
+def _stats_report(totals, active_goals):
+    income = totals['income']
+    expenses = totals['expense']
+    return {
+        'summary': {
+            'income': income,
+            'expenses': expenses,
+            'balance': income - expenses,
+            'active_goals': active_goals
+        }
+    }
+
+
+def stats_report(user):
+    """Response data of ``dashboard/stats/``: the last 30 days and active goals."""
+    # Whole months of the period come from the rollups
+    totals = rollups.period_totals(user, *_stats_period())
+    return _stats_report(totals, _active_goals(user).count())
+
+
+async def astats_report(user):
+    totals = await rollups.aperiod_totals(user, *_stats_period())
+    return _stats_report(totals, await _active_goals(user).acount())
+
+
+def _goals_report(user):
+    # Same as the goals list, forecasts included
+    goals = list(Goal.objects.filter(user=user).select_related('forecast'))
+    return GoalSerializer(goals, many=True, context={'forecasts': current_forecasts(user.id, goals)}).data
+
+
+def _cached(name, compute):
+    # Same entries as the standalone endpoint called without query params
+    def section(user):
+        return cached_for_user(user.id, name, cache_params(QueryDict()), lambda: compute(user))
+    return section
+
+
+SECTIONS = {
+    'stats': _cached('dashboard.stats', stats_report),
+    'summary': _cached('transactions.summary', summary_report),
+    'by_category': _cached('transactions.by_category', lambda user: user_category_report(user, type='expense')),
+    'trends': _cached('transactions.trends', trends_report),
+    'goals': _goals_report,
+    'notifications': lambda user: NotificationSerializer(
+        Notification.objects.filter(user=user)[:RECENT_NOTIFICATIONS], many=True
+    ).data,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_BOOTSTRAP_WORKERS', 4),
+                thread_name_prefix='dashboard-bootstrap'
+            )
+        return _executor
+
+
+def _run_section(name, user):
+    try:
+        return SECTIONS[name](user)
+    finally:
+        # Worker threads live outside the request cycle, so release their connection here
+        close_old_connections()
+
+
+def bootstrap_report(user, sections):
+    """
+    Compute the requested dashboard sections, concurrently where possible.
+
+    Sections run on a bounded thread pool shared by all requests, so one
+    bootstrap costs roughly its slowest section instead of their sum. Inside
+    a transaction they run inline: other threads use other connections and
+    could not see uncommitted rows.
+    """
+    if len(sections) == 1 or connection.in_atomic_block:
+        return {name: SECTIONS[name](user) for name in sections}
+
+    executor = _get_executor()
+    # Each section runs in a copy of the request's context, so its queries count towards the request's timing
+    futures = {
+        name: executor.submit(contextvars.copy_context().run, _run_section, name, user)
+        for name in sections
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,118 @@
+import threading
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from dashboard import reports
+from transactions.models import Transaction, Category
+from goals.models import Goal
+from notifications.models import Notification
+from decimal import Decimal
+from datetime import timedelta
+
+User = get_user_model()
+
+class BootstrapDataMixin:
+    def create_data(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        today = timezone.now().date()
+        food = Category.objects.create(user=self.user, name='Food')
+        Transaction.objects.create(
+            user=self.user, date=today, description='Pay',
+            amount=Decimal('1000.00'), type='income'
+        )
+        Transaction.objects.create(
+            user=self.user, date=today, description='Lunch',
+            amount=Decimal('12.50'), type='expense', category=food
+        )
+        Goal.objects.create(
+            user=self.user, title='Test Goal', target_amount=Decimal('1000.00'),
+            deadline=today + timedelta(days=30)
+        )
+        Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE'
+        )
+        self.url = reverse('dashboard-bootstrap')
+
+    def assertMatchesEndpoints(self, data):
+        endpoints = {
+            'stats': 'dashboard-stats',
+            'summary': 'transaction-summary',
+            'by_category': 'transaction-by-category',
+            'trends': 'transaction-trends',
+            'goals': 'goal-list',
+            'notifications': 'notification-list',
+        }
+        self.assertEqual(set(data), set(endpoints))
+        for section, name in endpoints.items():
+            expected = self.client.get(reverse(name)).data
+            if section == 'notifications':
+                expected = expected['results']
+            self.assertEqual(data[section], expected, section)
+
+class DashboardBootstrapTest(BootstrapDataMixin, TestCase):
+    def setUp(self):
+        self.create_data()
+
+    def test_returns_every_section(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertMatchesEndpoints(response.data)
+
+    def test_selected_sections(self):
+        response = self.client.get(self.url, {'sections': 'summary,goals'})
+        self.assertEqual(set(response.data), {'summary', 'goals'})
+
+        response = self.client.get(self.url, {'sections': 'summary,balance'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_shares_the_analytics_cache(self):
+        self.client.get(reverse('transaction-summary'))
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'sections': 'summary'})
+
+    def test_conditional_get_covers_notifications(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
+
+        Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['notifications']), 2)
+
+class ConcurrentBootstrapTest(BootstrapDataMixin, TransactionTestCase):
+    def setUp(self):
+        self.create_data()
+
+    def test_sections_run_on_the_worker_pool(self):
+        threads = set()
+        run_section = reports._run_section
+
+        def record_thread(name, user):
+            threads.add(threading.current_thread().name)
+            return run_section(name, user)
+
+        with mock.patch.object(reports, '_run_section', record_thread):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('dashboard-bootstrap') for name in threads))
+        self.assertMatchesEndpoints(response.data)
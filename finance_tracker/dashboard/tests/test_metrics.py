@@ -0,0 +1,164 @@
+import glob
+import os
+import tempfile
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from core import metrics
+from notifications import tasks
+
+User = get_user_model()
+
+class RegistryTest(TestCase):
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.requests = self.registry.counter('requests_total', 'Requests.', ('view', 'status'))
+        self.latency = self.registry.histogram('latency_seconds', 'Latency.', ('view',), buckets=(0.1, 1.0))
+
+    def test_text_format(self):
+        self.requests.inc(view='goal-list', status=200)
+        self.requests.inc(2, view='goal-list', status=200)
+        self.requests.inc(view='say "hi"', status=500)
+        for seconds in (0.05, 0.5, 0.5, 3):
+            self.latency.observe(seconds, view='goal-list')
+
+        self.assertEqual(self.registry.expose(), '\n'.join([
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{view="goal-list",status="200"} 3',
+            'requests_total{view="say \\"hi\\"",status="500"} 1',
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{view="goal-list",le="0.1"} 1',
+            'latency_seconds_bucket{view="goal-list",le="1"} 3',
+            'latency_seconds_bucket{view="goal-list",le="+Inf"} 4',
+            'latency_seconds_sum{view="goal-list"} 4.05',
+            'latency_seconds_count{view="goal-list"} 4',
+        ]) + '\n')
+
+    def test_labels_must_match(self):
+        with self.assertRaises(ValueError):
+            self.requests.inc(view='goal-list')
+
+    # Flushed explicitly rather than from a background thread
+    @mock.patch.object(metrics.Registry, 'changed')
+    def test_multiprocess_files_add_up(self, changed):
+        other = metrics.Registry()
+        other_requests = other.counter('requests_total', 'Requests.', ('view', 'status'))
+        other_latency = other.histogram('latency_seconds', 'Latency.', ('view',), buckets=(0.1, 1.0))
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            self.requests.inc(view='goal-list', status=200)
+            self.latency.observe(0.05, view='goal-list')
+            other_requests.inc(view='goal-list', status=200)
+            other_latency.observe(0.5, view='goal-list')
+            other.flush()
+
+            # A recycled worker's counts stay in its file
+            self.registry.flush()
+            self.registry._after_fork()
+            self.requests.inc(view='goal-list', status=200)
+
+            collected = self.registry.collect()
+            self.assertEqual(len(glob.glob(os.path.join(directory, 'metrics-*.json'))), 3)
+        self.assertEqual(collected['requests_total'], {('goal-list', '200'): 3})
+        self.assertEqual(collected['latency_seconds'], {('goal-list',): [1, 1, 0, 0.55]})
+
+    @mock.patch.object(metrics.Registry, 'changed')
+    def test_exited_processes_are_merged(self, changed):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory):
+            for pid in (101, 102):
+                files = metrics.MultiProcessFiles(directory)
+                files.path = os.path.join(directory, f'metrics-{pid}-0000000{pid % 10}.json')
+                files.write({
+                    'requests_total': [[['goal-list', '200'], 2]],
+                    'latency_seconds': [[['goal-list'], [1, 0, 0, 0.05]]],
+                })
+            self.requests.inc(view='goal-list', status=200)
+
+            alive = lambda pid: pid == os.getpid()
+            with mock.patch.object(metrics, '_process_alive', alive):
+                collected = self.registry.collect()
+                self.assertEqual(
+                    sorted(glob.glob(os.path.join(directory, 'metrics-*.json'))),
+                    sorted([self.registry.files.path, os.path.join(directory, 'metrics-aggregate.json')])
+                )
+                # Merged again with the next exited process
+                files.path = os.path.join(directory, 'metrics-103-00000003.json')
+                files.write({'requests_total': [[['goal-list', '200'], 1]]})
+                self.assertEqual(self.registry.collect(), {
+                    'requests_total': {('goal-list', '200'): 6},
+                    'latency_seconds': {('goal-list',): [2, 0, 0, 0.1]},
+                })
+            self.assertEqual(len(glob.glob(os.path.join(directory, 'metrics-*.json'))), 2)
+        self.assertEqual(collected['requests_total'], {('goal-list', '200'): 5})
+
+    def test_flushed_at_exit(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROCESS_DIR=directory), \
+                mock.patch('atexit.register') as register, mock.patch.object(metrics.Registry, '_flush_periodically'):
+            self.requests.inc(view='goal-list', status=200)
+            self.requests.inc(view='goal-list', status=200)
+        register.assert_called_once_with(self.registry.flush)
+
+    def test_flushed_at_worker_process_shutdown(self):
+        from celery.signals import worker_process_shutdown
+
+        with mock.patch.object(metrics.registry, 'flush') as flush:
+            worker_process_shutdown.send(sender=None, pid=os.getpid(), exitcode=0)
+        flush.assert_called_once_with()
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+class MetricsEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='testpass123',
+            is_staff=True
+        )
+
+    def test_requests_queries_and_cache_lookups(self):
+        requests = metrics.http_requests.value(view='transaction-summary', method='GET', status=200)
+        misses = metrics.cache_lookups.value(cache='analytics', result='miss')
+        self.client.force_authenticate(user=self.user)
+        self.client.get(reverse('transaction-summary'))
+
+        self.assertEqual(metrics.http_requests.value(view='transaction-summary', method='GET', status=200), requests + 1)
+        self.assertEqual(metrics.cache_lookups.value(cache='analytics', result='miss'), misses + 1)
+        latency = metrics.http_request_duration.samples()[('transaction-summary', 'GET')]
+        self.assertGreater(latency[-1], 0)
+        self.assertTrue(metrics.db_query_duration.samples()[('default',)])
+
+    def test_task_runs(self):
+        runs = metrics.task_runs.value(task='notifications.tasks.send_queued_emails', state='SUCCESS')
+        tasks.send_queued_emails.apply()
+        self.assertEqual(
+            metrics.task_runs.value(task='notifications.tasks.send_queued_emails', state='SUCCESS'), runs + 1
+        )
+        self.assertIn(('notifications.tasks.send_queued_emails',), metrics.task_duration.samples())
+
+    def test_endpoint(self):
+        self.client.force_authenticate(user=self.admin)
+        self.client.get(reverse('dashboard-cache-stats'))
+        response = self.client.get(reverse('dashboard-metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertIn('http_requests_total{view="dashboard-cache-stats",method="GET",status="200"}', body)
+
+    def test_admins_only(self):
+        self.assertEqual(self.client.get(reverse('dashboard-metrics')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(reverse('dashboard-metrics')).status_code, status.HTTP_403_FORBIDDEN)
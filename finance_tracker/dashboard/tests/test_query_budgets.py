@@ -0,0 +1,54 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from budgets.models import Budget
+from core.testing import QueryBudgetAssertionsMixin
+from goals.models import Goal
+from notifications.models import Notification
+from transactions.models import Category, Transaction
+
+User = get_user_model()
+
+class DashboardQueryBudgetTest(QueryBudgetAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.rows = 0
+
+    def populate(self, size):
+        today = timezone.now().date()
+        while self.rows < size:
+            self.rows += 1
+            category = Category.objects.create(user=self.user, name=f'Category {self.rows}', type='expense')
+            Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=self.rows), description=f'Item {self.rows}',
+                amount=Decimal('20.00'), type='expense', category=category
+            )
+            Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=self.rows * 9), description=f'Pay {self.rows}',
+                amount=Decimal('500.00'), type='income'
+            )
+            Budget.objects.create(user=self.user, category=category, amount=Decimal('100.00'))
+            Goal.objects.create(
+                user=self.user, title=f'Goal {self.rows}', target_amount=Decimal('1000.00'),
+                deadline=today + timedelta(days=60)
+            )
+            Notification.objects.create(
+                user=self.user, title=f'Notification {self.rows}', message='Test', notification_type='BILL_DUE'
+            )
+
+    def test_endpoints_do_not_scale_with_rows(self):
+        get = self.client.get
+        self.assertQueriesDoNotScale({
+            'stats': lambda: get(reverse('dashboard-stats')),
+            'bootstrap': lambda: get(reverse('dashboard-bootstrap')),
+        }, self.populate)
@@ -1,6 +1,9 @@
 from django.urls import path
-from .views import DashboardStatsView
+from .views import DashboardStatsView, DashboardBootstrapView, CacheStatsView, MetricsView
 
 urlpatterns = [
     path('stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('bootstrap/', DashboardBootstrapView.as_view(), name='dashboard-bootstrap'),
+    path('cache-stats/', CacheStatsView.as_view(), name='dashboard-cache-stats'),
+    path('metrics/', MetricsView.as_view(), name='dashboard-metrics'),
 ] 
\ No newline at end of file
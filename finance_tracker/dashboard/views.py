@@ -1,43 +1,87 @@
 from django.shortcuts import render
-from rest_framework import views, permissions
+from rest_framework import views, permissions, renderers
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Sum, Count
-from django.utils import timezone
-from datetime import timedelta
-from transactions.models import Transaction
-from goals.models import Goal
+from core.authentication import auth_cache_stats, token_cache
+from core.cache import cache_per_user, analytics_cache_stats, SCOPES
+from core import metrics
+from core.queries import query_budget
+from core.views import ConditionalGetMixin, AsyncAPIView
+from transactions.snapshots import snapshots, snapshot_cache_stats
+from .reports import stats_report, astats_report, bootstrap_report, SECTIONS
 
 # Create your views here.
 
-class DashboardStatsView(views.APIView):
+class DashboardStatsView(ConditionalGetMixin, views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_per_user('dashboard.stats')
+    def get(self, request):
+        return Response(stats_report(request.user))
+
+class AsyncDashboardStatsView(ConditionalGetMixin, AsyncAPIView):
+    """Async ``dashboard/stats/``, routed by finance_tracker/asgi_urls.py."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    @cache_per_user('dashboard.stats')
+    async def get(self, request):
+        return Response(await astats_report(request.user))
+
+class DashboardBootstrapView(ConditionalGetMixin, views.APIView):
+    """
+    Everything the dashboard page loads, in one response.
+
+    ``?sections=summary,trends`` limits the response to the listed sections;
+    all of them are returned by default.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_scopes = SCOPES
+
+    # All sections together, computed on a cold cache, goal forecasts stored
+    @query_budget(14)
+    def get(self, request):
+        sections = request.query_params.get('sections')
+        if sections:
+            sections = [name.strip() for name in sections.split(',') if name.strip()]
+            unknown = sorted(set(sections) - set(SECTIONS))
+            if unknown:
+                raise ValidationError({
+                    'sections': f"Unknown sections: {', '.join(unknown)}. "
+                                f"Choose from {', '.join(SECTIONS)}."
+                })
+        else:
+            sections = list(SECTIONS)
+
+        return Response(bootstrap_report(request.user, list(dict.fromkeys(sections))))
+
+class CacheStatsView(views.APIView):
+    permission_classes = [permissions.IsAdminUser]
+
     def get(self, request):
-        # Get date range
-        end_date = timezone.now()
-        start_date = end_date - timedelta(days=30)
-        
-        # Get transactions for the period
-        transactions = Transaction.objects.filter(
-            user=request.user,
-            date__range=[start_date, end_date]
-        )
-        
-        # Calculate totals
-        income = transactions.filter(type='income').aggregate(total=Sum('amount'))['total'] or 0
-        expenses = transactions.filter(type='expense').aggregate(total=Sum('amount'))['total'] or 0
-        
-        # Get active goals
-        active_goals = Goal.objects.filter(
-            user=request.user,
-            status='in_progress'
-        ).count()
-        
         return Response({
-            'summary': {
-                'income': income,
-                'expenses': expenses,
-                'balance': income - expenses,
-                'active_goals': active_goals
-            }
+            'analytics': analytics_cache_stats.as_dict(),
+            'snapshots': {**snapshot_cache_stats.as_dict(), **snapshots.as_dict()},
+            'auth': {
+                **auth_cache_stats.as_dict(),
+                'local': {**token_cache.local_stats.as_dict(), **token_cache.as_dict()},
+            },
         })
+
+class PrometheusRenderer(renderers.BaseRenderer):
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Errors, such as a missing token
+            data = ''.join(f'# {key}: {value}\n' for key, value in data.items())
+        return data.encode(self.charset)
+
+class MetricsView(views.APIView):
+    """Prometheus scrape target: every process's metrics, in the text format."""
+    permission_classes = [permissions.IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(metrics.registry.expose(), content_type=metrics.CONTENT_TYPE)
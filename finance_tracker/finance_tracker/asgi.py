@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "finance_tracker.settings")
+# Serve the async versions of the analytics views
+os.environ.setdefault("DJANGO_ROOT_URLCONF", "finance_tracker.asgi_urls")
 
 application = get_asgi_application()
@@ -0,0 +1,21 @@
+"""
+URL configuration used when serving through ``asgi.py``.
+
+Routes the analytics endpoints and the notifications list to their async
+views and adds the notification event stream, which needs ASGI; every
+other URL is the same as in ``finance_tracker.urls``.
+"""
+from django.urls import path
+from dashboard.views import AsyncDashboardStatsView
+from notifications.views import AsyncNotificationListView, NotificationStreamView
+from transactions.views import AsyncByCategoryView, AsyncSummaryView, AsyncTrendsView
+from . import urls
+
+urlpatterns = [
+    path('api/transactions/transactions/by-category/', AsyncByCategoryView.as_view()),
+    path('api/transactions/transactions/summary/', AsyncSummaryView.as_view()),
+    path('api/transactions/transactions/trends/', AsyncTrendsView.as_view()),
+    path('api/dashboard/stats/', AsyncDashboardStatsView.as_view()),
+    path('api/notifications/', AsyncNotificationListView.as_view()),
+    path('api/notifications/stream/', NotificationStreamView.as_view(), name='notification-stream'),
+] + urls.urlpatterns
@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third party apps
     'rest_framework',
@@ -57,11 +60,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'transactions.apps.TransactionsConfig',
     'goals.apps.GoalsConfig',
+    'budgets.apps.BudgetsConfig',
     'notifications.apps.NotificationsConfig',
     'dashboard.apps.DashboardConfig',
 ]
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.RequestTimingMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -72,7 +79,8 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "finance_tracker.urls"
+# asgi.py switches to finance_tracker.asgi_urls, which adds the async analytics views
+ROOT_URLCONF = os.environ.get("DJANGO_ROOT_URLCONF", "finance_tracker.urls")
 
 TEMPLATES = [
     {
@@ -169,7 +177,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -215,8 +223,116 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    'send-daily-digests': {
+        'task': 'notifications.tasks.send_daily_digests',
+        'schedule': crontab(hour=7, minute=0),
+    },
+    'retry-queued-emails': {
+        'task': 'notifications.tasks.send_queued_emails',
+        'schedule': crontab(minute='*/15'),
+    },
+    'forecast-goals': {
+        'task': 'goals.tasks.forecast_all_goals',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'materialize-recurring-transactions': {
+        'task': 'transactions.tasks.materialize_recurring_transactions',
+        'schedule': crontab(hour=0, minute=5),
+    },
+}
+
+# Cache Configuration
+# Local-memory cache when running the test suite, Redis everywhere else
+TESTING = (len(sys.argv) > 1 and sys.argv[1] == 'test') or 'pytest' in sys.argv[0]
+
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://localhost:6379/1',
+        }
+    }
+
+# Seconds a cached analytics response is kept (entries are also invalidated on every write)
+ANALYTICS_CACHE_TIMEOUT = 60 * 60
+
+# Serve summary, trends, by-category and compare from per-process columnar snapshots
+# of each user's transactions (transactions/snapshots.py) instead of the rollups,
+# keeping at most ANALYTICS_SNAPSHOT_MAX_BYTES of arrays per process. Off by default:
+# a write in another process reloads the user's whole history, and the async views
+# always read the rollups
+ANALYTICS_SNAPSHOTS = False
+ANALYTICS_SNAPSHOT_MAX_BYTES = 64 * 1024 * 1024
+
+# Token authentication lookups (core/authentication.py) are cached in the shared
+# cache for AUTH_TOKEN_CACHE_TIMEOUT seconds, and in each process for
+# AUTH_TOKEN_LOCAL_TIMEOUT seconds, up to AUTH_TOKEN_LOCAL_MAX_ENTRIES tokens. A token
+# deleted in one process may still authenticate in another for the local timeout
+AUTH_TOKEN_CACHE_TIMEOUT = 5 * 60
+AUTH_TOKEN_LOCAL_TIMEOUT = 10
+AUTH_TOKEN_LOCAL_MAX_ENTRIES = 10000
+
+# Fraction of requests measured by core.middleware.RequestTimingMiddleware, which
+# adds a Server-Timing header to them and logs them to requests.log
+REQUEST_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+
+# Query budgets (core/queries.py): over-budget views and tasks, and any request
+# running the same SQL QUERY_REPEAT_THRESHOLD times (QUERY_REPEAT_DETECTION), fail
+# the test suite and are logged to core.queries everywhere else
+QUERY_BUDGET_MODE = 'raise' if TESTING else 'log'
+QUERY_REPEAT_DETECTION = DEBUG
+QUERY_REPEAT_THRESHOLD = 5
+
+# Metrics (core/metrics.py), served at dashboard/metrics/. With several worker
+# processes, point METRICS_MULTIPROCESS_DIR at a directory they share (emptied
+# before they start); each writes its values there every METRICS_FLUSH_INTERVAL
+# seconds and the endpoint adds them up
+METRICS_MULTIPROCESS_DIR = os.environ.get("METRICS_MULTIPROCESS_DIR")
+METRICS_FLUSH_INTERVAL = 5
+
+# Threads shared by all dashboard/bootstrap/ requests (each holds at most one DB connection)
+DASHBOARD_BOOTSTRAP_WORKERS = 4
+
+# Delivers notification events to the server-sent events stream. The in-process
+# backend only reaches clients of the same process (tests, single-process dev)
+if TESTING:
+    NOTIFICATION_BROADCASTER = {
+        'BACKEND': 'notifications.broadcast.InProcessBroadcaster',
+    }
+else:
+    NOTIFICATION_BROADCASTER = {
+        'BACKEND': 'notifications.broadcast.RedisBroadcaster',
+        'OPTIONS': {'url': 'redis://localhost:6379/2'},
+    }
+
+# Seconds between keep-alive comments on an idle notification stream
+NOTIFICATION_STREAM_KEEPALIVE = 15
+
+# check_goal_deadlines: how far ahead a deadline counts as approaching, and goals per batch
+GOAL_DEADLINE_WINDOW_DAYS = 7
+GOAL_DEADLINE_CHUNK_SIZE = 500
+
+# Goal forecasts: months of contribution and income history used, and users per nightly batch
+GOAL_FORECAST_HISTORY_MONTHS = 6
+GOAL_FORECAST_CHUNK_SIZE = 1000
+
+# Recurring schedules materialized per transaction by the nightly job
+RECURRING_CHUNK_SIZE = 500
 
 # Email settings
+# Queued emails are claimed EMAIL_BATCH_SIZE at a time and sent over one connection,
+# and given up on after EMAIL_MAX_ATTEMPTS failed sends. Emails claimed by a flush
+# that died are sent again after EMAIL_CLAIM_TIMEOUT seconds
+EMAIL_BATCH_SIZE = 100
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_CLAIM_TIMEOUT = 10 * 60
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
@@ -231,12 +347,23 @@ AUTH_USER_MODEL = 'custom_auth.User'
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'core.log.JSONFormatter',
+        },
+    },
     'handlers': {
         'file': {
             'level': 'DEBUG',
             'class': 'logging.FileHandler',
             'filename': os.path.join(BASE_DIR, 'debug.log'),
         },
+        # Written from a background thread, so logging never blocks a request
+        'requests': {
+            'class': 'core.log.QueueFileHandler',
+            'filename': os.path.join(BASE_DIR, 'requests.log'),
+            'formatter': 'json',
+        },
     },
     'loggers': {
         'django': {
@@ -244,5 +371,10 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        'core.requests': {
+            'handlers': ['requests'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
@@ -45,6 +45,7 @@ urlpatterns = [
     path('api/auth/', include('custom_auth.urls')),
     path('api/transactions/', include('transactions.urls')),
     path('api/goals/', include('goals.urls')),
+    path('api/budgets/', include('budgets.urls')),
     path('api/notifications/', include('notifications.urls')),
     path('api/dashboard/', include('dashboard.urls')),
     
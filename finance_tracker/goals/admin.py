@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Goal
+from .models import Goal, GoalContribution, GoalForecast
 
 @admin.register(Goal)
 class GoalAdmin(admin.ModelAdmin):
@@ -16,3 +16,20 @@ class GoalAdmin(admin.ModelAdmin):
         return f"{(obj.current_amount / obj.target_amount * 100):.1f}%"
     
     get_progress.short_description = 'Progress'
+
+
+@admin.register(GoalContribution)
+class GoalContributionAdmin(admin.ModelAdmin):
+    list_display = ('goal', 'amount', 'transaction', 'created_at')
+    search_fields = ('goal__title', 'note')
+    raw_id_fields = ('goal', 'transaction')
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(GoalForecast)
+class GoalForecastAdmin(admin.ModelAdmin):
+    list_display = ('goal', 'projected_completion_date', 'required_monthly_contribution', 'on_track', 'computed_at')
+    list_filter = ('on_track',)
+    search_fields = ('goal__title',)
+    readonly_fields = ('goal', 'projected_completion_date', 'projected_monthly_contribution',
+                       'required_monthly_contribution', 'on_track', 'computed_at')
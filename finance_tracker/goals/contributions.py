@@ -0,0 +1,75 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Value
+from django.db.models.functions import Greatest, Least
+from core.cache import bump_data_version
+from .models import Goal, GoalContribution
+
+ZERO = Value(Decimal('0'), output_field=DecimalField(max_digits=15, decimal_places=2))
+
+
+def apply_amount(goal_id, amount):
+    """
+    Add ``amount`` to a goal's ``current_amount`` without reading it first.
+
+    The new value is computed by the database, kept between 0 and the
+    target, and a goal that reaches its target is completed by the same
+    statement. No row lock is held beyond the UPDATE itself, so parallel
+    contributions to one goal neither lose updates nor queue behind each
+    other. Returns True if this call completed the goal.
+    """
+    goals = Goal.objects.filter(pk=goal_id)
+    completes = Q(status='in_progress', target_amount__lte=F('current_amount') + amount)
+    while True:
+        # The row matches exactly one of the two WHERE clauses as it is when
+        # the UPDATE runs; if a concurrent write moved it across, try again
+        if goals.filter(completes).update(current_amount=F('target_amount'), status='completed'):
+            return True
+        if goals.exclude(completes).update(
+            current_amount=Least(Greatest(F('current_amount') + amount, ZERO), F('target_amount'))
+        ):
+            return False
+        if not goals.exists():
+            raise Goal.DoesNotExist(f"Goal {goal_id} does not exist")
+
+
+def contribute(goal, amount, linked_transaction=None, note=''):
+    """Record a contribution to ``goal`` and apply it. Returns ``(contribution, completed)``."""
+    with transaction.atomic():
+        contribution = GoalContribution.objects.create(
+            goal=goal, amount=amount, transaction=linked_transaction, note=note
+        )
+        completed = apply_amount(goal.id, amount)
+        # Queryset updates skip the signal that invalidates cached responses
+        bump_data_version(goal.user_id)
+    return contribution, completed
+
+
+def contribute_many(user, items):
+    """
+    Record many contributions in one transaction.
+
+    ``items`` are dicts with ``goal``, ``amount`` and optionally
+    ``transaction`` and ``note``. The ledger is written with one insert and
+    each goal is updated once with the sum of its contributions. Returns
+    the contributions and the ids of the goals they completed.
+    """
+    totals = defaultdict(Decimal)
+    for item in items:
+        totals[item['goal'].id] += item['amount']
+
+    with transaction.atomic():
+        contributions = GoalContribution.objects.bulk_create([
+            GoalContribution(
+                goal=item['goal'],
+                amount=item['amount'],
+                transaction=item.get('transaction'),
+                note=item.get('note', '')
+            )
+            for item in items
+        ])
+        # Always update in id order so two bulk requests can't deadlock on each other's goals
+        completed = [goal_id for goal_id in sorted(totals) if apply_amount(goal_id, totals[goal_id])]
+        bump_data_version(user.id)
+    return contributions, completed
@@ -0,0 +1,204 @@
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+from django.utils import timezone
+from core.cache import get_data_version
+from transactions.models import MonthlyRollup
+from transactions.rollups import month_start
+from .models import Goal, GoalContribution, GoalForecast
+
+DAYS_PER_MONTH = 365.2425 / 12
+# Completion further out than this is reported as never
+MAX_FORECAST_DAYS = 100 * 365
+CENT = Decimal('0.01')
+FORECAST_VALUES = (
+    'projected_completion_date', 'projected_monthly_contribution',
+    'required_monthly_contribution', 'on_track',
+)
+
+
+def history_start(today):
+    """First day of the history window: the current month and the ones before it."""
+    start = month_start(today)
+    for _ in range(getattr(settings, 'GOAL_FORECAST_HISTORY_MONTHS', 6) - 1):
+        start = month_start(start - timedelta(days=1))
+    return start
+
+
+def _months(days):
+    # At least one month, so a goal created yesterday doesn't extrapolate a day's saving
+    return np.maximum(days, DAYS_PER_MONTH) / DAYS_PER_MONTH
+
+
+def forecast_arrays(target, current, status, deadline_days, age_days, user_index,
+                    contributed, has_history, net_income, history_days):
+    """
+    Forecast goals from NumPy arrays, one element per goal.
+
+    ``contributed`` is what each goal received in the history window and
+    ``net_income`` each user's income minus expenses over the same window
+    (indexed by ``user_index``). A goal saves at its own contribution rate;
+    goals with no contributions in the window share what's left of their
+    user's net income. Days are counted from today.
+    """
+    status = np.asarray(status)
+    remaining = np.maximum(target - current, 0)
+    open_goals = (status == 'in_progress') & (remaining > 0)
+
+    contribution_rate = contributed / _months(np.minimum(age_days, history_days))
+    needs_share = open_goals & ~has_history
+    sharing = np.bincount(user_index, weights=needs_share, minlength=len(net_income))
+    capacity = np.maximum(net_income / _months(history_days), 0)
+    share = capacity[user_index] / np.maximum(sharing[user_index], 1)
+    rate = np.where(has_history, contribution_rate, share)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_to_complete = np.where(rate > 0, np.ceil(remaining / rate * DAYS_PER_MONTH), np.inf)
+    days_to_complete = np.where(open_goals, days_to_complete, 0)
+
+    return {
+        'monthly_rate': np.where(open_goals, np.maximum(rate, 0), 0),
+        # What it takes to meet the deadline; all of it once less than a month is left
+        'required_monthly': np.where(open_goals, remaining / _months(deadline_days), 0),
+        'days_to_complete': days_to_complete,
+        'reachable': open_goals & (days_to_complete <= MAX_FORECAST_DAYS),
+        'on_track': np.where(open_goals, days_to_complete <= deadline_days, status != 'failed'),
+    }
+
+
+def forecast_goals(goals, today=None):
+    """
+    Forecast completion of every goal in ``goals``, whoever's they are.
+
+    Three queries and a vectorized pass, however many goals and users.
+    Returns ``{goal_id: forecast}`` with the projected completion date
+    (None if the goal is done or won't finish at the current rate), the
+    projected and the required monthly contribution and whether the goal
+    is on track to meet its deadline.
+    """
+    today = today or timezone.localdate()
+    start = history_start(today)
+    rows = list(goals.order_by('id').values_list(
+        'id', 'user_id', 'target_amount', 'current_amount', 'deadline', 'status', 'created_at__date'
+    ))
+    if not rows:
+        return {}
+
+    ids, user_ids, target, current, deadline, status, created = zip(*rows)
+    ids = np.array(ids)
+    user_ids = np.array(user_ids)
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    today64 = np.datetime64(today, 'D')
+
+    contributions = list(
+        GoalContribution.objects
+        .filter(goal__in=goals.values('id'), created_at__date__gte=start)
+        .values('goal_id')
+        .annotate(total=Sum('amount'))
+        .values_list('goal_id', 'total')
+        .order_by()
+    )
+    contributed = np.zeros(len(ids))
+    has_history = np.zeros(len(ids), dtype=bool)
+    if contributions:
+        goal_ids, totals = zip(*contributions)
+        positions = np.searchsorted(ids, goal_ids)
+        contributed[positions] = np.array(totals, dtype=float)
+        has_history[positions] = True
+
+    rollups = list(
+        MonthlyRollup.objects
+        .filter(user_id__in=goals.values('user_id'), month__gte=start)
+        .values('user_id', 'type')
+        .annotate(total=Sum('total'))
+        .values_list('user_id', 'type', 'total')
+        .order_by()
+    )
+    net_income = np.zeros(len(users))
+    if rollups:
+        rollup_users, types, totals = zip(*rollups)
+        signed = np.where(np.array(types) == 'income', 1.0, -1.0) * np.array(totals, dtype=float)
+        np.add.at(net_income, np.searchsorted(users, rollup_users), signed)
+
+    created = np.array(created, dtype='datetime64[D]')
+    result = forecast_arrays(
+        target=np.array(target, dtype=float),
+        current=np.array(current, dtype=float),
+        status=np.array(status),
+        deadline_days=(np.array(deadline, dtype='datetime64[D]') - today64).astype(int),
+        age_days=(today64 - created).astype(int) + 1,
+        user_index=user_index,
+        contributed=contributed,
+        has_history=has_history,
+        net_income=net_income,
+        history_days=(today - start).days + 1,
+    )
+
+    completion = today64 + np.where(result['reachable'], result['days_to_complete'], 0).astype('timedelta64[D]')
+    completion = np.where(result['reachable'], completion, np.datetime64('NaT'))
+    return {
+        goal_id: {
+            'projected_completion_date': date,
+            'projected_monthly_contribution': Decimal(str(rate)).quantize(CENT),
+            'required_monthly_contribution': Decimal(str(required)).quantize(CENT),
+            'on_track': on_track,
+        }
+        for goal_id, date, rate, required, on_track in zip(
+            ids.tolist(), completion.tolist(), result['monthly_rate'].round(2).tolist(),
+            result['required_monthly'].round(2).tolist(), result['on_track'].tolist()
+        )
+    }
+
+
+def save_forecasts(forecasts, data_versions, computed_at=None):
+    """
+    Store ``forecast_goals`` results, each stamped with the data version
+    (``data_versions``, by goal id) of its user it was computed from.
+    """
+    computed_at = computed_at or timezone.now()
+    GoalForecast.objects.bulk_create(
+        [
+            GoalForecast(goal_id=goal_id, data_version=data_versions[goal_id], computed_at=computed_at, **forecast)
+            for goal_id, forecast in forecasts.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['goal'],
+        update_fields=[*FORECAST_VALUES, 'data_version', 'computed_at'],
+    )
+
+
+def _stored(goal):
+    try:
+        return goal.forecast
+    except GoalForecast.DoesNotExist:
+        return None
+
+
+def current_forecasts(user_id, goals, today=None):
+    """
+    Forecasts of ``goals``, a user's goals fetched with ``select_related('forecast')``.
+
+    Served from the stored forecasts while all of them were computed today
+    from the user's current data version. Otherwise every goal of the user
+    is forecast again, so goals sharing income agree with the nightly run,
+    and stored before being returned.
+    """
+    today = today or timezone.localdate()
+    # Read first: a write during the computation leaves the result stale, not wrongly fresh
+    version = get_data_version(user_id)
+    stored = [_stored(goal) for goal in goals]
+    if all(
+        forecast is not None and forecast.data_version == version
+        and timezone.localdate(forecast.computed_at) == today
+        for forecast in stored
+    ):
+        return {
+            forecast.goal_id: {field: getattr(forecast, field) for field in FORECAST_VALUES}
+            for forecast in stored
+        }
+
+    forecasts = forecast_goals(Goal.objects.filter(user_id=user_id), today)
+    save_forecasts(forecasts, dict.fromkeys(forecasts, version))
+    return {goal.id: forecasts[goal.id] for goal in goals if goal.id in forecasts}
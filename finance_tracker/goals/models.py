@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from core.models import TimeStampedModel
 
 class Goal(models.Model):
     STATUS_CHOICES = [
@@ -15,6 +16,8 @@ class Goal(models.Model):
     current_amount = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     deadline = models.DateField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    # Deadline the "deadline approaching" notification was sent for
+    deadline_notified = models.DateField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -23,3 +26,45 @@ class Goal(models.Model):
 
     def __str__(self):
         return self.title
+
+class GoalContribution(TimeStampedModel):
+    """
+    One contribution to a goal; the ledger behind ``Goal.current_amount``.
+
+    ``current_amount`` stays between 0 and the target, so it can differ
+    from the sum of the ledger once a goal is over- or under-funded.
+    """
+    goal = models.ForeignKey(Goal, on_delete=models.CASCADE, related_name='contributions')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    # The transaction the money came from, if it was recorded as one
+    transaction = models.ForeignKey(
+        'transactions.Transaction', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='goal_contributions'
+    )
+    note = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        constraints = [
+            # A transaction can be counted towards a goal only once
+            models.UniqueConstraint(fields=['transaction'], name='unique_contribution_transaction'),
+        ]
+
+    def __str__(self):
+        return f"{self.goal_id}: {self.amount}"
+
+class GoalForecast(models.Model):
+    """
+    A goal's stored forecast, computed on ``computed_at``'s day from its
+    user's data as of ``data_version`` (see ``goals.forecasting``).
+    """
+    goal = models.OneToOneField(Goal, on_delete=models.CASCADE, primary_key=True, related_name='forecast')
+    projected_completion_date = models.DateField(null=True, blank=True)
+    projected_monthly_contribution = models.DecimalField(max_digits=15, decimal_places=2)
+    required_monthly_contribution = models.DecimalField(max_digits=15, decimal_places=2)
+    on_track = models.BooleanField()
+    data_version = models.BigIntegerField(default=0)
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.goal_id}: {'on track' if self.on_track else 'off track'}"
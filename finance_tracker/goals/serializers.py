@@ -1,15 +1,17 @@
 from rest_framework import serializers
-from .models import Goal
+from transactions.models import Transaction
+from .models import Goal, GoalContribution
 from django.utils import timezone
 from decimal import Decimal
 
 class GoalSerializer(serializers.ModelSerializer):
     progress_percentage = serializers.SerializerMethodField()
+    forecast = serializers.SerializerMethodField()
     
     class Meta:
         model = Goal
         fields = ('id', 'title', 'description', 'target_amount', 
-                 'current_amount', 'deadline', 'status', 'progress_percentage')
+                 'current_amount', 'deadline', 'status', 'progress_percentage', 'forecast')
         read_only_fields = ('id', 'current_amount', 'status')
     
     def validate_title(self, value):
@@ -37,6 +39,10 @@ class GoalSerializer(serializers.ModelSerializer):
             return 0
         return round((obj.current_amount / obj.target_amount) * 100, 2)
 
+    def get_forecast(self, obj):
+        # Computed for all goals at once by the view, see goals.forecasting
+        return self.context.get('forecasts', {}).get(obj.id)
+
     def create(self, validated_data):
         # Set initial status to 'in_progress'
         validated_data['status'] = 'in_progress'
@@ -55,4 +61,30 @@ class GoalSerializer(serializers.ModelSerializer):
             else:
                 validated_data['status'] = 'in_progress'
         
-        return super().update(instance, validated_data) 
\ No newline at end of file
+        return super().update(instance, validated_data) 
+
+class GoalContributionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GoalContribution
+        fields = ('id', 'goal', 'amount', 'transaction', 'note', 'created_at')
+        read_only_fields = ('id', 'created_at')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['goal'].queryset = Goal.objects.filter(user=request.user)
+            self.fields['transaction'].queryset = Transaction.objects.filter(user=request.user)
+        if 'goal' in self.context:
+            # Recorded against the goal in the URL, never one from the payload
+            self.fields['goal'] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    def validate_amount(self, value):
+        if value == Decimal('0'):
+            raise serializers.ValidationError("Amount cannot be zero.")
+        return value
+
+    def validate_transaction(self, value):
+        if value is not None and GoalContribution.objects.filter(transaction=value).exists():
+            raise serializers.ValidationError("This transaction is already counted towards a goal.")
+        return value
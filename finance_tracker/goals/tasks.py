@@ -0,0 +1,44 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from core.queries import query_budget
+from core.cache import get_data_versions
+from .forecasting import forecast_goals, save_forecasts
+from .models import Goal
+
+@shared_task
+def forecast_all_goals():
+    """
+    Store a fresh forecast for every goal of users with goals in progress,
+    so the day's first goals list reads them instead of computing them.
+
+    Users are processed in chunks of ``GOAL_FORECAST_CHUNK_SIZE``, each one
+    forecast in a single vectorized pass and written with one upsert.
+    """
+    chunk_size = getattr(settings, 'GOAL_FORECAST_CHUNK_SIZE', 1000)
+    today = timezone.localdate()
+    now = timezone.now()
+    user_ids = (
+        Goal.objects.filter(status='in_progress')
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+
+    last_user_id = 0
+    forecasts = 0
+    while True:
+        # The users, their goals' owners, contributions and income, and the upsert
+        with query_budget(6, name='forecast_all_goals chunk'):
+            chunk = list(user_ids.filter(user_id__gt=last_user_id)[:chunk_size])
+            if not chunk:
+                break
+            last_user_id = chunk[-1]
+
+            # Versions first, as in goals.forecasting.current_forecasts
+            versions = get_data_versions(chunk)
+            goals = Goal.objects.filter(user_id__in=chunk)
+            owners = dict(goals.values_list('id', 'user_id'))
+            results = forecast_goals(goals, today)
+            save_forecasts(results, {goal_id: versions[owners[goal_id]] for goal_id in results}, now)
+            forecasts += len(results)
+
+    return f"Forecast {forecasts} goals"
@@ -0,0 +1,182 @@
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import close_old_connections, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from goals.contributions import apply_amount, contribute
+from goals.models import Goal, GoalContribution
+from transactions.models import Transaction
+
+User = get_user_model()
+
+class GoalDataMixin:
+    def create_user(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_goal(self, target='1000.00', **kwargs):
+        return Goal.objects.create(
+            user=self.user,
+            title='Test Goal',
+            target_amount=Decimal(target),
+            deadline=timezone.now().date() + timedelta(days=30),
+            **kwargs
+        )
+
+class GoalContributionTest(GoalDataMixin, TestCase):
+    def setUp(self):
+        self.create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_progress_stays_between_zero_and_target(self):
+        goal = self.create_goal('100.00')
+        self.assertFalse(apply_amount(goal.id, Decimal('-20.00')))
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_amount, Decimal('0.00'))
+
+        self.assertFalse(apply_amount(goal.id, Decimal('60.00')))
+        self.assertTrue(apply_amount(goal.id, Decimal('60.00')))
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_amount, goal.status), (Decimal('100.00'), 'completed'))
+
+        # Completion is reported once
+        self.assertFalse(apply_amount(goal.id, Decimal('10.00')))
+        self.assertFalse(apply_amount(goal.id, Decimal('-30.00')))
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_amount, goal.status), (Decimal('70.00'), 'completed'))
+
+    def test_update_progress_records_contribution(self):
+        goal = self.create_goal()
+        url = reverse('goal-update-progress', args=[goal.id])
+        response = self.client.post(url, {'amount': '250.00'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data['current_amount']), Decimal('250.00'))
+        self.assertEqual(list(goal.contributions.values_list('amount', flat=True)), [Decimal('250.00')])
+
+        response = self.client.post(url, {'amount': 'lots'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_update_progress_rejects_non_finite_amounts(self):
+        goal = self.create_goal()
+        url = reverse('goal-update-progress', args=[goal.id])
+        for amount in ('NaN', 'Infinity', '-Infinity', 'sNaN'):
+            response = self.client.post(url, {'amount': amount})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, amount)
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_amount, Decimal('0.00'))
+        self.assertFalse(goal.contributions.exists())
+
+    def test_contribution_from_transaction(self):
+        goal = self.create_goal('100.00')
+        transfer = Transaction.objects.create(
+            user=self.user, date=timezone.now().date(), description='Savings',
+            amount=Decimal('100.00'), type='expense'
+        )
+        url = reverse('goal-contributions', args=[goal.id])
+        response = self.client.post(url, {'amount': '100.00', 'transaction': transfer.id, 'note': 'October'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(response.data['completed'])
+        self.assertEqual(response.data['goal']['status'], 'completed')
+
+        # A transaction counts once
+        response = self.client.post(url, {'amount': '100.00', 'transaction': transfer.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(url)
+        self.assertEqual([row['note'] for row in response.data], ['October'])
+
+    def test_contribution_payload_must_be_an_object(self):
+        goal = self.create_goal()
+        other = self.create_goal()
+        url = reverse('goal-contributions', args=[goal.id])
+        response = self.client.post(url, [{'amount': '10.00'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # The goal comes from the URL
+        response = self.client.post(url, {'goal': other.id, 'amount': '10.00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['contribution']['goal'], goal.id)
+        self.assertFalse(other.contributions.exists())
+
+    def test_bulk_contributions(self):
+        first = self.create_goal('100.00')
+        second = self.create_goal('500.00')
+        url = reverse('goal-bulk-contribute')
+        response = self.client.post(url, [
+            {'goal': first.id, 'amount': '60.00'},
+            {'goal': second.id, 'amount': '50.00'},
+            {'goal': first.id, 'amount': '40.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['completed'], [first.id])
+        self.assertEqual(GoalContribution.objects.count(), 3)
+        second.refresh_from_db()
+        self.assertEqual(second.current_amount, Decimal('50.00'))
+
+    def test_bulk_contributions_are_all_or_nothing(self):
+        goal = self.create_goal()
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        theirs = Goal.objects.create(
+            user=other, title='Theirs', target_amount=Decimal('100.00'),
+            deadline=timezone.now().date() + timedelta(days=30)
+        )
+        response = self.client.post(reverse('goal-bulk-contribute'), [
+            {'goal': goal.id, 'amount': '60.00'},
+            {'goal': theirs.id, 'amount': '60.00'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(GoalContribution.objects.exists())
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_amount, Decimal('0.00'))
+
+# SQLite allows a single writer at a time, so there is no contention to test
+@unittest.skipIf(connection.vendor == 'sqlite', 'SQLite does not support concurrent writers')
+class ConcurrentContributionTest(GoalDataMixin, TransactionTestCase):
+    def setUp(self):
+        self.create_user()
+
+    def run_parallel(self, goal, amount, count):
+        results = []
+        errors = []
+        barrier = threading.Barrier(count)
+
+        def worker():
+            try:
+                barrier.wait()
+                results.append(contribute(goal, amount)[1])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return results
+
+    def test_parallel_contributions_are_not_lost(self):
+        goal = self.create_goal('1000.00')
+        self.run_parallel(goal, Decimal('10.00'), 20)
+        goal.refresh_from_db()
+        self.assertEqual(goal.current_amount, Decimal('200.00'))
+        self.assertEqual(goal.contributions.count(), 20)
+
+    def test_parallel_contributions_complete_the_goal_once(self):
+        goal = self.create_goal('100.00')
+        results = self.run_parallel(goal, Decimal('10.00'), 15)
+        self.assertEqual(results.count(True), 1)
+        goal.refresh_from_db()
+        self.assertEqual((goal.current_amount, goal.status), (Decimal('100.00'), 'completed'))
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from goals.contributions import contribute
+from goals.forecasting import forecast_arrays, forecast_goals, DAYS_PER_MONTH
+from goals.models import Goal, GoalForecast
+from goals.tasks import forecast_all_goals
+from transactions.models import Transaction
+
+User = get_user_model()
+
+class ForecastArraysTest(TestCase):
+    def test_vectorized_forecast(self):
+        month = DAYS_PER_MONTH
+        result = forecast_arrays(
+            target=np.array([1200.0, 1000.0, 500.0, 300.0, 800.0]),
+            current=np.array([200.0, 0.0, 500.0, 0.0, 0.0]),
+            status=np.array(['in_progress', 'in_progress', 'completed', 'in_progress', 'in_progress']),
+            deadline_days=np.array([12 * month, 5 * month, 10, 30, 60]),
+            age_days=np.array([1000, 1000, 1000, 1000, 1000]),
+            user_index=np.array([0, 0, 0, 0, 1]),
+            contributed=np.array([600.0, 0.0, 0.0, 0.0, 0.0]),
+            has_history=np.array([True, False, False, False, False]),
+            net_income=np.array([1200.0, -600.0]),
+            history_days=6 * month,
+        )
+        # 100 a month from its history, 10 months to go
+        self.assertAlmostEqual(result['monthly_rate'][0], 100)
+        self.assertAlmostEqual(result['days_to_complete'][0], 10 * month, delta=1)
+        self.assertTrue(result['on_track'][0])
+        # No history: 200 a month of net income shared by two goals
+        self.assertAlmostEqual(result['monthly_rate'][1], 100)
+        self.assertFalse(result['on_track'][1])
+        self.assertAlmostEqual(result['required_monthly'][1], 200)
+        # Done
+        self.assertEqual((result['days_to_complete'][2], result['on_track'][2]), (0, True))
+        self.assertAlmostEqual(result['required_monthly'][3], 300)
+        # Nothing left to save
+        self.assertEqual(result['monthly_rate'][4], 0)
+        self.assertFalse(result['reachable'][4])
+        self.assertFalse(result['on_track'][4])
+
+class ForecastGoalsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.localdate()
+        cache.clear()
+
+    def create_goal(self, target='1200.00', days=365, user=None, **kwargs):
+        return Goal.objects.create(
+            user=user or self.user,
+            title='Test Goal',
+            target_amount=Decimal(target),
+            deadline=self.today + timedelta(days=days),
+            **kwargs
+        )
+
+    def test_forecast_from_contributions(self):
+        goal = self.create_goal()
+        contribute(goal, Decimal('600.00'))
+
+        forecast = forecast_goals(Goal.objects.all(), self.today)[goal.id]
+        # A goal created today extrapolates one month of saving
+        self.assertEqual(forecast['projected_monthly_contribution'], Decimal('600.00'))
+        self.assertEqual(forecast['projected_completion_date'], self.today + timedelta(days=31))
+        self.assertTrue(forecast['on_track'])
+        self.assertEqual(
+            forecast['required_monthly_contribution'],
+            (Decimal('600') / Decimal(365 / DAYS_PER_MONTH)).quantize(Decimal('0.01'))
+        )
+
+    def test_forecast_from_net_income(self):
+        goal = self.create_goal(days=20)
+        Transaction.objects.create(
+            user=self.user, date=self.today, description='Salary', amount=Decimal('1000.00'), type='income'
+        )
+        Transaction.objects.create(
+            user=self.user, date=self.today, description='Rent', amount=Decimal('700.00'), type='expense'
+        )
+        forecast = forecast_goals(Goal.objects.all(), self.today)[goal.id]
+        self.assertGreater(forecast['projected_monthly_contribution'], 0)
+        self.assertFalse(forecast['on_track'])
+        # All of it within the month left
+        self.assertEqual(forecast['required_monthly_contribution'], Decimal('1200.00'))
+
+    def test_no_saving_means_no_completion_date(self):
+        goal = self.create_goal()
+        forecast = forecast_goals(Goal.objects.all(), self.today)[goal.id]
+        self.assertIsNone(forecast['projected_completion_date'])
+        self.assertFalse(forecast['on_track'])
+
+    def test_query_count_does_not_grow_with_goals(self):
+        others = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass123')
+            for i in range(3)
+        ]
+        for user in [self.user, *others]:
+            for _ in range(5):
+                contribute(self.create_goal(user=user), Decimal('10.00'))
+        with self.assertNumQueries(3):
+            forecasts = forecast_goals(Goal.objects.all(), self.today)
+        self.assertEqual(len(forecasts), 20)
+
+    def test_goals_list_includes_forecasts(self):
+        goal = self.create_goal()
+        contribute(goal, Decimal('100.00'))
+        response = self.client.get(reverse('goal-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['forecast']['projected_monthly_contribution'], Decimal('100.00'))
+
+        response = self.client.get(reverse('goal-detail', args=[goal.id]))
+        self.assertEqual(response.data['forecast']['projected_monthly_contribution'], Decimal('100.00'))
+
+    def test_write_responses_include_forecasts(self):
+        deadline = (self.today + timedelta(days=365)).isoformat()
+        response = self.client.post(reverse('goal-list'), {'title': 'Car', 'target_amount': '1200.00', 'deadline': deadline})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.data['forecast'])
+        url = reverse('goal-detail', args=[response.data['id']])
+
+        response = self.client.patch(url, {'title': 'New car'})
+        self.assertIsNotNone(response.data['forecast'])
+        response = self.client.put(url, {'title': 'Car', 'target_amount': '1500.00', 'deadline': deadline})
+        self.assertIsNotNone(response.data['forecast'])
+
+        goal_id = response.data['id']
+        response = self.client.post(reverse('goal-update-progress', args=[goal_id]), {'amount': '100.00'})
+        self.assertEqual(response.data['forecast']['projected_monthly_contribution'], Decimal('100.00'))
+        response = self.client.post(reverse('goal-contributions', args=[goal_id]), {'amount': '50.00'})
+        self.assertEqual(response.data['goal']['forecast']['projected_monthly_contribution'], Decimal('150.00'))
+        response = self.client.post(
+            reverse('goal-bulk-contribute'), [{'goal': goal_id, 'amount': '50.00'}], format='json'
+        )
+        self.assertEqual(response.data['goals'][0]['forecast']['projected_monthly_contribution'], Decimal('200.00'))
+
+    def test_goals_list_serves_stored_forecasts(self):
+        goal = self.create_goal()
+        contribute(goal, Decimal('100.00'))
+        self.client.get(reverse('goal-list'))
+        self.assertEqual(GoalForecast.objects.get(goal=goal).projected_monthly_contribution, Decimal('100.00'))
+
+        # The goals with their forecasts, nothing computed
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('goal-list'))
+        self.assertEqual(response.data[0]['forecast']['projected_monthly_contribution'], Decimal('100.00'))
+
+        # A write makes them stale; the next read computes and stores them again
+        contribute(goal, Decimal('100.00'))
+        response = self.client.get(reverse('goal-list'))
+        self.assertEqual(response.data[0]['forecast']['projected_monthly_contribution'], Decimal('200.00'))
+        self.assertEqual(GoalForecast.objects.get(goal=goal).projected_monthly_contribution, Decimal('200.00'))
+
+        # As does a new day
+        GoalForecast.objects.update(computed_at=timezone.now() - timedelta(days=1))
+        with self.assertNumQueries(5):
+            self.client.get(reverse('goal-list'))
+
+    def test_nightly_batch(self):
+        goal = self.create_goal()
+        done = self.create_goal(status='completed')
+        finished_only = User.objects.create_user(username='done', email='done@example.com', password='x')
+        self.create_goal(user=finished_only, status='completed')
+        contribute(goal, Decimal('100.00'))
+        forecast_all_goals()
+        self.assertEqual(set(GoalForecast.objects.values_list('goal_id', flat=True)), {goal.id, done.id})
+
+        # What the list serves, without computing it
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('goal-list'))
+        forecasts = {item['id']: item['forecast'] for item in response.data}
+        self.assertEqual(forecasts[goal.id]['projected_monthly_contribution'], Decimal('100.00'))
+        self.assertEqual(forecasts, {
+            goal_id: forecast_goals(Goal.objects.filter(user=self.user), self.today)[goal_id]
+            for goal_id in forecasts
+        })
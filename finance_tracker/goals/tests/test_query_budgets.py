@@ -0,0 +1,51 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from core.testing import QueryBudgetAssertionsMixin
+from goals.models import Goal, GoalContribution
+from transactions.models import Transaction
+
+User = get_user_model()
+
+class GoalQueryBudgetTest(QueryBudgetAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.rows = 0
+
+    def populate(self, size):
+        today = timezone.now().date()
+        while self.rows < size:
+            self.rows += 1
+            goal = Goal.objects.create(
+                user=self.user, title=f'Goal {self.rows}', target_amount=Decimal('1000.00'),
+                deadline=today + timedelta(days=30 * self.rows)
+            )
+            income = Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=self.rows * 10), description=f'Pay {self.rows}',
+                amount=Decimal('300.00'), type='income'
+            )
+            # Contributions go to the goal itself and to the first goal, which the detail endpoints read
+            for target in {goal, self.first_goal()}:
+                GoalContribution.objects.create(goal=target, amount=Decimal('10.00'))
+            GoalContribution.objects.create(goal=goal, amount=Decimal('25.00'), transaction=income)
+
+    def first_goal(self):
+        return Goal.objects.filter(user=self.user).order_by('id').first()
+
+    def test_endpoints_do_not_scale_with_rows(self):
+        get = self.client.get
+        self.assertQueriesDoNotScale({
+            'goals': lambda: get(reverse('goal-list')),
+            'goal': lambda: get(reverse('goal-detail', args=[self.first_goal().id])),
+            'contributions': lambda: get(reverse('goal-contributions', args=[self.first_goal().id])),
+        }, self.populate)
@@ -1,14 +1,19 @@
 from django.shortcuts import render
+from django.db import IntegrityError
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.queries import query_budget
+from core.views import ConditionalGetMixin
+from .contributions import contribute, contribute_many
+from .forecasting import current_forecasts
 from .models import Goal
-from .serializers import GoalSerializer
-from decimal import Decimal
+from .serializers import GoalSerializer, GoalContributionSerializer
+from decimal import Decimal, InvalidOperation
 
 # Create your views here.
 
-class GoalViewSet(viewsets.ModelViewSet):
+class GoalViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GoalSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -17,37 +22,104 @@ class GoalViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        self.add_forecast(serializer)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.add_forecast(serializer)
+
+    def add_forecast(self, serializer):
+        # Write responses carry the forecast too, for clients replacing their copy of the goal
+        serializer.context.update(self.get_forecast_context([serializer.instance]))
+
+    # The goals with their stored forecasts; after a write, also the forecasts'
+    # contributions and income and their upsert
+    @query_budget(5)
+    def list(self, request, *args, **kwargs):
+        goals = list(self.filter_queryset(self.get_queryset()).select_related('forecast'))
+        serializer = self.get_serializer(goals, many=True, context=self.get_forecast_context(goals))
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        goal = self.get_object()
+        return Response(self.get_serializer(goal, context=self.get_forecast_context([goal])).data)
+
+    def get_forecast_context(self, goals):
+        return {**self.get_serializer_context(), 'forecasts': current_forecasts(self.request.user.id, goals)}
 
     @action(detail=True, methods=['POST'])
     def update_progress(self, request, pk=None):
+        goal = self.get_object()
+        amount = request.data.get('amount', 0)
+
+        # Convert amount to Decimal and handle potential errors
         try:
-            goal = self.get_object()
-            amount = request.data.get('amount', 0)
-            
-            # Convert amount to Decimal and handle potential errors
-            try:
-                amount = Decimal(str(amount))  # Convert to string first to avoid float precision issues
-            except (TypeError, ValueError):
-                return Response(
-                    {'error': 'Invalid amount value'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Update current amount
-            goal.current_amount = max(Decimal('0'), goal.current_amount + amount)
-            
-            # Check if goal is completed
-            if goal.current_amount >= goal.target_amount:
-                goal.status = 'completed'
-                goal.current_amount = goal.target_amount  # Cap at target amount
-            
-            goal.save()
-            
-            serializer = self.get_serializer(goal)
+            amount = Decimal(str(amount))  # Convert to string first to avoid float precision issues
+            if not amount.is_finite():
+                # NaN or Infinity would reach the F() update
+                raise ValueError(amount)
+        except (TypeError, ValueError, InvalidOperation):
+            return Response(
+                {'error': 'Invalid amount value'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if amount:
+            # Recorded in the ledger and added in the database, so parallel updates all count
+            contribute(goal, amount)
+            goal.refresh_from_db()
+
+        serializer = self.get_serializer(goal, context=self.get_forecast_context([goal]))
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['GET', 'POST'])
+    def contributions(self, request, pk=None):
+        goal = self.get_object()
+        if request.method == 'GET':
+            serializer = GoalContributionSerializer(goal.contributions.all(), many=True)
             return Response(serializer.data)
-            
-        except Exception as e:
+
+        serializer = GoalContributionSerializer(data=request.data, context={**self.get_serializer_context(), 'goal': goal})
+        serializer.is_valid(raise_exception=True)
+        try:
+            contribution, completed = contribute(
+                goal, serializer.validated_data['amount'],
+                serializer.validated_data.get('transaction'), serializer.validated_data.get('note', '')
+            )
+        except IntegrityError:
+            return Response(
+                {'transaction': ['This transaction is already counted towards a goal.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        goal.refresh_from_db()
+        return Response({
+            'contribution': GoalContributionSerializer(contribution).data,
+            'goal': self.get_serializer(goal, context=self.get_forecast_context([goal])).data,
+            'completed': completed,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['POST'], url_path='contributions')
+    def bulk_contribute(self, request):
+        """Record a list of contributions, to any of the user's goals, all or nothing."""
+        serializer = GoalContributionSerializer(data=request.data, many=True, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        linked = [item['transaction'].id for item in serializer.validated_data if item.get('transaction')]
+        if len(linked) != len(set(linked)):
+            return Response(
+                {'transaction': ['A transaction can only be counted once.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            contributions, completed = contribute_many(request.user, serializer.validated_data)
+        except IntegrityError:
             return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'transaction': ['This transaction is already counted towards a goal.']},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        goals = list(Goal.objects.filter(id__in={contribution.goal_id for contribution in contributions}))
+        return Response({
+            'contributions': GoalContributionSerializer(contributions, many=True).data,
+            'goals': self.get_serializer(goals, many=True, context=self.get_forecast_context(goals)).data,
+            'completed': completed,
+        }, status=status.HTTP_201_CREATED)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, QueuedEmail, UnreadCounter
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -9,3 +9,16 @@ class NotificationAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
     
     readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'count')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'count')
+
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'user', 'digest', 'sent_at', 'attempts', 'created_at')
+    list_filter = ('digest', 'sent_at')
+    search_fields = ('subject', 'user__username')
+    readonly_fields = ('created_at', 'updated_at')
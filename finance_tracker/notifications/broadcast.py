@@ -0,0 +1,178 @@
+import asyncio
+import json
+import logging
+import threading
+from functools import lru_cache
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.utils.encoders import JSONEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One stream's view of a user's events."""
+
+    async def start(self):
+        """Start receiving; events published before this are not delivered."""
+
+    async def get(self, timeout):
+        """Next ``(event, data)`` pair, or None if nothing arrived within ``timeout`` seconds."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class BaseBroadcaster:
+    """
+    Fan-out of per-user events to open notification streams.
+
+    ``publish`` is synchronous because it is called from model signals, in
+    request threads and Celery workers alike; ``subscribe`` is used by the
+    async stream view.
+    """
+
+    def publish(self, user_id, event, data):
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        raise NotImplementedError
+
+
+class _QueueSubscription(Subscription):
+    def __init__(self, broadcaster, user_id):
+        self.broadcaster = broadcaster
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, message):
+        # Called from the publishing thread
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            # The stream's event loop is gone
+            self.broadcaster._remove(self)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broadcaster._remove(self)
+
+
+class InProcessBroadcaster(BaseBroadcaster):
+    """Delivers events to streams served by this process only."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put((event, data))
+
+    def subscribe(self, user_id):
+        subscription = _QueueSubscription(self, user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, client, channel):
+        self.client = client
+        self.channel = channel
+        self.pubsub = None
+
+    async def start(self):
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self.pubsub.subscribe(self.channel)
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(timeout=timeout)
+        if message is None:
+            return None
+        payload = json.loads(message['data'])
+        return payload['event'], payload['data']
+
+    async def close(self):
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe(self.channel)
+            await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroadcaster(BaseBroadcaster):
+    """
+    Redis pub/sub, one channel per user, so events published by any web
+    process or Celery worker reach every process holding a stream.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', channel_prefix='notifications'):
+        import redis
+        self.url = url
+        self.channel_prefix = channel_prefix
+        self._client = redis.Redis.from_url(url)
+
+    def channel(self, user_id):
+        return f'{self.channel_prefix}:{user_id}'
+
+    def publish(self, user_id, event, data):
+        payload = json.dumps({'event': event, 'data': data}, cls=JSONEncoder)
+        self._client.publish(self.channel(user_id), payload)
+
+    def subscribe(self, user_id):
+        import redis.asyncio
+        # A connection per stream: pub/sub connections can't be shared
+        return _RedisSubscription(redis.asyncio.Redis.from_url(self.url), self.channel(user_id))
+
+
+@lru_cache(maxsize=None)
+def get_broadcaster():
+    config = getattr(settings, 'NOTIFICATION_BROADCASTER', {})
+    backend = import_string(config.get('BACKEND', 'notifications.broadcast.InProcessBroadcaster'))
+    return backend(**config.get('OPTIONS', {}))
+
+
+def _publish(user_id, event, data):
+    try:
+        get_broadcaster().publish(user_id, event, data)
+    except Exception:
+        # Streams are best effort; never fail the write that triggered the event
+        logger.exception('Could not publish %s event for user %s', event, user_id)
+
+
+def publish_unread_count(user_id):
+    from .counters import unread_count
+    _publish(user_id, 'unread_count', {'unread_count': unread_count(user_id)})
+
+
+def publish_notification(notification):
+    publish_notifications([notification])
+
+
+def publish_notifications(notifications):
+    """Publish new notifications, then each affected user's unread count once."""
+    from .serializers import NotificationSerializer
+    for notification in notifications:
+        _publish(notification.user_id, 'notification', NotificationSerializer(notification).data)
+    for user_id in dict.fromkeys(notification.user_id for notification in notifications):
+        publish_unread_count(user_id)
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from django.db.models import Count, F
+from .models import Notification, UnreadCounter
+
+
+def reset_unread_count(user_id):
+    """Recount a user's unread notifications and store the result."""
+    count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+    UnreadCounter.objects.update_or_create(user_id=user_id, defaults={'count': count})
+    return count
+
+
+def unread_count(user_id):
+    """A user's unread notification count, read from the counter (created on first use)."""
+    count = UnreadCounter.objects.filter(user_id=user_id).values_list('count', flat=True).first()
+    if count is None:
+        count = reset_unread_count(user_id)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    updated = UnreadCounter.objects.filter(user_id=user_id).update(count=F('count') + delta)
+    if not updated:
+        # No counter yet: the recount already includes this change
+        reset_unread_count(user_id)
+
+
+def adjust_unread_counts(deltas):
+    """
+    Apply ``{user_id: delta}`` to many counters in a fixed number of queries:
+    one update per distinct delta, and one recount for users without a
+    counter yet.
+    """
+    existing = set(UnreadCounter.objects.filter(user_id__in=deltas).values_list('user_id', flat=True))
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if user_id in existing:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(count=F('count') + delta)
+
+    missing = set(deltas) - existing
+    if missing:
+        # The recount already includes these changes
+        counts = dict(
+            Notification.objects.filter(user_id__in=missing, is_read=False)
+            .values('user_id').annotate(count=Count('id')).values_list('user_id', 'count')
+        )
+        UnreadCounter.objects.bulk_create(
+            [UnreadCounter(user_id=user_id, count=counts.get(user_id, 0)) for user_id in missing],
+            update_conflicts=True, unique_fields=['user'], update_fields=['count']
+        )
@@ -0,0 +1,203 @@
+import logging
+from collections import Counter, defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from core.cache import bump_data_version, NOTIFICATIONS_SCOPE
+from core.queries import query_budget
+from .broadcast import publish_notifications
+from .counters import adjust_unread_counts
+from .models import Notification, QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SUBJECT = "Your Finance Tracker digest for {date}"
+
+
+# Users, notifications, emails, counters, one counter update per distinct count
+# (usually one), and the recount of users without a counter
+@query_budget(7)
+def notify(entries):
+    """
+    Create notifications and queue their emails, in a fixed number of queries.
+
+    ``entries`` are dicts with ``user_id``, ``title``, ``message`` and
+    optionally ``notification_type``; entries of unknown users are dropped.
+    An email is queued for users with ``email_notifications`` on, held for
+    the daily digest when their ``email_frequency`` is ``daily``. Nothing is
+    sent here, see ``send_queued_emails`` and ``send_daily_digests``.
+    Returns the created notifications.
+    """
+    User = get_user_model()
+    users = User.objects.filter(id__in={entry['user_id'] for entry in entries}).only(
+        'id', 'email', 'email_notifications', 'email_frequency'
+    ).in_bulk()
+    entries = [entry for entry in entries if entry['user_id'] in users]
+    if not entries:
+        return []
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=entry['user_id'],
+                title=entry['title'],
+                message=entry['message'],
+                notification_type=entry.get('notification_type', 'SYSTEM')
+            )
+            for entry in entries
+        ])
+        QueuedEmail.objects.bulk_create([
+            QueuedEmail(
+                user_id=entry['user_id'],
+                subject=entry['title'],
+                body=entry['message'],
+                digest=users[entry['user_id']].email_frequency == 'daily'
+            )
+            for entry in entries
+            if users[entry['user_id']].email_notifications and users[entry['user_id']].email
+        ])
+
+        # bulk_create skips the signals that keep the counters, cache and streams current
+        created = Counter(notification.user_id for notification in notifications)
+        adjust_unread_counts(created)
+        for user_id in created:
+            bump_data_version(user_id, NOTIFICATIONS_SCOPE)
+        transaction.on_commit(lambda: publish_notifications(notifications))
+
+    return notifications
+
+
+def _pending():
+    abandoned = timezone.now() - timedelta(seconds=getattr(settings, 'EMAIL_CLAIM_TIMEOUT', 600))
+    return QueuedEmail.objects.filter(
+        Q(claimed_at__isnull=True) | Q(claimed_at__lt=abandoned),
+        sent_at__isnull=True, attempts__lt=getattr(settings, 'EMAIL_MAX_ATTEMPTS', 5),
+    )
+
+
+def _claim(queryset, limit=None):
+    """
+    Take (up to ``limit``) rows of ``queryset`` for sending, in a transaction of their own.
+
+    Concurrent flushes skip each other's rows instead of sending them twice,
+    and no row stays locked while the mail server is talked to.
+    """
+    with transaction.atomic():
+        queryset = queryset.select_related('user').select_for_update(skip_locked=True, of=('self',))
+        emails = list(queryset[:limit] if limit else queryset)
+        QueuedEmail.objects.filter(id__in=[email.id for email in emails]).update(claimed_at=timezone.now())
+    return emails
+
+
+def _deliver(connection, outgoing):
+    """
+    Send ``(rows, message)`` pairs of claimed rows over an open connection,
+    record the outcome on the rows and return the number of messages sent.
+
+    Messages go out one by one on the same connection: a batched
+    ``send_messages`` stops at the first failure without saying which
+    messages were already sent, and those must not be sent again.
+    """
+    sent, failed = [], []
+    messages = 0
+    for rows, message in outgoing:
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            logger.warning('Could not send email to %s: %s', message.to, e)
+            for row in rows:
+                row.attempts += 1
+                row.last_error = str(e)
+                row.claimed_at = None
+            failed.extend(rows)
+        else:
+            sent.extend(rows)
+            messages += 1
+
+    QueuedEmail.objects.filter(id__in=[row.id for row in sent]).update(sent_at=timezone.now())
+    QueuedEmail.objects.bulk_update(failed, ['attempts', 'last_error', 'claimed_at'])
+    return messages
+
+
+def send_queued_emails(user_ids=None):
+    """
+    Send every queued email that isn't held for a digest, or only those of
+    ``user_ids``.
+
+    All batches share one connection to the mail server. Failed emails stay
+    queued and are retried by the next flush, up to ``EMAIL_MAX_ATTEMPTS``.
+    Returns the number of emails sent.
+    """
+    batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+    pending = _pending().filter(digest=False).order_by('id')
+    if user_ids is not None:
+        pending = pending.filter(user_id__in=user_ids)
+    sent = 0
+    last_id = 0
+    connection = get_connection()
+    try:
+        while True:
+            emails = _claim(pending.filter(id__gt=last_id), batch_size)
+            if not emails:
+                break
+            last_id = emails[-1].id
+            # Connects on the first batch only; an empty queue costs no connection
+            connection.open()
+            sent += _deliver(connection, [
+                ([email], EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=settings.EMAIL_HOST_USER,
+                    to=[email.user.email],
+                    connection=connection
+                ))
+                for email in emails
+            ])
+    finally:
+        connection.close()
+    return sent
+
+
+def _digest_message(emails, date, connection):
+    body = f"You have {len(emails)} new notifications:\n\n" + "\n\n".join(
+        f"{email.subject}\n{email.body}" for email in emails
+    )
+    return EmailMessage(
+        subject=DIGEST_SUBJECT.format(date=date.isoformat()),
+        body=body,
+        from_email=settings.EMAIL_HOST_USER,
+        to=[emails[0].user.email],
+        connection=connection
+    )
+
+
+def send_daily_digests():
+    """
+    Send each user one email with everything held for their digest.
+
+    Held emails of users who have since turned email notifications off are
+    dropped. Returns the number of digests sent.
+    """
+    batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+    pending = _pending().filter(digest=True)
+    pending.filter(user__email_notifications=False).delete()
+
+    today = timezone.localdate()
+    user_ids = list(pending.order_by('user_id').values_list('user_id', flat=True).distinct())
+    if not user_ids:
+        return 0
+
+    sent = 0
+    with get_connection() as connection:
+        for start in range(0, len(user_ids), batch_size):
+            by_user = defaultdict(list)
+            for email in _claim(pending.filter(user_id__in=user_ids[start:start + batch_size]).order_by('id')):
+                by_user[email.user_id].append(email)
+            sent += _deliver(connection, [
+                (rows, _digest_message(rows, today, connection)) for rows in by_user.values()
+            ])
+    return sent
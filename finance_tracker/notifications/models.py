@@ -5,6 +5,7 @@ from core.models import TimeStampedModel
 class Notification(TimeStampedModel):
     NOTIFICATION_TYPES = [
         ('BILL_DUE', 'Bill Due'),
+        ('BUDGET_THRESHOLD', 'Budget Threshold'),
         ('BUDGET_EXCEEDED', 'Budget Exceeded'),
         ('GOAL_MILESTONE', 'Goal Milestone'),
         ('GOAL_DEADLINE', 'Goal Deadline'),
@@ -18,6 +19,46 @@ class Notification(TimeStampedModel):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's notifications
+            models.Index(fields=['user', '-created_at', '-id'], name='notif_user_created_idx'),
+            # Recounting unread notifications only touches unread rows
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notif_user_unread_idx'),
+        ]
 
     def __str__(self):
         return f"{self.notification_type}: {self.title}"
+
+class UnreadCounter(models.Model):
+    """Number of unread notifications per user, kept current by signals."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+        related_name='unread_notification_counter'
+    )
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
+
+class QueuedEmail(TimeStampedModel):
+    """An outgoing email, sent in batches by notifications.delivery."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='queued_emails')
+    subject = models.CharField(max_length=200)
+    body = models.TextField()
+    # Held for the user's daily digest instead of being sent on the next flush
+    digest = models.BooleanField(default=False)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    # Taken by a flush sending it; a claim older than EMAIL_CLAIM_TIMEOUT was abandoned
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Flushes and digests only scan unsent mail
+            models.Index(fields=['digest', 'id'], condition=models.Q(sent_at__isnull=True), name='email_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.subject}"
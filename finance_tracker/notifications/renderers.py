@@ -0,0 +1,21 @@
+import json
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def format_event(event, data):
+    """One server-sent event with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets ``Accept: text/event-stream`` through content negotiation; error
+    responses are sent as a single ``error`` event.
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data).encode(self.charset)
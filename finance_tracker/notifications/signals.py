@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .broadcast import publish_notification, publish_unread_count
+from .counters import adjust_unread_count
+from .models import Notification
+
+
+@receiver(pre_save, sender=Notification, dispatch_uid='remember-notification-read-state')
+def remember_previous_read_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._was_unread = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and 'is_read' not in update_fields:
+        return
+    previous = Notification.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+    if previous is not None:
+        instance._was_unread = not previous
+
+
+@receiver(post_save, sender=Notification, dispatch_uid='publish-notification-save')
+def update_unread_count_on_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        if not instance.is_read:
+            adjust_unread_count(instance.user_id, 1)
+        # Streams only ever see committed rows
+        transaction.on_commit(lambda: publish_notification(instance))
+        return
+
+    was_unread = getattr(instance, '_was_unread', None)
+    if was_unread is None or was_unread == (not instance.is_read):
+        return
+    adjust_unread_count(instance.user_id, 1 if was_unread is False else -1)
+    transaction.on_commit(lambda: publish_unread_count(instance.user_id))
+
+
+@receiver(post_delete, sender=Notification, dispatch_uid='publish-notification-delete')
+def update_unread_count_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the user cascades to their notifications and their counter
+    if isinstance(origin, QuerySet):
+        origin = origin.model
+    if origin is not None and not (origin is Notification or isinstance(origin, Notification)):
+        return
+    if not instance.is_read:
+        adjust_unread_count(instance.user_id, -1)
+        transaction.on_commit(lambda: publish_unread_count(instance.user_id))
@@ -1,52 +1,135 @@
+from collections import defaultdict
+from datetime import timedelta
 from celery import shared_task
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import Notification
+from django.db import transaction
+from django.utils import timezone
+from core.queries import query_budget
+from . import delivery
 
 @shared_task
-def send_notification_email(user_id, title, message):
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    
-    try:
-        user = User.objects.get(id=user_id)
-        
-        # Create notification in database
-        Notification.objects.create(
-            user=user,
-            title=title,
-            message=message,
-            notification_type='SYSTEM'
-        )
-        
-        # Send email
-        send_mail(
-            subject=title,
-            message=message,
-            from_email=settings.EMAIL_HOST_USER,
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-        
-        return f"Notification sent to {user.email}"
-    except User.DoesNotExist:
+def send_notification_email(user_id, title, message, notification_type='SYSTEM'):
+    notifications = delivery.notify([{
+        'user_id': user_id,
+        'title': title,
+        'message': message,
+        'notification_type': notification_type,
+    }])
+    if not notifications:
         return f"User {user_id} not found"
+
+    try:
+        # This user's mail only; the periodic send_queued_emails retries everyone's
+        sent = delivery.send_queued_emails(user_ids=[user_id])
     except Exception as e:
         return f"Error sending notification: {str(e)}"
+    return f"Notification created for user {user_id}, {sent} emails sent"
+
+@shared_task
+def send_queued_emails():
+    """Retry queued emails that an earlier flush could not send."""
+    return f"Sent {delivery.send_queued_emails()} emails"
+
+@shared_task
+def send_daily_digests():
+    return f"Sent {delivery.send_daily_digests()} digests"
 
 @shared_task
 def check_goal_deadlines():
+    """
+    Notify users of in-progress goals due within the next week.
+
+    Walks goals in primary-key order, one chunk per query, and dispatches
+    one ``notify_goal_deadlines`` message per chunk with the goals grouped
+    per user. A goal is notified once per deadline; moving the deadline
+    makes it eligible again. Goals are only marked by the notification
+    itself, so a batch lost on the way is picked up by the next run.
+    """
     from goals.models import Goal
-    from django.utils import timezone
-    
-    upcoming_goals = Goal.objects.filter(
-        status='in_progress',
-        deadline__lte=timezone.now() + timezone.timedelta(days=7)
+    from django.db.models import F
+
+    today = timezone.localdate()
+    window = getattr(settings, 'GOAL_DEADLINE_WINDOW_DAYS', 7)
+    chunk_size = getattr(settings, 'GOAL_DEADLINE_CHUNK_SIZE', 500)
+
+    due = (
+        Goal.objects
+        .filter(status='in_progress', deadline__gte=today, deadline__lte=today + timedelta(days=window))
+        .exclude(deadline_notified=F('deadline'))
+        # Grouping only needs user_id, so no per-goal user fetch or join
+        .only('id', 'title', 'deadline', 'user_id')
+        .order_by('id')
     )
-    
-    for goal in upcoming_goals:
-        send_notification_email.delay(
-            goal.user.id,
-            "Goal Deadline Approaching",
-            f"Your goal '{goal.title}' is due in {(goal.deadline - timezone.now().date()).days} days"
-        ) 
\ No newline at end of file
+
+    last_id = 0
+    batches = 0
+    while True:
+        # One query per chunk, however many goals and users it holds
+        with query_budget(1, name='check_goal_deadlines chunk'):
+            goals = list(due.filter(id__gt=last_id)[:chunk_size])
+            if not goals:
+                break
+            last_id = goals[-1].id
+
+            by_user = defaultdict(list)
+            for goal in goals:
+                by_user[goal.user_id].append({
+                    'id': goal.id,
+                    'title': goal.title,
+                    'deadline': goal.deadline.isoformat(),
+                    'days': (goal.deadline - today).days,
+                })
+            notify_goal_deadlines.delay(
+                [{'user_id': user_id, 'goals': user_goals} for user_id, user_goals in by_user.items()]
+            )
+            batches += 1
+
+    return f"Dispatched {batches} goal deadline batches"
+
+@shared_task
+def notify_goal_deadlines(batch):
+    """
+    Send one deadline notification per user in a ``check_goal_deadlines`` batch.
+
+    Goals are marked notified in the same transaction as the notifications,
+    skipping those already notified for their deadline or whose deadline
+    moved since the batch was built, so a batch sent twice notifies once.
+    """
+    from goals.models import Goal
+    from django.db.models import F
+
+    listed = {goal['id']: goal['deadline'] for entry in batch for goal in entry['goals']}
+    with transaction.atomic():
+        current = (
+            Goal.objects.select_for_update()
+            .filter(id__in=listed)
+            .exclude(deadline_notified=F('deadline'))
+            .values_list('id', 'deadline')
+        )
+        claimed = [goal_id for goal_id, deadline in current if deadline.isoformat() == listed[goal_id]]
+        Goal.objects.filter(id__in=claimed).update(deadline_notified=F('deadline'))
+
+        claimed = set(claimed)
+        entries = []
+        for entry in batch:
+            goals = sorted((goal for goal in entry['goals'] if goal['id'] in claimed), key=lambda goal: goal['days'])
+            if not goals:
+                continue
+            if len(goals) == 1:
+                message = f"Your goal '{goals[0]['title']}' is due in {goals[0]['days']} days"
+            else:
+                message = "These goals are due soon:\n" + "\n".join(
+                    f"- '{goal['title']}' in {goal['days']} days" for goal in goals
+                )
+            entries.append({
+                'user_id': entry['user_id'],
+                'title': "Goal Deadline Approaching",
+                'message': message,
+                'notification_type': 'GOAL_DEADLINE',
+            })
+
+        # One insert for the whole batch
+        delivery.notify(entries)
+
+    # Then its users' emails over a single connection
+    delivery.send_queued_emails(user_ids=[entry['user_id'] for entry in entries])
@@ -0,0 +1,154 @@
+from datetime import timedelta
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.cache import get_data_version, NOTIFICATIONS_SCOPE
+from notifications import delivery
+from notifications.broadcast import InProcessBroadcaster
+from notifications.counters import unread_count
+from notifications.models import Notification, QueuedEmail
+from unittest.mock import patch
+
+User = get_user_model()
+
+class DeliveryTest(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+
+    def entry(self, user, title='Test'):
+        return {'user_id': user.id, 'title': title, 'message': f'{title} message', 'notification_type': 'GOAL_DEADLINE'}
+
+    def test_notify_creates_notifications_and_queues_emails(self):
+        version = get_data_version(self.users[0].id, NOTIFICATIONS_SCOPE)
+        with patch.object(InProcessBroadcaster, 'publish') as mock_publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                notifications = delivery.notify([
+                    self.entry(self.users[0], 'First'),
+                    self.entry(self.users[0], 'Second'),
+                    self.entry(self.users[1]),
+                    {'user_id': 0, 'title': 'Nobody', 'message': 'Nobody'},
+                ])
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(Notification.objects.filter(user=self.users[0]).count(), 2)
+        self.assertEqual(QueuedEmail.objects.filter(sent_at__isnull=True, digest=False).count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+        # bulk_create skipped the signals, the counters and streams are still current
+        self.assertEqual(unread_count(self.users[0].id), 2)
+        self.assertEqual(unread_count(self.users[1].id), 1)
+        self.assertNotEqual(get_data_version(self.users[0].id, NOTIFICATIONS_SCOPE), version)
+        events = [(call.args[0], call.args[1]) for call in mock_publish.call_args_list]
+        self.assertEqual(events.count((self.users[0].id, 'notification')), 2)
+        self.assertEqual(events.count((self.users[0].id, 'unread_count')), 1)
+
+    def test_users_without_email_notifications_get_no_email(self):
+        self.users[0].email_notifications = False
+        self.users[0].save()
+        delivery.notify([self.entry(self.users[0])])
+
+        self.assertEqual(Notification.objects.count(), 1)
+        self.assertFalse(QueuedEmail.objects.exists())
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_batches_share_one_connection(self):
+        delivery.notify([self.entry(user, f'Mail {i}') for i in range(2) for user in self.users])
+
+        with patch('notifications.delivery.get_connection', wraps=get_connection) as mock_connection:
+            self.assertEqual(delivery.send_queued_emails(), 6)
+        self.assertEqual(mock_connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 6)
+        self.assertEqual(mail.outbox[0].to, ['user0@example.com'])
+        self.assertFalse(QueuedEmail.objects.filter(sent_at__isnull=True).exists())
+
+        # Sent emails are not sent again
+        self.assertEqual(delivery.send_queued_emails(), 0)
+        self.assertEqual(len(mail.outbox), 6)
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=2)
+    def test_failed_emails_are_retried(self):
+        delivery.notify([self.entry(user) for user in self.users])
+        send_messages = EmailBackend.send_messages
+
+        def fail_for_user1(backend, messages):
+            if messages[0].to == ['user1@example.com']:
+                raise ConnectionError('Mailbox unavailable')
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', fail_for_user1):
+            self.assertEqual(delivery.send_queued_emails(), 2)
+            failed = QueuedEmail.objects.get(user=self.users[1])
+            self.assertIsNone(failed.sent_at)
+            self.assertEqual(failed.attempts, 1)
+            self.assertEqual(failed.last_error, 'Mailbox unavailable')
+
+            # Given up on after EMAIL_MAX_ATTEMPTS
+            delivery.send_queued_emails()
+            self.assertEqual(delivery.send_queued_emails(), 0)
+        self.assertEqual(QueuedEmail.objects.get(user=self.users[1]).attempts, 2)
+
+        failed.attempts = 0
+        failed.save()
+        self.assertEqual(delivery.send_queued_emails(), 1)
+        self.assertEqual([message.to for message in mail.outbox][-1], ['user1@example.com'])
+
+    def test_emails_are_claimed_before_sending(self):
+        delivery.notify([self.entry(user) for user in self.users[:2]])
+        send_messages = EmailBackend.send_messages
+        during_send = []
+
+        def send_and_flush_again(backend, messages):
+            # Another flush while this one talks to the mail server
+            during_send.append(delivery.send_queued_emails())
+            return send_messages(backend, messages)
+
+        with patch.object(EmailBackend, 'send_messages', send_and_flush_again):
+            self.assertEqual(delivery.send_queued_emails(), 2)
+        self.assertEqual(during_send, [0, 0])
+        self.assertEqual(len(mail.outbox), 2)
+
+    @override_settings(EMAIL_CLAIM_TIMEOUT=60)
+    def test_abandoned_claims_are_sent_again(self):
+        delivery.notify([self.entry(user) for user in self.users[:2]])
+        QueuedEmail.objects.filter(user=self.users[0]).update(claimed_at=timezone.now() - timedelta(minutes=5))
+        QueuedEmail.objects.filter(user=self.users[1]).update(claimed_at=timezone.now())
+        self.assertEqual(delivery.send_queued_emails(), 1)
+        self.assertEqual([message.to for message in mail.outbox], [['user0@example.com']])
+
+    def test_daily_digest(self):
+        for user in self.users[:2]:
+            user.email_frequency = 'daily'
+            user.save()
+        delivery.notify([
+            self.entry(self.users[0], 'First'),
+            self.entry(self.users[0], 'Second'),
+            self.entry(self.users[1]),
+            self.entry(self.users[2]),
+        ])
+
+        # Held for the digest, only the immediate user is mailed
+        delivery.send_queued_emails()
+        self.assertEqual([message.to for message in mail.outbox], [['user2@example.com']])
+
+        # Turning email off drops what was held
+        self.users[1].email_notifications = False
+        self.users[1].save()
+
+        self.assertEqual(delivery.send_daily_digests(), 1)
+        digest = mail.outbox[-1]
+        self.assertEqual(digest.to, ['user0@example.com'])
+        self.assertIn('2 new notifications', digest.body)
+        self.assertIn('First\nFirst message', digest.body)
+        self.assertIn('Second\nSecond message', digest.body)
+        self.assertFalse(QueuedEmail.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(delivery.send_daily_digests(), 0)
@@ -0,0 +1,118 @@
+from django.core import mail
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from notifications.tasks import check_goal_deadlines, notify_goal_deadlines
+from notifications.models import Notification
+from goals.models import Goal
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+User = get_user_model()
+
+class GoalDeadlinePipelineTest(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.users = [
+            User.objects.create_user(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(3)
+        ]
+
+    def create_goal(self, user, days, **kwargs):
+        kwargs.setdefault('title', f'Goal due in {days} days')
+        return Goal.objects.create(
+            user=user,
+            target_amount=Decimal('1000.00'),
+            deadline=self.today + timedelta(days=days),
+            **kwargs
+        )
+
+    def run_check(self):
+        with patch('notifications.tasks.notify_goal_deadlines.delay') as mock_notify:
+            check_goal_deadlines()
+        return [call.args[0] for call in mock_notify.call_args_list]
+
+    def goal_entry(self, goal):
+        return {
+            'id': goal.id,
+            'title': goal.title,
+            'deadline': goal.deadline.isoformat(),
+            'days': (goal.deadline - self.today).days,
+        }
+
+    def test_goals_are_grouped_per_user(self):
+        self.create_goal(self.users[0], 2)
+        self.create_goal(self.users[0], 6)
+        due = self.create_goal(self.users[1], 7)
+        self.create_goal(self.users[1], 8)
+        self.create_goal(self.users[1], 3, status='completed')
+        self.create_goal(self.users[2], 30)
+
+        batch, = self.run_check()
+        by_user = {entry['user_id']: entry['goals'] for entry in batch}
+        self.assertEqual(set(by_user), {self.users[0].id, self.users[1].id})
+        self.assertEqual(len(by_user[self.users[0].id]), 2)
+        self.assertEqual(by_user[self.users[1].id], [self.goal_entry(due)])
+
+    def test_goals_are_notified_once_per_deadline(self):
+        goal = self.create_goal(self.users[0], 5)
+        batch, = self.run_check()
+        # Not marked until notified: a batch lost on the way is sent again
+        self.assertEqual(self.run_check(), [batch])
+
+        notify_goal_deadlines(batch)
+        notify_goal_deadlines(batch)
+        self.assertEqual(Notification.objects.filter(user=self.users[0]).count(), 1)
+        self.assertEqual(self.run_check(), [])
+
+        goal.deadline = self.today + timedelta(days=6)
+        goal.save()
+        # A batch built for the old deadline no longer applies
+        notify_goal_deadlines(batch)
+        self.assertEqual(Notification.objects.filter(user=self.users[0]).count(), 1)
+        batch, = self.run_check()
+        notify_goal_deadlines(batch)
+        self.assertEqual(Notification.objects.filter(user=self.users[0]).count(), 2)
+
+    @override_settings(GOAL_DEADLINE_CHUNK_SIZE=4)
+    def test_chunks(self):
+        for i in range(10):
+            self.create_goal(self.users[i % 3], 5)
+        batches = self.run_check()
+        self.assertEqual([sum(len(entry['goals']) for entry in batch) for batch in batches], [4, 4, 2])
+
+    def test_query_count_does_not_grow_with_goals(self):
+        def count_queries(goals):
+            Goal.objects.all().delete()
+            for i in range(goals):
+                self.create_goal(self.users[i % 3], 5)
+            with CaptureQueriesContext(connection) as queries:
+                self.run_check()
+            return len(queries)
+
+        self.assertEqual(count_queries(3), count_queries(60))
+
+    def test_notify_sends_one_notification_per_user(self):
+        holiday = self.create_goal(self.users[0], 4, title='Holiday')
+        car = self.create_goal(self.users[0], 1, title='Car')
+        laptop = self.create_goal(self.users[1], 6, title='Laptop')
+        notify_goal_deadlines([
+            {'user_id': self.users[0].id, 'goals': [self.goal_entry(holiday), self.goal_entry(car)]},
+            {'user_id': self.users[1].id, 'goals': [self.goal_entry(laptop)]},
+        ])
+
+        self.assertEqual(len(mail.outbox), 2)
+        notification = Notification.objects.get(user=self.users[0])
+        self.assertEqual(notification.notification_type, 'GOAL_DEADLINE')
+        self.assertEqual(notification.message, "These goals are due soon:\n- 'Car' in 1 days\n- 'Holiday' in 4 days")
+        self.assertEqual(
+            Notification.objects.get(user=self.users[1]).message,
+            "Your goal 'Laptop' is due in 6 days"
+        )
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from core.testing import QueryBudgetAssertionsMixin
+from goals.models import Goal
+from notifications import counters
+from notifications.models import Notification
+from notifications.tasks import check_goal_deadlines, notify_goal_deadlines
+
+User = get_user_model()
+
+class NotificationQueryBudgetTest(QueryBudgetAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.users = []
+        self.goals = []
+        patcher = patch('notifications.tasks.notify_goal_deadlines.delay')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def populate(self, size):
+        # Other users with a goal due soon, and a notification for this one, per row
+        while len(self.users) < size:
+            index = len(self.users)
+            user = User.objects.create_user(username=f'user{index}', email=f'user{index}@example.com', password='x')
+            for days in (3, 5):
+                self.goals.append(Goal.objects.create(
+                    user=user, title=f'Goal {index}', target_amount=Decimal('100.00'),
+                    deadline=timezone.localdate() + timedelta(days=days)
+                ))
+            Notification.objects.create(
+                user=self.user, title=f'Notification {index}', message='Test', notification_type='BILL_DUE'
+            )
+            # Users without a counter yet cost a recount, once
+            counters.unread_count(user.id)
+            self.users.append(user)
+
+    def deadline_batch(self):
+        # Already notified goals are skipped, so every call starts over
+        Goal.objects.update(deadline_notified=None)
+        goals = {}
+        for goal in self.goals:
+            goals.setdefault(goal.user_id, []).append({
+                'id': goal.id, 'title': goal.title, 'deadline': goal.deadline.isoformat(),
+                'days': (goal.deadline - timezone.localdate()).days,
+            })
+        return [{'user_id': user_id, 'goals': user_goals} for user_id, user_goals in goals.items()]
+
+    def test_endpoints_and_tasks_do_not_scale_with_rows(self):
+        get = self.client.get
+        self.assertQueriesDoNotScale({
+            'notifications': lambda: get(reverse('notification-list')),
+            'unread-count': lambda: get(reverse('notification-unread-count')),
+            'check_goal_deadlines': check_goal_deadlines,
+            'notify_goal_deadlines': lambda: notify_goal_deadlines(self.deadline_batch()),
+        }, self.populate)
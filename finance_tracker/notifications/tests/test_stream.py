@@ -0,0 +1,134 @@
+import json
+import threading
+from unittest.mock import patch
+from asgiref.sync import sync_to_async
+from django.test import TestCase, AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from notifications.broadcast import InProcessBroadcaster
+from notifications.models import Notification
+from notifications.tasks import send_notification_email
+
+User = get_user_model()
+
+def parse_events(chunk):
+    events = []
+    for block in chunk.decode().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.splitlines() if line.startswith(('event', 'data')))
+        if 'event' in lines:
+            events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+class InProcessBroadcasterTest(TestCase):
+    async def test_publish_from_another_thread(self):
+        broadcaster = InProcessBroadcaster()
+        subscription = broadcaster.subscribe(1)
+        other = broadcaster.subscribe(2)
+
+        thread = threading.Thread(target=broadcaster.publish, args=(1, 'unread_count', {'unread_count': 3}))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(await subscription.get(timeout=1), ('unread_count', {'unread_count': 3}))
+        self.assertIsNone(await other.get(timeout=0.01))
+
+        await subscription.close()
+        self.assertEqual(broadcaster.subscriber_count(1), 0)
+
+class NotificationPublishTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        patcher = patch.object(InProcessBroadcaster, 'publish')
+        self.publish = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_notification(self):
+        return Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE'
+        )
+
+    def test_new_notification_is_published_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            notification = self.create_notification()
+        self.publish.assert_not_called()
+
+        for callback in callbacks:
+            callback()
+        (_, _, data), count = [call.args for call in self.publish.call_args_list]
+        self.assertEqual(data['id'], notification.id)
+        self.assertEqual(count, (self.user.id, 'unread_count', {'unread_count': 1}))
+
+    def test_notifications_from_tasks_are_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            send_notification_email(self.user.id, 'Test Notification', 'Test Message')
+        self.assertEqual(self.publish.call_args_list[0].args[1], 'notification')
+
+    def test_reading_publishes_unread_count(self):
+        notification = self.create_notification()
+        self.create_notification()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('notification-mark-read', args=[notification.id]))
+        self.publish.assert_called_with(self.user.id, 'unread_count', {'unread_count': 1})
+
+        self.client.post(reverse('notification-mark-all-read'))
+        self.publish.assert_called_with(self.user.id, 'unread_count', {'unread_count': 0})
+
+    def test_broken_backend_does_not_fail_writes(self):
+        self.publish.side_effect = ConnectionError
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_notification()
+        self.assertEqual(Notification.objects.count(), 1)
+
+@override_settings(ROOT_URLCONF='finance_tracker.asgi_urls', NOTIFICATION_STREAM_KEEPALIVE=0.05)
+class NotificationStreamTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = Token.objects.create(user=self.user)
+        Notification.objects.create(
+            user=self.user, title='Old', message='Old', notification_type='GOAL_DEADLINE'
+        )
+
+    def create_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Notification.objects.create(
+                user=self.user, title='New', message='New', notification_type='BILL_DUE'
+            )
+
+    async def test_stream_pushes_new_notifications(self):
+        response = await AsyncClient().get(
+            reverse('notification-stream'), {'token': self.token.key},
+            headers={'Accept': 'text/event-stream'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        content = response.streaming_content
+
+        self.assertEqual(parse_events(await anext(content)), [('unread_count', {'unread_count': 1})])
+        self.assertEqual(await anext(content), b': keepalive\n\n')
+
+        notification = await sync_to_async(self.create_notification)()
+        (event, data), = parse_events(await anext(content))
+        self.assertEqual((event, data['id']), ('notification', notification.id))
+        self.assertEqual(parse_events(await anext(content)), [('unread_count', {'unread_count': 2})])
+        await content.aclose()
+
+    async def test_requires_authentication(self):
+        response = await AsyncClient().get(
+            reverse('notification-stream'), headers={'Accept': 'text/event-stream'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response.content.startswith(b'event: error\n'))
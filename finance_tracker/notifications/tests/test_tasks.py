@@ -1,7 +1,8 @@
+from django.core import mail
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from notifications.tasks import send_notification_email, check_goal_deadlines
-from notifications.models import Notification
+from notifications.models import Notification, QueuedEmail
 from goals.models import Goal
 from django.utils import timezone
 from datetime import timedelta
@@ -18,24 +19,32 @@ class NotificationTasksTest(TestCase):
             password='testpass123'
         )
 
-    @patch('notifications.tasks.send_mail')
-    def test_send_notification_email(self, mock_send_mail):
-        result = send_notification_email(
+    def test_send_notification_email(self):
+        send_notification_email(
             self.user.id,
             "Test Notification",
             "Test Message"
         )
         
-        self.assertTrue(mock_send_mail.called)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
         self.assertEqual(Notification.objects.count(), 1)
         notification = Notification.objects.first()
         self.assertEqual(notification.title, "Test Notification")
         self.assertEqual(notification.user, self.user)
 
-    @patch('notifications.tasks.send_notification_email.delay')
-    def test_check_goal_deadlines(self, mock_send_notification):
+    def test_send_notification_email_sends_its_users_mail_only(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='testpass123')
+        QueuedEmail.objects.create(user=other, subject='Queued', body='Queued earlier')
+        send_notification_email(self.user.id, "Test Notification", "Test Message")
+
+        self.assertEqual([message.to for message in mail.outbox], [['test@example.com']])
+        self.assertTrue(QueuedEmail.objects.filter(user=other, sent_at__isnull=True).exists())
+
+    @patch('notifications.tasks.notify_goal_deadlines.delay')
+    def test_check_goal_deadlines(self, mock_notify):
         # Create a goal with deadline in 5 days
-        Goal.objects.create(
+        goal = Goal.objects.create(
             user=self.user,
             title='Test Goal',
             target_amount=Decimal('1000.00'),
@@ -43,4 +52,8 @@ class NotificationTasksTest(TestCase):
         )
         
         check_goal_deadlines()
-        self.assertTrue(mock_send_notification.called) 
\ No newline at end of file
+        self.assertTrue(mock_notify.called)
+        batch, = mock_notify.call_args.args
+        self.assertEqual(batch, [{'user_id': self.user.id, 'goals': [
+            {'id': goal.id, 'title': 'Test Goal', 'deadline': goal.deadline.isoformat(), 'days': 5}
+        ]}])
@@ -0,0 +1,108 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from notifications.models import Notification, UnreadCounter
+from notifications.counters import unread_count
+
+User = get_user_model()
+
+class UnreadCountTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('notification-unread-count')
+
+    def create_notification(self, **kwargs):
+        return Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE', **kwargs
+        )
+
+    def get_count(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['unread_count']
+
+    def test_counter_follows_writes(self):
+        first = self.create_notification()
+        second = self.create_notification()
+        self.create_notification(is_read=True)
+        self.assertEqual(self.get_count(), 2)
+
+        self.client.post(reverse('notification-mark-read', args=[first.id]))
+        self.assertEqual(self.get_count(), 1)
+
+        # Reading twice doesn't count twice
+        self.client.post(reverse('notification-mark-read', args=[first.id]))
+        self.assertEqual(self.get_count(), 1)
+
+        second.is_read = False
+        second.title = 'Edited'
+        second.save()
+        self.assertEqual(self.get_count(), 1)
+
+        first.is_read = False
+        first.save()
+        self.assertEqual(self.get_count(), 2)
+
+        first.delete()
+        self.assertEqual(self.get_count(), 1)
+
+        self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(self.get_count(), 0)
+
+    def test_is_a_single_row_read(self):
+        for _ in range(5):
+            self.create_notification()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_count(), 5)
+
+    def test_counter_is_created_on_first_use(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title='Test', message='Test', notification_type='BILL_DUE')
+            for _ in range(3)
+        ])
+        UnreadCounter.objects.filter(user=self.user).delete()
+        self.assertEqual(unread_count(self.user.id), 3)
+
+        self.create_notification()
+        self.assertEqual(UnreadCounter.objects.get(user=self.user).count, 4)
+
+class NotificationPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        Notification.objects.bulk_create([
+            Notification(user=self.user, title=f'Notification {i}', message='Test', notification_type='BILL_DUE')
+            for i in range(25)
+        ])
+
+    def test_pages_cover_every_notification_once(self):
+        response = self.client.get(reverse('notification-list'))
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNone(response.data['previous'])
+
+        seen = [item['id'] for item in response.data['results']]
+        response = self.client.get(response.data['next'])
+        seen += [item['id'] for item in response.data['results']]
+        self.assertIsNone(response.data['next'])
+
+        expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_page_size_and_no_count_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('notification-list'), {'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertNotIn('count', response.data)
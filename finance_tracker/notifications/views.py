@@ -1,15 +1,39 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from rest_framework import viewsets, permissions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from core.cache import bump_data_version, NOTIFICATIONS_SCOPE
+from core.authentication import QueryParamTokenAuthentication
+from core.pagination import KeysetPagination
+from core.queries import query_budget
+from core.views import ConditionalGetMixin, AsyncAPIView
+from .broadcast import get_broadcaster, publish_unread_count
+from . import counters
 from .models import Notification
+from .renderers import EventStreamRenderer, format_event
 from .serializers import NotificationSerializer
 
 # Create your views here.
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationPagination(KeysetPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+@method_decorator(query_budget(1), name='list')
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
+    conditional_scopes = (NOTIFICATIONS_SCOPE,)
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -17,9 +41,19 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['GET'], url_path='unread-count')
+    def unread_count(self, request):
+        # Read from the denormalized counter, no COUNT over the notifications
+        return Response({'unread_count': counters.unread_count(request.user.id)})
+
     @action(detail=False, methods=['POST'])
     def mark_all_read(self, request):
-        self.get_queryset().update(is_read=True)
+        with transaction.atomic():
+            self.get_queryset().filter(is_read=False).update(is_read=True)
+            # Queryset updates send no signals
+            counters.reset_unread_count(request.user.id)
+        bump_data_version(request.user.id, NOTIFICATIONS_SCOPE)
+        publish_unread_count(request.user.id)
         return Response({'status': 'success'})
 
     @action(detail=True, methods=['POST'])
@@ -29,3 +63,70 @@ class NotificationViewSet(viewsets.ModelViewSet):
         notification.save()
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
+
+class AsyncNotificationListView(ConditionalGetMixin, AsyncAPIView):
+    """Async ``notifications/`` list and create, routed by finance_tracker/asgi_urls.py."""
+    permission_classes = [permissions.IsAuthenticated]
+    conditional_scopes = (NOTIFICATIONS_SCOPE,)
+
+    async def get(self, request):
+        paginator = NotificationPagination()
+        notifications = await sync_to_async(paginator.paginate_queryset)(
+            Notification.objects.filter(user=request.user), request, self
+        )
+        return paginator.get_paginated_response(NotificationSerializer(notifications, many=True).data)
+
+    async def post(self, request):
+        return await sync_to_async(self.create)(request)
+
+    def create(self, request):
+        serializer = NotificationSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(user=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+def _unread_count(user_id):
+    try:
+        return counters.unread_count(user_id)
+    finally:
+        # A stream stays open for hours; don't hold a database connection meanwhile
+        if not connection.in_atomic_block:
+            connection.close()
+
+class NotificationStreamView(AsyncAPIView):
+    """
+    Server-sent events for the notification bell, routed by finance_tracker/asgi_urls.py.
+
+    Sends ``unread_count`` on connect and whenever it changes, and
+    ``notification`` for every new notification. Apart from reading the
+    initial count, an open stream makes no database queries.
+    """
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryParamTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    async def get(self, request):
+        response = StreamingHttpResponse(self.stream(request.user.id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Don't let nginx buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id):
+        keepalive = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+        subscription = get_broadcaster().subscribe(user_id)
+        try:
+            # Subscribe before counting so no change falls in between
+            await subscription.start()
+            count = await sync_to_async(_unread_count)(user_id)
+            yield 'retry: 5000\n\n' + format_event('unread_count', {'unread_count': count})
+
+            while True:
+                message = await subscription.get(timeout=keepalive)
+                if message is None:
+                    # Comment line, keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_event(*message)
+        finally:
+            await subscription.close()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction, Category
+from .models import Transaction, Category, MonthlyRollup, TransactionImport, RecurringTransaction
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,3 +13,24 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ('type', 'category', 'date', 'user')
     search_fields = ('description', 'user__username')
     date_hierarchy = 'date'
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('month', 'user', 'type', 'category', 'total', 'count')
+    list_filter = ('type', 'month')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'month', 'type', 'category', 'total', 'count')
+
+@admin.register(TransactionImport)
+class TransactionImportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'format', 'status', 'imported_rows', 'failed_rows', 'created_at')
+    list_filter = ('status', 'format')
+    search_fields = ('user__username',)
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ('description', 'user', 'amount', 'type', 'frequency', 'next_occurrence', 'active')
+    list_filter = ('frequency', 'type', 'active')
+    search_fields = ('description', 'user__username')
+    readonly_fields = ('next_occurrence', 'created_at', 'updated_at')
@@ -0,0 +1,300 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db.models import Sum, Count, F
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from .models import Transaction
+from . import rollups, snapshots
+
+TWO_PLACES = Decimal('0.01')
+
+
+def _parse_date_param(query_params, param):
+    value = query_params.get(param)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: 'Enter a valid date in YYYY-MM-DD format.'})
+    return parsed
+
+
+def parse_aggregate_filters(query_params, default_type=None):
+    """Read the optional aggregation filters from a request's query params."""
+    filters = {}
+
+    for param in ('start_date', 'end_date'):
+        parsed = _parse_date_param(query_params, param)
+        if parsed:
+            filters[param] = parsed
+
+    transaction_type = query_params.get('type', default_type)
+    if transaction_type:
+        if transaction_type not in ('income', 'expense'):
+            raise ValidationError({'type': 'Must be "income" or "expense".'})
+        filters['type'] = transaction_type
+
+    category_type = query_params.get('category_type')
+    if category_type:
+        if category_type not in ('income', 'expense'):
+            raise ValidationError({'category_type': 'Must be "income" or "expense".'})
+        filters['category_type'] = category_type
+
+    return filters
+
+
+def parse_comparison(query_params):
+    """
+    Read the two periods of the ``compare`` endpoint. The comparison period
+    defaults to the one just before, of the same length.
+    """
+    start_date = _parse_date_param(query_params, 'start_date')
+    end_date = _parse_date_param(query_params, 'end_date')
+    if start_date is None or end_date is None:
+        raise ValidationError({'start_date': 'start_date and end_date are required.'})
+    if end_date < start_date:
+        raise ValidationError({'end_date': 'Must not be before start_date.'})
+
+    compare_start = _parse_date_param(query_params, 'compare_start_date')
+    compare_end = _parse_date_param(query_params, 'compare_end_date')
+    if (compare_start is None) != (compare_end is None):
+        raise ValidationError({'compare_start_date': 'Give both compare_start_date and compare_end_date, or neither.'})
+    if compare_start is None:
+        compare_end = start_date - timedelta(days=1)
+        compare_start = compare_end - (end_date - start_date)
+    elif compare_end < compare_start:
+        raise ValidationError({'compare_end_date': 'Must not be before compare_start_date.'})
+
+    transaction_type = query_params.get('type', 'expense')
+    if transaction_type not in ('income', 'expense'):
+        raise ValidationError({'type': 'Must be "income" or "expense".'})
+    return (start_date, end_date), (compare_start, compare_end), transaction_type
+
+
+def _category_rows(queryset, start_date=None, end_date=None, type=None,
+                   category_type=None, include_uncategorized=True):
+    if start_date:
+        queryset = queryset.filter(date__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lte=end_date)
+    if type:
+        queryset = queryset.filter(type=type)
+    if category_type:
+        queryset = queryset.filter(category__type=category_type)
+    if not include_uncategorized:
+        queryset = queryset.filter(category__isnull=False)
+
+    return (
+        queryset
+        .order_by()
+        .values('category_id')
+        .annotate(
+            name=F('category__name'),
+            total=Sum('amount'),
+            count=Count('id'),
+        )
+        .order_by('-total', 'category_id')
+    )
+
+
+def _format_category_rows(rows):
+    return [
+        {
+            'id': row['category_id'],
+            'name': row['name'] or 'Uncategorized',
+            'total': row['total'],
+            'count': row['count'],
+            'average': (row['total'] / row['count']).quantize(TWO_PLACES),
+        }
+        for row in rows
+    ]
+
+
+def category_totals(queryset, **filters):
+    """
+    Group transactions by category in a single GROUP BY query.
+
+    Accepts the filters returned by ``parse_aggregate_filters`` plus
+    ``include_uncategorized``. Totals and averages stay ``Decimal`` so no
+    precision is lost before the response is rendered.
+    """
+    return _format_category_rows(_category_rows(queryset, **filters))
+
+
+def user_category_totals(user, **filters):
+    """``category_totals`` over all of a user's transactions, from their snapshot if enabled."""
+    if snapshots.enabled():
+        return snapshots.get_snapshot(user.id).category_totals(**filters)
+    return category_totals(Transaction.objects.filter(user=user), **filters)
+
+
+async def acategory_totals(queryset, **filters):
+    """Async version of ``category_totals``."""
+    return _format_category_rows([row async for row in _category_rows(queryset, **filters)])
+
+
+def _category_report(totals):
+    return [
+        {
+            'id': item['id'],
+            'name': item['name'],
+            'amount': item['total'],
+            'count': item['count'],
+            'average': item['average'],
+        }
+        for item in totals
+    ]
+
+
+def category_report(queryset, **filters):
+    """Response data of the ``by-category`` endpoint."""
+    return _category_report(category_totals(queryset, **filters))
+
+
+def user_category_report(user, **filters):
+    return _category_report(user_category_totals(user, **filters))
+
+
+async def acategory_report(queryset, **filters):
+    return _category_report(await acategory_totals(queryset, **filters))
+
+
+def monthly_totals(user, start_month=None):
+    """``rollups.monthly_totals``, from the user's snapshot if enabled."""
+    if snapshots.enabled():
+        return snapshots.get_snapshot(user.id).monthly_totals(start_month)
+    return rollups.monthly_totals(user, start_month=start_month)
+
+
+def build_compare_report(period_totals, category_totals, period, compare_period, type='expense'):
+    """
+    Totals of two ``(start_date, end_date)`` periods side by side, with the
+    change of each ``type`` category from ``compare_period`` to ``period``.
+
+    ``period_totals(start_date, end_date)`` and ``category_totals(**filters)``
+    read the user's data, from a snapshot or from the rollups and the ORM.
+    """
+    report = {}
+    for name, (start_date, end_date) in (('period', period), ('compare_period', compare_period)):
+        totals = period_totals(start_date, end_date)
+        report[name] = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'income': totals['income'],
+            'expense': totals['expense'],
+            'net': totals['income'] - totals['expense'],
+        }
+    report['change'] = {
+        key: report['period'][key] - report['compare_period'][key] for key in ('income', 'expense', 'net')
+    }
+
+    current = {row['id']: row for row in category_totals(start_date=period[0], end_date=period[1], type=type)}
+    previous = {
+        row['id']: row
+        for row in category_totals(start_date=compare_period[0], end_date=compare_period[1], type=type)
+    }
+    categories = []
+    for category_id in [*current, *(key for key in previous if key not in current)]:
+        amount = current[category_id]['total'] if category_id in current else Decimal('0')
+        compare_amount = previous[category_id]['total'] if category_id in previous else Decimal('0')
+        change = amount - compare_amount
+        categories.append({
+            'id': category_id,
+            'name': (current.get(category_id) or previous[category_id])['name'],
+            'amount': amount,
+            'compare_amount': compare_amount,
+            'change': change,
+            'change_percent': (change / compare_amount * 100).quantize(TWO_PLACES) if compare_amount else None,
+        })
+    report['categories'] = categories
+    return report
+
+
+def compare_report(user, period, compare_period, type='expense'):
+    """Response data of the ``compare`` endpoint, from the user's snapshot if enabled."""
+    if snapshots.enabled():
+        snapshot = snapshots.get_snapshot(user.id)
+        return build_compare_report(snapshot.period_totals, snapshot.category_totals, period, compare_period, type)
+    transactions = Transaction.objects.filter(user=user)
+    return build_compare_report(
+        lambda start_date, end_date: rollups.period_totals(user, start_date, end_date),
+        lambda **filters: category_totals(transactions, **filters),
+        period, compare_period, type,
+    )
+
+
+def _summary_report(months):
+    now = timezone.now()
+    current_month = now.date().replace(day=1)
+    prev_month = (current_month - timedelta(days=1)).replace(day=1)
+    empty = {'income': Decimal('0'), 'expense': Decimal('0')}
+
+    # Calculate total income and expenses
+    total_income = sum((month['income'] for month in months.values()), Decimal('0'))
+    total_expenses = sum((month['expense'] for month in months.values()), Decimal('0'))
+
+    # Calculate monthly totals
+    monthly_income = months.get(current_month, empty)['income']
+    monthly_expenses = months.get(current_month, empty)['expense']
+
+    # Calculate previous month's data for comparison
+    prev_month_data = months.get(prev_month, empty)
+    prev_month_total = prev_month_data['income'] - prev_month_data['expense']
+    current_month_total = monthly_income - monthly_expenses
+    monthly_change = ((current_month_total - prev_month_total) / prev_month_total * 100) if prev_month_total != 0 else 0
+
+    return {
+        'total_income': float(total_income),
+        'total_expenses': float(total_expenses),
+        'balance': float(total_income - total_expenses),
+        'monthly_income': float(monthly_income),
+        'monthly_expenses': float(monthly_expenses),
+        'monthly_change': float(monthly_change),
+        'current_month': {
+            'name': now.strftime('%B'),
+            'income': float(monthly_income),
+            'expenses': float(monthly_expenses)
+        },
+        'previous_month': {
+            'name': prev_month.strftime('%B'),
+            'total': float(prev_month_total)
+        }
+    }
+
+
+def summary_report(user):
+    """Response data of the ``summary`` endpoint."""
+    return _summary_report(monthly_totals(user))
+
+
+async def asummary_report(user):
+    return _summary_report(await rollups.amonthly_totals(user))
+
+
+def _trends_start():
+    # The last 6 months
+    return timezone.localdate() - timedelta(days=180)
+
+
+def _trends_report(months):
+    return [
+        {
+            'date': month.strftime('%Y-%m'),
+            'income': float(totals['income']),
+            'expense': float(totals['expense'])
+        }
+        for month, totals in sorted(months.items())
+    ]
+
+
+def trends_report(user):
+    """Response data of the ``trends`` endpoint: the last 6 months per type."""
+    return _trends_report(monthly_totals(user, start_month=_trends_start()))
+
+
+async def atrends_report(user):
+    return _trends_report(await rollups.amonthly_totals(user, start_month=_trends_start()))
@@ -0,0 +1,270 @@
+import codecs
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from core.cache import bump_data_version, TRANSACTIONS_SCOPE
+from .models import Transaction, Category
+from . import rollups
+
+BATCH_SIZE = 500
+MAX_ERRORS = 1000
+MAX_AMOUNT = Decimal('99999999.99')
+READ_CHUNK_SIZE = 64 * 1024
+
+CSV_DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%d.%m.%Y', '%Y/%m/%d')
+QIF_DATE_FORMATS = ('%m/%d/%Y', '%m/%d/%y', '%m-%d-%Y', '%m-%d-%y', '%d/%m/%Y', '%Y-%m-%d')
+
+
+class RowError(ValueError):
+    pass
+
+
+def _text_stream(fileobj):
+    """Decode a binary upload lazily, without reading it all into memory."""
+    return io.TextIOWrapper(fileobj, encoding='utf-8-sig', errors='replace', newline='')
+
+
+def parse_csv(fileobj):
+    """
+    Yield ``(row_number, fields)`` from a CSV with a header row.
+
+    Recognised columns: date, description, amount, and optionally type and
+    category. Without a type column the sign of the amount decides it.
+    """
+    reader = csv.DictReader(_text_stream(fileobj))
+    if reader.fieldnames:
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    for row in reader:
+        yield reader.line_num, {
+            'date': row.get('date'),
+            'description': row.get('description') or row.get('payee') or row.get('memo'),
+            'amount': row.get('amount'),
+            'type': row.get('type'),
+            'category': row.get('category'),
+            'date_formats': CSV_DATE_FORMATS,
+        }
+
+
+def _ofx_tokens(fileobj):
+    """Yield ``(tag, value)`` pairs from an OFX (SGML or XML) file chunk by chunk."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    buffer = ''
+    while True:
+        chunk = fileobj.read(READ_CHUNK_SIZE)
+        buffer += decoder.decode(chunk or b'', final=not chunk)
+        parts = buffer.split('<')
+        if chunk:
+            # The last part may be cut off mid-tag; keep it for the next chunk
+            buffer = parts.pop()
+        for part in parts:
+            if '>' not in part:
+                continue
+            tag, _, value = part.partition('>')
+            yield tag.strip().upper(), value.strip()
+        if not chunk:
+            return
+
+
+def parse_ofx(fileobj):
+    """Yield ``(transaction_number, fields)`` for each STMTTRN block of an OFX file."""
+    number = 0
+    current = None
+    for tag, value in _ofx_tokens(fileobj):
+        if tag == 'STMTTRN':
+            current = {}
+        elif tag == '/STMTTRN' and current is not None:
+            number += 1
+            yield number, {
+                'date': current.get('DTPOSTED', '')[:8],
+                'description': current.get('NAME') or current.get('MEMO'),
+                'amount': current.get('TRNAMT'),
+                'type': None,
+                'category': None,
+                'date_formats': ('%Y%m%d',),
+            }
+            current = None
+        elif current is not None and not tag.startswith('/'):
+            current[tag] = value
+
+
+def parse_qif(fileobj):
+    """Yield ``(line_number, fields)`` for each ``^``-terminated QIF record."""
+    record = {}
+    start_line = None
+    for line_number, line in enumerate(_text_stream(fileobj), start=1):
+        line = line.rstrip('\r\n')
+        if not line or line.startswith('!'):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if record:
+                yield start_line, {
+                    'date': record.get('D', '').replace("'", '/').replace(' ', ''),
+                    'description': record.get('P') or record.get('M'),
+                    'amount': record.get('T') or record.get('U'),
+                    'type': None,
+                    'category': record.get('L', '').strip('[]') or None,
+                    'date_formats': QIF_DATE_FORMATS,
+                }
+            record = {}
+            start_line = None
+            continue
+        if start_line is None:
+            start_line = line_number
+        record.setdefault(code, value)
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'ofx': parse_ofx,
+    'qif': parse_qif,
+}
+
+
+def _parse_date(value, formats):
+    value = (value or '').strip()
+    for date_format in formats:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise RowError(f'Invalid date "{value}"')
+
+
+def validate_row(fields):
+    """Turn one parsed row into clean values or raise ``RowError``."""
+    date = _parse_date(fields['date'], fields['date_formats'])
+
+    raw_amount = (fields['amount'] or '').strip().replace(',', '').replace('$', '')
+    try:
+        amount = Decimal(raw_amount)
+    except InvalidOperation:
+        raise RowError(f'Invalid amount "{fields["amount"]}"')
+    if not amount.is_finite():
+        raise RowError(f'Invalid amount "{fields["amount"]}"')
+
+    transaction_type = (fields['type'] or '').strip().lower()
+    if transaction_type:
+        if transaction_type not in ('income', 'expense'):
+            raise RowError(f'Invalid type "{fields["type"]}"')
+    else:
+        transaction_type = 'expense' if amount < 0 else 'income'
+
+    amount = abs(amount)
+    if amount > MAX_AMOUNT:
+        raise RowError(f'Amount {amount} is too large')
+    amount = amount.quantize(Decimal('0.01'))
+
+    description = (fields['description'] or '').strip()
+    if not description:
+        raise RowError('Missing description')
+
+    category = (fields['category'] or '').strip() or None
+    return {
+        'date': date,
+        'description': description[:255],
+        'amount': amount,
+        'type': transaction_type,
+        'category': category[:50] if category else None,
+    }
+
+
+class TransactionImporter:
+    """
+    Stream rows from an uploaded file into ``Transaction`` rows.
+
+    Rows are validated and written ``batch_size`` at a time with
+    ``bulk_create``. Category names are resolved through a cache that is
+    filled with the user's categories once and extended as new ones are
+    created. ``on_progress`` is called after every batch.
+    """
+
+    def __init__(self, user, format, batch_size=BATCH_SIZE, on_progress=None):
+        self.user = user
+        self.parser = PARSERS[format]
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+        self.processed_rows = 0
+        self.imported_rows = 0
+        self.failed_rows = 0
+        self.created_categories = 0
+        self.errors = []
+        self._categories = None
+
+    def run(self, fileobj):
+        batch = []
+        for row_number, fields in self.parser(fileobj):
+            batch.append((row_number, fields))
+            if len(batch) >= self.batch_size:
+                self.process_batch(batch)
+                batch = []
+        if batch:
+            self.process_batch(batch)
+        return self
+
+    def process_batch(self, batch):
+        valid = []
+        for row_number, fields in batch:
+            try:
+                valid.append(validate_row(fields))
+            except RowError as e:
+                self.add_error(row_number, str(e))
+
+        with transaction.atomic():
+            category_ids = self.resolve_categories(valid)
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    user=self.user,
+                    date=row['date'],
+                    description=row['description'],
+                    amount=row['amount'],
+                    type=row['type'],
+                    category_id=self.category_id(category_ids, row),
+                )
+                for row in valid
+            ])
+            # bulk_create skips the signals that keep the rollups and cache current
+            rollups.apply_transactions(transactions)
+            bump_data_version(self.user.id)
+            bump_data_version(self.user.id, TRANSACTIONS_SCOPE)
+
+        self.processed_rows += len(batch)
+        self.imported_rows += len(transactions)
+        if self.on_progress:
+            self.on_progress(self)
+
+    def resolve_categories(self, rows):
+        if self._categories is None:
+            self._categories = {
+                (name.lower(), type): pk
+                for pk, name, type in Category.objects.filter(user=self.user).values_list('id', 'name', 'type')
+            }
+
+        missing = {}
+        for row in rows:
+            if row['category']:
+                key = (row['category'].lower(), row['type'])
+                if key not in self._categories and key not in missing:
+                    missing[key] = Category(user=self.user, name=row['category'], type=row['type'])
+        if missing:
+            for key, category in zip(missing, Category.objects.bulk_create(missing.values())):
+                self._categories[key] = category.id
+            self.created_categories += len(missing)
+        return self._categories
+
+    def category_id(self, category_ids, row):
+        if not row['category']:
+            return None
+        return category_ids[(row['category'].lower(), row['type'])]
+
+    def add_error(self, row_number, message):
+        self.failed_rows += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'row': row_number, 'error': message})
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return extension if extension in PARSERS else None
@@ -0,0 +1,83 @@
+import statistics
+import time
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from transactions import rollups
+from transactions.aggregates import build_compare_report, category_totals
+from transactions.models import Transaction
+from transactions.snapshots import TransactionSnapshot, get_snapshot, snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the analytics reports of one user computed by the ORM and rollups "
+        "against the same reports from the user's columnar snapshot"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='User whose transactions the reports read')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per report and path')
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist")
+
+        today = timezone.localdate()
+        period = (today - timedelta(days=89), today)
+        compare_period = (period[0] - timedelta(days=90), period[0] - timedelta(days=1))
+        transactions = Transaction.objects.filter(user=user)
+
+        def orm_compare():
+            build_compare_report(
+                lambda start, end: rollups.period_totals(user, start, end),
+                lambda **filters: category_totals(transactions, **filters),
+                period, compare_period,
+            )
+
+        reports = (
+            ('summary', lambda: rollups.monthly_totals(user), lambda s: s.monthly_totals()),
+            (
+                'by-category',
+                lambda: category_totals(transactions, type='expense'),
+                lambda s: s.category_totals(type='expense'),
+            ),
+            (
+                'by-category, last 90 days',
+                lambda: category_totals(transactions, start_date=period[0], end_date=period[1]),
+                lambda s: s.category_totals(start_date=period[0], end_date=period[1]),
+            ),
+            (
+                'compare',
+                orm_compare,
+                lambda s: build_compare_report(s.period_totals, s.category_totals, period, compare_period),
+            ),
+        )
+
+        snapshots.discard(user.id)
+        load = self.measure(lambda: TransactionSnapshot.load(user.id, 0), options['repeat'])
+        snapshot = get_snapshot(user.id)
+        self.stdout.write(
+            f'{len(snapshot)} transactions, snapshot of {snapshot.nbytes / 1024:.1f} KiB '
+            f'loaded in {load * 1000:.2f} ms'
+        )
+        self.stdout.write(f"{'report':<28}{'ORM ms':>10}{'snapshot ms':>14}{'speedup':>10}")
+        for name, orm, columnar in reports:
+            orm_time = self.measure(orm, options['repeat'])
+            snapshot_time = self.measure(lambda: columnar(snapshot), options['repeat'])
+            self.stdout.write(
+                f'{name:<28}{orm_time * 1000:>10.2f}{snapshot_time * 1000:>14.2f}'
+                f'{orm_time / snapshot_time:>9.1f}x'
+            )
+
+    def measure(self, compute, repeat):
+        """Median seconds of one call."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
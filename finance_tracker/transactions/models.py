@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from core.models import TimeStampedModel
 
 class Category(TimeStampedModel):
@@ -32,6 +33,127 @@ class Transaction(TimeStampedModel):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     type = models.CharField(max_length=7, choices=TRANSACTION_TYPES)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
+    # Maintained by a database trigger on PostgreSQL, see transactions.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Set on transactions materialized from a schedule, with the occurrence they stand for
+    recurring = models.ForeignKey(
+        'RecurringTransaction', on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions'
+    )
+    occurrence = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            # Re-runs and overlapping workers can't materialize an occurrence twice
+            models.UniqueConstraint(fields=['recurring', 'occurrence'], name='unique_recurring_occurrence'),
+        ]
+        indexes = [
+            # List view, date-range filters and trends: WHERE user ORDER BY -date
+            models.Index(fields=['user', '-date', '-id'], name='txn_user_date_idx'),
+            # Per-type totals and the type filter on the list view
+            models.Index(fields=['user', 'type', '-date'], name='txn_user_type_date_idx'),
+            # Category filter and by-category grouping
+            models.Index(fields=['user', 'category', '-date'], name='txn_user_category_idx'),
+        ]
 
     def __str__(self):
         return f"{self.type} - {self.amount} - {self.date}"
+
+class RecurringTransaction(TimeStampedModel):
+    """
+    A transaction repeated on an rrule-style schedule (see transactions.recurring).
+
+    ``next_occurrence`` is the first occurrence not materialized yet, or
+    None once the schedule has ended.
+    """
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+        ('yearly', 'Yearly'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    description = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPES)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    frequency = models.CharField(max_length=7, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)
+    # rrule BYWEEKDAY (0 is Monday), BYMONTHDAY (-1 is the last day) and BYSETPOS;
+    # the last business day of the month is weekdays 0-4 with set_position -1
+    weekdays = models.JSONField(default=list, blank=True)
+    month_day = models.SmallIntegerField(null=True, blank=True)
+    set_position = models.SmallIntegerField(null=True, blank=True)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    active = models.BooleanField(default=True)
+    next_occurrence = models.DateField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # The materialization job: WHERE active AND next_occurrence <= today
+            models.Index(fields=['next_occurrence'], condition=models.Q(active=True), name='recurring_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.description} ({self.frequency})"
+
+class MonthlyRollup(models.Model):
+    """Pre-summed totals per user, month, type and category."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    month = models.DateField()  # First day of the month
+    type = models.CharField(max_length=7, choices=Transaction.TRANSACTION_TYPES)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True)
+    total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'type', 'category'],
+                condition=models.Q(category__isnull=False),
+                name='unique_monthly_rollup',
+            ),
+            # NULLs are distinct in unique constraints on SQLite and PostgreSQL < 15,
+            # so uncategorized rows get a partial constraint of their own
+            models.UniqueConstraint(
+                fields=['user', 'month', 'type'],
+                condition=models.Q(category__isnull=True),
+                name='unique_uncategorized_monthly_rollup',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'month'], name='rollup_user_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.month:%Y-%m} - {self.type} - {self.total}"
+
+class TransactionImport(TimeStampedModel):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ofx', 'OFX'),
+        ('qif', 'QIF'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    file = models.FileField(upload_to='imports/', null=True, blank=True)
+    format = models.CharField(max_length=3, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    processed_rows = models.PositiveIntegerField(default=0)
+    imported_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+    created_categories = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.format} import {self.id} ({self.status})"
@@ -0,0 +1,177 @@
+"""
+Recurring transactions: schedule rules and materialization.
+
+A schedule is turned into a ``dateutil.rrule`` from its frequency, interval
+and optional BYWEEKDAY/BYMONTHDAY/BYSETPOS parts. ``materialize`` writes the
+transactions of every due occurrence with ``bulk_create``, a chunk of
+schedules at a time.
+"""
+from datetime import datetime, time
+from dateutil import rrule
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from core.cache import bump_data_version, TRANSACTIONS_SCOPE
+from .models import RecurringTransaction, Transaction
+from . import rollups
+
+FREQUENCIES = {
+    'daily': rrule.DAILY,
+    'weekly': rrule.WEEKLY,
+    'monthly': rrule.MONTHLY,
+    'yearly': rrule.YEARLY,
+}
+# A schedule far behind (a start date in the past) catches up this many occurrences per run
+MAX_OCCURRENCES_PER_RUN = 366
+
+
+def _datetime(value):
+    return datetime.combine(value, time())
+
+
+def rule(schedule):
+    """The ``rrule`` of a schedule's occurrences."""
+    return rrule.rrule(
+        FREQUENCIES[schedule.frequency],
+        dtstart=_datetime(schedule.start_date),
+        interval=schedule.interval,
+        byweekday=schedule.weekdays or None,
+        bymonthday=schedule.month_day,
+        bysetpos=schedule.set_position,
+        until=_datetime(schedule.end_date) if schedule.end_date else None,
+    )
+
+
+def first_occurrence(schedule, after=None):
+    """First occurrence on or after ``after`` (the start date by default), or None."""
+    found = rule(schedule).after(_datetime(after or schedule.start_date), inc=True)
+    return found.date() if found else None
+
+
+def pending_occurrence(schedule, since=None):
+    """
+    The ``next_occurrence`` of a new or edited schedule: its first occurrence
+    after those already materialized, and on or after ``since`` if given.
+    """
+    after, inclusive = schedule.start_date, True
+    if since is not None and since > after:
+        after = since
+    if schedule.pk:
+        last = schedule.transactions.aggregate(last=Max('occurrence'))['last']
+        if last is not None and last >= after:
+            after, inclusive = last, False
+    found = rule(schedule).after(_datetime(after), inc=inclusive)
+    return found.date() if found else None
+
+
+def due_occurrences(schedule, today, limit=MAX_OCCURRENCES_PER_RUN):
+    """
+    Occurrences from ``next_occurrence`` up to ``today``, at most ``limit``,
+    and the next occurrence after them (None once the schedule has ended).
+    """
+    occurrences = []
+    following = None
+    for found in rule(schedule).xafter(_datetime(schedule.next_occurrence), inc=True):
+        found = found.date()
+        if found > today or len(occurrences) >= limit:
+            following = found
+            break
+        occurrences.append(found)
+    return occurrences, following
+
+
+def _existing_occurrences(schedules, since):
+    return set(
+        Transaction.objects
+        .filter(recurring__in=schedules, occurrence__gte=since)
+        .values_list('recurring_id', 'occurrence')
+    )
+
+
+def _insert_new(rows, schedules):
+    """
+    Insert the ``(schedule, occurrence)`` rows not materialized yet and
+    return their transactions.
+
+    Normally all of them: the schedules are locked and their next occurrence
+    moves with the rows. Covers a next_occurrence set back by hand, and a
+    row committed by another writer meanwhile, which makes the insert fail
+    and be retried without it. Not ``ignore_conflicts``: the rollups need
+    to know which rows were actually inserted.
+    """
+    since = min(occurrence for _, occurrence in rows)
+    existing = _existing_occurrences(schedules, since)
+    while True:
+        try:
+            with transaction.atomic():
+                return Transaction.objects.bulk_create([
+                    Transaction(
+                        user_id=schedule.user_id,
+                        date=occurrence,
+                        description=schedule.description,
+                        amount=schedule.amount,
+                        type=schedule.type,
+                        category_id=schedule.category_id,
+                        recurring=schedule,
+                        occurrence=occurrence,
+                    )
+                    for schedule, occurrence in rows
+                    if (schedule.id, occurrence) not in existing
+                ], batch_size=1000)
+        except IntegrityError:
+            # The conflicting row is committed by now; anything else isn't ours to retry
+            found = _existing_occurrences(schedules, since)
+            if found == existing:
+                raise
+            existing = found
+
+
+def _materialize_chunk(schedules, today):
+    rows = []
+    for schedule in schedules:
+        occurrences, schedule.next_occurrence = due_occurrences(schedule, today)
+        rows.extend((schedule, occurrence) for occurrence in occurrences)
+    if not rows:
+        return []
+
+    transactions = _insert_new(rows, schedules)
+    RecurringTransaction.objects.bulk_update(schedules, ['next_occurrence'])
+
+    # bulk_create skips the signals that keep the rollups current
+    rollups.apply_transactions(transactions)
+    return transactions
+
+
+def materialize(schedules=None, today=None, chunk_size=None):
+    """
+    Create the transactions of every occurrence due by ``today``.
+
+    Due schedules are processed ``RECURRING_CHUNK_SIZE`` at a time, each
+    chunk in one transaction that locks its schedules, inserts their rows
+    with ``bulk_create`` and moves their next occurrence past them. Schedules
+    locked by another worker are skipped, and occurrences already
+    materialized (the unique (schedule, occurrence) constraint holds one
+    row each) are skipped, so runs can overlap and repeat. Returns the number of transactions created.
+    """
+    today = today or timezone.localdate()
+    chunk_size = chunk_size or getattr(settings, 'RECURRING_CHUNK_SIZE', 500)
+    if schedules is None:
+        schedules = RecurringTransaction.objects.all()
+    due = schedules.filter(active=True, next_occurrence__lte=today).order_by('id')
+
+    created = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            chunk = list(due.filter(id__gt=last_id).select_for_update(skip_locked=True)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            transactions = _materialize_chunk(chunk, today)
+        # After commit, so a concurrent read can't cache the old rows under the new version
+        for user_id in {item.user_id for item in transactions}:
+            bump_data_version(user_id)
+            bump_data_version(user_id, TRANSACTIONS_SCOPE)
+        created += len(transactions)
+    return created
@@ -0,0 +1,186 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, F, Q
+from django.db.models.functions import TruncMonth
+from django.dispatch import Signal
+from django.utils.dateparse import parse_date
+from .models import Transaction, MonthlyRollup
+
+# Sent after apply_delta changed a rollup row, with user_id, month, type and
+# category_id. Receivers can read the new total instead of rescanning the month.
+rollup_changed = Signal()
+
+
+def month_start(value):
+    if isinstance(value, str):
+        value = parse_date(value)
+    return value.replace(day=1)
+
+
+def next_month(value):
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def apply_delta(user_id, month, type, category_id, amount, count):
+    """Add ``amount``/``count`` to one rollup row, creating it if needed."""
+    lookup = {
+        'user_id': user_id,
+        'month': month_start(month),
+        'type': type,
+        'category_id': category_id,
+    }
+    amount = Decimal(str(amount))
+    rollups = MonthlyRollup.objects.filter(**lookup)
+
+    updated = rollups.update(total=F('total') + amount, count=F('count') + count)
+    if not updated:
+        if count <= 0:
+            # Nothing to subtract from; the rollups were never built for this key
+            return
+        try:
+            with transaction.atomic():
+                MonthlyRollup.objects.create(total=amount, count=count, **lookup)
+        except IntegrityError:
+            # Another writer created the row first
+            rollups.update(total=F('total') + amount, count=F('count') + count)
+    elif count < 0:
+        rollups.filter(count=0).delete()
+    rollup_changed.send(sender=MonthlyRollup, **lookup)
+
+
+def apply_transactions(transactions, sign=1):
+    """
+    Fold many transactions into the rollups with one update per affected row.
+
+    Use this after ``bulk_create``/bulk deletes, which bypass model signals.
+    """
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for item in transactions:
+        key = (item.user_id, month_start(item.date), item.type, item.category_id)
+        deltas[key][0] += Decimal(str(item.amount)) * sign
+        deltas[key][1] += sign
+
+    for (user_id, month, type, category_id), (amount, count) in deltas.items():
+        apply_delta(user_id, month, type, category_id, amount, count)
+
+
+def reassign_category(category):
+    """Fold a category's rollups into the uncategorized rows before it is deleted."""
+    rollups = MonthlyRollup.objects.filter(category=category)
+    for row in rollups:
+        apply_delta(row.user_id, row.month, row.type, None, row.total, row.count)
+    rollups.delete()
+
+
+def rebuild(user_ids=None):
+    """Recompute rollups from the raw transactions. Returns the number of rows written."""
+    transactions = Transaction.objects.all()
+    rollups = MonthlyRollup.objects.all()
+    if user_ids is not None:
+        transactions = transactions.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    rows = (
+        transactions
+        .annotate(month=TruncMonth('date'))
+        .values('user_id', 'month', 'type', 'category_id')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        rollups.delete()
+        created = MonthlyRollup.objects.bulk_create(
+            (MonthlyRollup(**row) for row in rows.iterator(chunk_size=2000)),
+            batch_size=1000,
+        )
+    return len(created)
+
+
+def _monthly_rows(user, start_month=None, end_month=None):
+    rollups = MonthlyRollup.objects.filter(user=user)
+    if start_month:
+        rollups = rollups.filter(month__gte=month_start(start_month))
+    if end_month:
+        rollups = rollups.filter(month__lte=month_start(end_month))
+    return rollups.values('month', 'type').annotate(total=Sum('total')).order_by('month')
+
+
+def _fold_months(rows):
+    months = defaultdict(lambda: {'income': Decimal('0'), 'expense': Decimal('0')})
+    for row in rows:
+        months[row['month']][row['type']] = row['total']
+    return dict(months)
+
+
+def monthly_totals(user, start_month=None, end_month=None):
+    """
+    Return ``{month: {'income': Decimal, 'expense': Decimal}}`` from the rollups.
+    """
+    return _fold_months(_monthly_rows(user, start_month, end_month))
+
+
+async def amonthly_totals(user, start_month=None, end_month=None):
+    """Async version of ``monthly_totals``."""
+    return _fold_months([row async for row in _monthly_rows(user, start_month, end_month)])
+
+
+def _period_plan(user, start_date, end_date):
+    """
+    Split a date range into whole months, read from the rollups, and the
+    partial months at either end, summed from raw transactions.
+    """
+    first_full = month_start(start_date)
+    if first_full != start_date:
+        first_full = next_month(first_full)
+    after_last_full = month_start(end_date + timedelta(days=1))
+
+    if first_full < after_last_full:
+        full_months = (first_full, after_last_full - timedelta(days=1))
+        fringe = (
+            Q(date__gte=start_date, date__lt=first_full)
+            | Q(date__gte=after_last_full, date__lte=end_date)
+        )
+    else:
+        full_months = None
+        fringe = Q(date__gte=start_date, date__lte=end_date)
+
+    fringe_rows = (
+        Transaction.objects
+        .filter(fringe, user=user)
+        .values('type')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    return full_months, fringe_rows
+
+
+def _add_period(months, fringe_rows):
+    totals = {'income': Decimal('0'), 'expense': Decimal('0')}
+    for month in months.values():
+        totals['income'] += month['income']
+        totals['expense'] += month['expense']
+    for row in fringe_rows:
+        totals[row['type']] += row['total']
+    return totals
+
+
+def period_totals(user, start_date, end_date):
+    """
+    Income/expense totals between two dates (inclusive).
+
+    Whole months come from the rollups; only the partial months at either end
+    of the range are summed from raw transactions.
+    """
+    full_months, fringe_rows = _period_plan(user, start_date, end_date)
+    months = monthly_totals(user, *full_months) if full_months else {}
+    return _add_period(months, fringe_rows)
+
+
+async def aperiod_totals(user, start_date, end_date):
+    """Async version of ``period_totals``."""
+    full_months, fringe_rows = _period_plan(user, start_date, end_date)
+    months = await amonthly_totals(user, *full_months) if full_months else {}
+    return _add_period(months, [row async for row in fringe_rows])
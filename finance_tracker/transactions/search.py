@@ -0,0 +1,103 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+from rest_framework import filters
+
+SEARCH_CONFIG = 'english'
+
+_trigram_support = {}
+
+
+def has_trigram_support(using):
+    """Whether the pg_trgm extension is installed on the ``using`` database."""
+    if using not in _trigram_support:
+        with connections[using].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_support[using] = cursor.fetchone() is not None
+    return _trigram_support[using]
+
+
+def install_search_support(using='default', **kwargs):
+    """
+    Create the PostgreSQL-only pieces of transaction search after ``migrate``.
+
+    Kept out of the model so SQLite test databases can still be created:
+    a trigger keeps ``search_vector`` in sync on every insert and description
+    change (bulk_create and queryset updates included), with a GIN index over
+    it, and a trigram GIN index on the description when pg_trgm is available.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic(using=using):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError:
+            # Not installed on the server or no permission; search still works without typo matching
+            pass
+        _trigram_support.pop(using, None)
+
+        cursor.execute('DROP TRIGGER IF EXISTS txn_search_vector_update ON transactions_transaction')
+        cursor.execute(
+            "CREATE TRIGGER txn_search_vector_update "
+            "BEFORE INSERT OR UPDATE OF description ON transactions_transaction "
+            "FOR EACH ROW EXECUTE FUNCTION "
+            "tsvector_update_trigger(search_vector, 'pg_catalog.english', description)"
+        )
+        cursor.execute(
+            "UPDATE transactions_transaction "
+            "SET search_vector = to_tsvector('pg_catalog.english', description) "
+            "WHERE search_vector IS NULL"
+        )
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS txn_search_vector_idx '
+            'ON transactions_transaction USING gin (search_vector)'
+        )
+    if has_trigram_support(using):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS txn_description_trgm_idx '
+                'ON transactions_transaction USING gin (description gin_trgm_ops)'
+            )
+
+
+class TransactionSearchFilter(filters.SearchFilter):
+    """
+    Ranked full-text search over transaction descriptions.
+
+    On PostgreSQL the terms are matched against the indexed ``search_vector``
+    (stemmed, websearch syntax) and, when pg_trgm is installed, by trigram
+    similarity so typos and merchant-name variants still match. Other
+    databases fall back to DRF's ``icontains`` search.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        text = ' '.join(terms)
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        condition = Q(search_vector=query)
+        rank = SearchRank(F('search_vector'), query)
+        if has_trigram_support(queryset.db):
+            condition |= Q(description__trigram_similar=text)
+            rank = rank + TrigramSimilarity('description', text)
+
+        # double precision so the rank survives a round trip through a cursor
+        return queryset.annotate(search_rank=Cast(rank, FloatField())).filter(condition)
+
+
+class RankedOrderingFilter(filters.OrderingFilter):
+    """Order search results by relevance unless the client asks for an ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        explicit = request.query_params.get(self.ordering_param)
+        if not explicit and 'search_rank' in queryset.query.annotations:
+            return ['-search_rank', *(self.get_default_ordering(view) or [])]
+        return super().get_ordering(request, queryset, view)
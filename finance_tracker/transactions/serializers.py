@@ -1,5 +1,9 @@
+from decimal import Decimal
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Transaction, Category
+from .models import Transaction, Category, TransactionImport, RecurringTransaction
+from .importers import detect_format
+from . import recurring
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,5 +17,129 @@ class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
         fields = ('id', 'date', 'description', 'amount', 'type', 
-                 'category', 'category_name', 'created_at')
-        read_only_fields = ('id', 'created_at') 
\ No newline at end of file
+                 'category', 'category_name', 'recurring', 'created_at')
+        read_only_fields = ('id', 'recurring', 'created_at')
+
+# Shared field instances used only for their value formatting
+_amount_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+_created_at_field = serializers.DateTimeField()
+
+class TransactionListSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path for list responses.
+
+    Produces the same output as ``TransactionSerializer`` without building
+    and running a field object per attribute for every row. Expects the
+    queryset to ``select_related('category')``.
+    """
+
+    def to_representation(self, instance):
+        data = {
+            'id': instance.id,
+            'date': instance.date.isoformat(),
+            'description': instance.description,
+            'amount': _amount_field.to_representation(instance.amount),
+            'type': instance.type,
+            'category': instance.category_id,
+        }
+        # Like the model serializer, leave category_name out when there is no category
+        if instance.category is not None:
+            data['category_name'] = instance.category.name
+        data['recurring'] = instance.recurring_id
+        data['created_at'] = _created_at_field.to_representation(instance.created_at)
+        return data
+
+class TransactionImportSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True)
+    format = serializers.ChoiceField(choices=TransactionImport.FORMAT_CHOICES, required=False)
+
+    class Meta:
+        model = TransactionImport
+        fields = ('id', 'file', 'format', 'status', 'processed_rows', 'imported_rows',
+                 'failed_rows', 'created_categories', 'errors', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'status', 'processed_rows', 'imported_rows', 'failed_rows',
+                           'created_categories', 'errors', 'created_at', 'updated_at')
+
+    def validate(self, data):
+        if not data.get('format'):
+            data['format'] = detect_format(data['file'].name)
+            if not data['format']:
+                raise serializers.ValidationError(
+                    {'format': 'Could not detect the file format. Use csv, ofx or qif.'}
+                )
+        return data
+
+class RecurringTransactionSerializer(serializers.ModelSerializer):
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), required=False, max_length=7
+    )
+
+    class Meta:
+        model = RecurringTransaction
+        fields = ('id', 'description', 'amount', 'type', 'category', 'category_name',
+                 'frequency', 'interval', 'weekdays', 'month_day', 'set_position',
+                 'start_date', 'end_date', 'active', 'next_occurrence', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'next_occurrence', 'created_at', 'updated_at')
+        extra_kwargs = {
+            'interval': {'min_value': 1},
+            'month_day': {'min_value': -31, 'max_value': 31},
+            'set_position': {'min_value': -366, 'max_value': 366},
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is not None:
+            self.fields['category'].queryset = Category.objects.filter(user=request.user)
+
+    def validate_amount(self, value):
+        if value <= Decimal('0'):
+            raise serializers.ValidationError("Amount must be greater than 0.")
+        return value
+
+    def validate_weekdays(self, value):
+        return sorted(set(value))
+
+    def validate_month_day(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Use 1 to 31, or -1 for the last day of the month.")
+        return value
+
+    def validate_set_position(self, value):
+        if value == 0:
+            raise serializers.ValidationError("Use 1 for the first occurrence in the period, -1 for the last.")
+        return value
+
+    def validate(self, data):
+        fields = {
+            field.name: getattr(self.instance, field.name)
+            for field in RecurringTransaction._meta.concrete_fields
+        } if self.instance else {}
+        schedule = RecurringTransaction(**{**fields, **data})
+        if schedule.end_date and schedule.end_date < schedule.start_date:
+            raise serializers.ValidationError({'end_date': "Must not be before start_date."})
+        if schedule.category is not None and schedule.category.type != schedule.type:
+            raise serializers.ValidationError({'category': f"Choose an {schedule.type} category."})
+        if recurring.first_occurrence(schedule) is None:
+            raise serializers.ValidationError("This schedule has no occurrences.")
+        return data
+
+    def create(self, validated_data):
+        schedule = RecurringTransaction(**validated_data)
+        schedule.next_occurrence = recurring.pending_occurrence(schedule)
+        schedule.save()
+        return schedule
+
+    def update(self, instance, validated_data):
+        # A resumed schedule skips what it missed while paused, an edited
+        # one continues from where it was
+        if not instance.active and validated_data.get('active', False):
+            since = timezone.localdate()
+        else:
+            since = instance.next_occurrence
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.next_occurrence = recurring.pending_occurrence(instance, since=since)
+        instance.save()
+        return instance
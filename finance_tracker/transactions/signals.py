@@ -0,0 +1,83 @@
+from decimal import Decimal
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from .models import Transaction, Category
+from . import rollups, snapshots
+
+ROLLUP_FIELDS = ('user_id', 'date', 'type', 'category_id', 'amount')
+ROLLUP_UPDATE_FIELDS = {'user', 'user_id', 'date', 'type', 'category', 'category_id', 'amount'}
+
+
+@receiver(pre_save, sender=Transaction)
+def remember_previous_rollup_key(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not ROLLUP_UPDATE_FIELDS & set(update_fields):
+        instance._rollup_previous = False
+        return
+    instance._rollup_previous = (
+        Transaction.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+    )
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous is False:
+        return
+
+    key = (instance.user_id, rollups.month_start(instance.date), instance.type, instance.category_id)
+    if previous:
+        previous_key = (
+            previous['user_id'], rollups.month_start(previous['date']),
+            previous['type'], previous['category_id']
+        )
+        if previous_key == key:
+            # Same rollup row, only the amount can have changed
+            amount = Decimal(str(instance.amount)) - previous['amount']
+            if amount:
+                rollups.apply_delta(*key, amount, 0)
+            return
+        rollups.apply_delta(*previous_key, -previous['amount'], -1)
+    rollups.apply_delta(*key, instance.amount, 1)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting a user cascades to its transactions and rollups together
+    if isinstance(origin, QuerySet):
+        origin = origin.model
+    if origin is not None and not (origin is Transaction or isinstance(origin, Transaction)):
+        return
+    rollups.apply_delta(
+        instance.user_id, instance.date, instance.type,
+        instance.category_id, -instance.amount, -1
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def move_rollups_to_uncategorized(sender, instance, **kwargs):
+    rollups.reassign_category(instance)
+
+
+@receiver(pre_save, sender=Transaction)
+@receiver(pre_delete, sender=Transaction)
+def remember_snapshot(sender, instance, raw=False, **kwargs):
+    if not raw:
+        snapshots.remember_snapshot(instance)
+
+
+# Connected after core.signals bumped the version
+@receiver(post_save, sender=Transaction)
+def update_snapshot_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        snapshots.apply_write(instance)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_snapshot_on_delete(sender, instance, **kwargs):
+    snapshots.apply_write(instance, deleted=True)
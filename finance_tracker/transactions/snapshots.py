@@ -0,0 +1,374 @@
+"""
+Columnar snapshots of a user's transactions for the analytics endpoints.
+
+A snapshot holds every transaction of one user as parallel NumPy arrays
+(day numbers, amounts in cents, category ids, an expense flag), so the
+summary, trends, by-category and comparison reports are array reductions
+instead of ORM queries returning a ``Decimal`` per row.
+
+Snapshots live in a per-process LRU cache bounded by the size of their
+arrays and are tagged with the user's ``TRANSACTIONS_SCOPE`` version, which
+only transaction and category writes bump: a snapshot whose version is
+behind is reloaded on next use. A transaction saved or deleted in this
+process is applied to the cached snapshot after commit instead, as long as
+no other write moved the version meanwhile; one written by another process
+means a reload of the user's whole history. Hence opt-in, with
+``ANALYTICS_SNAPSHOTS``.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+from django.utils.dateparse import parse_date
+from core.cache import CacheStats, TRANSACTIONS_SCOPE, get_data_version
+from .models import Category, Transaction
+
+EPOCH = date(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+NO_CATEGORY = -1
+TWO_PLACES = Decimal('0.01')
+# Rough per-category cost of the name and type dicts
+CATEGORY_BYTES = 200
+COLUMNS = ('ids', 'days', 'months', 'cents', 'categories', 'expense')
+
+snapshot_cache_stats = CacheStats('snapshots')
+
+
+def _day(value):
+    return (value - EPOCH).days
+
+
+def _month(value):
+    return (value.year - 1970) * 12 + value.month - 1
+
+
+def _month_date(number):
+    year, month = divmod(int(number), 12)
+    return date(1970 + year, month + 1, 1)
+
+
+def _amount(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _months_of(days):
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+
+
+def _sum_by(codes, values, size):
+    """Sum and count of ``values`` for each code in ``range(size)``."""
+    counts = np.bincount(codes, minlength=size)
+    # Float sums of whole cents are exact below 2**53
+    sums = np.rint(np.bincount(codes, weights=values, minlength=size)).astype(np.int64)
+    return sums, counts
+
+
+class TransactionSnapshot:
+    """
+    One user's transactions as arrays sorted by id.
+
+    ``days`` and ``months`` count from 1970-01-01, ``categories`` is
+    ``NO_CATEGORY`` for uncategorized rows. Snapshots are never changed in
+    place; ``apply`` returns a new one, so a report computed in another
+    thread never sees a half-applied write.
+    """
+
+    def __init__(self, version, ids, days, cents, categories, expense, category_names,
+                 category_types, months=None):
+        self.version = version
+        self.ids = ids
+        self.days = days
+        self.months = _months_of(days) if months is None else months
+        self.cents = cents
+        self.categories = categories
+        self.expense = expense
+        self.category_names = category_names
+        self.category_types = category_types
+
+    @classmethod
+    def load(cls, user_id, version):
+        """Read a user's transactions and categories in two queries."""
+        rows = list(
+            Transaction.objects
+            .filter(user_id=user_id)
+            .order_by('id')
+            .values_list('id', 'date', Cast(Round(F('amount') * 100), BigIntegerField()), 'category_id', 'type')
+        )
+        categories = Category.objects.filter(user_id=user_id).values_list('id', 'name', 'type')
+        category_names, category_types = {}, {}
+        for category_id, name, category_type in categories:
+            category_names[category_id] = name
+            category_types[category_id] = category_type
+
+        ids, dates, cents, category_ids, types = zip(*rows) if rows else ((),) * 5
+        return cls(
+            version,
+            ids=np.array(ids, dtype=np.int64),
+            days=np.array([value.toordinal() for value in dates], dtype=np.int32) - EPOCH_ORDINAL,
+            cents=np.array(cents, dtype=np.int64),
+            categories=np.array(
+                [NO_CATEGORY if category_id is None else category_id for category_id in category_ids],
+                dtype=np.int32
+            ),
+            expense=np.array(types, dtype=object) == 'expense',
+            category_names=category_names,
+            category_types=category_types,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        arrays = sum(getattr(self, name).nbytes for name in COLUMNS)
+        return arrays + CATEGORY_BYTES * len(self.category_names)
+
+    def apply(self, pk, row, version):
+        """
+        A copy with transaction ``pk`` set to ``row``, a ``(day, cents,
+        category, expense)`` tuple, or removed if ``row`` is None.
+        """
+        position = int(np.searchsorted(self.ids, pk))
+        columns = {name: getattr(self, name) for name in COLUMNS}
+        if position < len(self.ids) and self.ids[position] == pk:
+            columns = {name: np.delete(values, position) for name, values in columns.items()}
+        if row is not None:
+            day, cents, category, expense = row
+            values = {
+                'ids': pk,
+                'days': day,
+                'months': _month(EPOCH + timedelta(days=day)),
+                'cents': cents,
+                'categories': category,
+                'expense': expense,
+            }
+            columns = {
+                name: np.insert(column, position, values[name]) for name, column in columns.items()
+            }
+        return TransactionSnapshot(
+            version, category_names=self.category_names, category_types=self.category_types, **columns
+        )
+
+    def mask(self, start_date=None, end_date=None, type=None, category_type=None,
+             include_uncategorized=True):
+        """Rows matching the filters of ``aggregates.parse_aggregate_filters``."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if start_date:
+            mask &= self.days >= _day(start_date)
+        if end_date:
+            mask &= self.days <= _day(end_date)
+        if type:
+            mask &= self.expense if type == 'expense' else ~self.expense
+        if category_type:
+            matching = [key for key, value in self.category_types.items() if value == category_type]
+            mask &= np.isin(self.categories, matching)
+        if not include_uncategorized:
+            mask &= self.categories != NO_CATEGORY
+        return mask
+
+    def monthly_totals(self, start_month=None, end_month=None):
+        """Same as ``rollups.monthly_totals``."""
+        months, expense, cents = self.months, self.expense, self.cents
+        if start_month or end_month:
+            mask = np.ones(len(self.ids), dtype=bool)
+            if start_month:
+                mask &= months >= _month(start_month)
+            if end_month:
+                mask &= months <= _month(end_month)
+            months, expense, cents = months[mask], expense[mask], cents[mask]
+        if not len(months):
+            return {}
+        first = int(months.min())
+        sums, counts = _sum_by((months - first) * 2 + expense, cents, 0)
+
+        totals = {}
+        for code in np.flatnonzero(counts).tolist():
+            month = totals.setdefault(
+                _month_date(first + code // 2), {'income': Decimal('0'), 'expense': Decimal('0')}
+            )
+            month['expense' if code % 2 else 'income'] = _amount(sums[code])
+        return totals
+
+    def period_totals(self, start_date, end_date):
+        """Same as ``rollups.period_totals``."""
+        mask = self.mask(start_date, end_date)
+        expense = self.cents[mask & self.expense].sum()
+        income = self.cents[mask & ~self.expense].sum()
+        return {'income': _amount(income), 'expense': _amount(expense)}
+
+    def category_totals(self, **filters):
+        """Same as ``aggregates.category_totals`` over all of the user's transactions."""
+        mask = self.mask(**filters)
+        categories = self.categories[mask]
+        known = np.array(sorted({NO_CATEGORY, *self.category_names}), dtype=np.int32)
+        codes = np.minimum(np.searchsorted(known, categories), len(known) - 1)
+        if not np.array_equal(known[codes], categories):
+            # Another user's category; not expected, but don't miscount it
+            known, codes = np.unique(categories, return_inverse=True)
+        sums, counts = _sum_by(codes, self.cents[mask], len(known))
+        present = np.flatnonzero(counts)
+        keys, sums, counts = known[present], sums[present], counts[present]
+        # Largest total first, then by category id
+        order = np.lexsort((keys, -sums))
+
+        rows = []
+        for key, total, count in zip(keys[order].tolist(), sums[order].tolist(), counts[order].tolist()):
+            category_id = None if key == NO_CATEGORY else key
+            total = _amount(total)
+            rows.append({
+                'id': category_id,
+                'name': self.category_names.get(category_id) or 'Uncategorized',
+                'total': total,
+                'count': count,
+                'average': (total / count).quantize(TWO_PLACES),
+            })
+        return rows
+
+
+class SnapshotCache:
+    """
+    Snapshots of recently used users, least recently used evicted first
+    once their arrays take more than ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._snapshots = OrderedDict()
+        self.nbytes = 0
+        self.evictions = 0
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, 'ANALYTICS_SNAPSHOT_MAX_BYTES', 64 * 1024 * 1024)
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def get(self, user_id):
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(user_id)
+            return snapshot
+
+    def peek(self, user_id):
+        """The cached snapshot, without counting as a use."""
+        return self._snapshots.get(user_id)
+
+    def _remove(self, user_id):
+        self.nbytes -= self._snapshots.pop(user_id).nbytes
+
+    def put(self, user_id, snapshot):
+        with self._lock:
+            if user_id in self._snapshots:
+                self._remove(user_id)
+            if snapshot.nbytes > self.max_bytes:
+                # Would evict everyone else and still not fit
+                return
+            self._snapshots[user_id] = snapshot
+            self.nbytes += snapshot.nbytes
+            while self.nbytes > self.max_bytes:
+                self._remove(next(iter(self._snapshots)))
+                self.evictions += 1
+
+    def replace(self, user_id, old, new):
+        """Swap ``old`` for ``new`` unless another thread replaced or dropped it first."""
+        with self._lock:
+            if self._snapshots.get(user_id) is not old:
+                return False
+        self.put(user_id, new)
+        return True
+
+    def discard(self, user_id, snapshot=None):
+        """Drop a user's snapshot, only if it is still ``snapshot`` when given."""
+        with self._lock:
+            current = self._snapshots.get(user_id)
+            if current is not None and (snapshot is None or current is snapshot):
+                self._remove(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+            self.nbytes = 0
+            self.evictions = 0
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'users': len(self._snapshots),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+
+snapshots = SnapshotCache()
+
+
+def enabled():
+    return getattr(settings, 'ANALYTICS_SNAPSHOTS', False)
+
+
+def get_snapshot(user_id):
+    """The user's snapshot at their current transactions version, loaded if needed."""
+    version = get_data_version(user_id, TRANSACTIONS_SCOPE)
+    snapshot = snapshots.get(user_id)
+    if snapshot is not None and snapshot.version == version:
+        snapshot_cache_stats.record(hit=True)
+        return snapshot
+
+    snapshot_cache_stats.record(hit=False)
+    snapshot = TransactionSnapshot.load(user_id, version)
+    if not connection.in_atomic_block:
+        # Rows read inside a transaction may still be rolled back
+        snapshots.put(user_id, snapshot)
+    return snapshot
+
+
+def remember_snapshot(instance):
+    """Before a transaction is written: note its user's cached snapshot, if any."""
+    instance._snapshot_base = snapshots.peek(instance.user_id)
+
+
+def _row(instance):
+    value = instance.date
+    if isinstance(value, str):
+        value = parse_date(value)
+    cents = int((Decimal(str(instance.amount)) * 100).to_integral_value())
+    category = NO_CATEGORY if instance.category_id is None else instance.category_id
+    return _day(value), cents, category, instance.type == 'expense'
+
+
+def _apply_write(user_id, base, bumps, pk, row):
+    if get_data_version(user_id, TRANSACTIONS_SCOPE) != base.version + bumps:
+        # The snapshot was already behind, or another write came in between
+        snapshots.discard(user_id, base)
+        return
+    snapshots.replace(user_id, base, base.apply(pk, row, base.version + bumps))
+
+
+def apply_write(instance, deleted=False):
+    """
+    After a transaction was written and its user's version bumped: apply the
+    write to the snapshot noted by ``remember_snapshot`` once committed.
+
+    The write must account for the whole version change since the snapshot
+    was loaded, otherwise the snapshot is dropped and reloaded on next use.
+    """
+    base = getattr(instance, '_snapshot_base', None)
+    instance._snapshot_base = None
+    if base is None:
+        return
+    # core.signals bumps once now and, inside an atomic block, once more on commit
+    bumps = 2 if connection.in_atomic_block else 1
+    row = None if deleted else _row(instance)
+    user_id, pk = instance.user_id, instance.pk
+    transaction.on_commit(lambda: _apply_write(user_id, base, bumps, pk, row))
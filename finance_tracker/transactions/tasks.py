@@ -0,0 +1,55 @@
+from celery import shared_task
+from .models import TransactionImport, RecurringTransaction
+from .importers import TransactionImporter
+from . import recurring
+
+
+@shared_task
+def import_transactions(import_id):
+    try:
+        transaction_import = TransactionImport.objects.select_related('user').get(id=import_id)
+    except TransactionImport.DoesNotExist:
+        return f"Import {import_id} not found"
+
+    TransactionImport.objects.filter(id=import_id).update(status='processing')
+
+    def save_progress(importer):
+        TransactionImport.objects.filter(id=import_id).update(
+            processed_rows=importer.processed_rows,
+            imported_rows=importer.imported_rows,
+            failed_rows=importer.failed_rows,
+        )
+
+    importer = TransactionImporter(
+        transaction_import.user,
+        transaction_import.format,
+        on_progress=save_progress
+    )
+    try:
+        with transaction_import.file.open('rb') as fileobj:
+            importer.run(fileobj)
+        status = 'completed'
+    except Exception as e:
+        importer.errors.append({'row': None, 'error': f"Import failed: {str(e)}"})
+        status = 'failed'
+
+    transaction_import.status = status
+    transaction_import.processed_rows = importer.processed_rows
+    transaction_import.imported_rows = importer.imported_rows
+    transaction_import.failed_rows = importer.failed_rows
+    transaction_import.created_categories = importer.created_categories
+    transaction_import.errors = importer.errors
+    transaction_import.save()
+
+    # The statement is no longer needed once its rows are stored
+    transaction_import.file.delete(save=True)
+
+    return f"Imported {importer.imported_rows} transactions ({importer.failed_rows} failed)"
+
+
+@shared_task
+def materialize_recurring_transactions(schedule_ids=None):
+    """Create the due transactions of every schedule, or only of ``schedule_ids``."""
+    schedules = RecurringTransaction.objects.filter(id__in=schedule_ids) if schedule_ids else None
+    created = recurring.materialize(schedules)
+    return f"Created {created} recurring transactions"
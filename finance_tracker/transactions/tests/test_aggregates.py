@@ -0,0 +1,82 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction, Category
+from core.cache import bump_data_version
+from decimal import Decimal
+
+User = get_user_model()
+
+class ByCategoryAggregationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        self.salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        self.url = reverse('transaction-by-category')
+
+    def create_transactions(self, count):
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                date='2024-03-%02d' % (i % 28 + 1),
+                description=f'Transaction {i}',
+                amount=Decimal('0.10'),
+                type='expense',
+                category=(self.food, self.rent, None)[i % 3]
+            )
+            for i in range(count)
+        ])
+        # bulk_create sends no signals, so invalidate the cached analytics by hand
+        bump_data_version(self.user.id)
+
+    def test_totals_keep_decimal_precision(self):
+        self.create_transactions(30)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        by_name = {item['name']: item for item in response.data}
+        self.assertEqual(set(by_name), {'Food', 'Rent', 'Uncategorized'})
+        self.assertEqual(by_name['Food']['amount'], Decimal('1.00'))
+        self.assertEqual(by_name['Food']['count'], 10)
+        self.assertEqual(by_name['Food']['average'], Decimal('0.10'))
+
+    def test_filters(self):
+        self.create_transactions(6)
+        Transaction.objects.create(
+            user=self.user, date='2024-04-01', description='Pay',
+            amount=Decimal('2500.00'), type='income', category=self.salary
+        )
+
+        response = self.client.get(self.url, {'start_date': '2024-03-03', 'end_date': '2024-03-04'})
+        self.assertEqual(sum(item['count'] for item in response.data), 2)
+
+        response = self.client.get(self.url, {'type': 'income'})
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['amount'], Decimal('2500.00'))
+
+        response = self.client.get(self.url, {'category_type': 'expense'})
+        self.assertEqual({item['name'] for item in response.data}, {'Food', 'Rent'})
+
+    def test_invalid_filter(self):
+        response = self.client.get(self.url, {'start_date': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ANALYTICS_SNAPSHOTS=False)
+    def test_query_count_is_constant(self):
+        self.create_transactions(3)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        self.create_transactions(300)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
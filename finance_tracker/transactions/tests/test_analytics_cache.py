@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.cache import analytics_cache_stats, get_data_version
+from transactions.models import Transaction, Category
+from goals.models import Goal
+from decimal import Decimal
+from datetime import timedelta
+
+User = get_user_model()
+
+class AnalyticsCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        analytics_cache_stats.reset()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.now().date()
+        self.create_transaction(Decimal('100.00'))
+
+    def create_transaction(self, amount, **kwargs):
+        return Transaction.objects.create(
+            user=self.user, date=self.today, description='Test',
+            amount=amount, type='income', **kwargs
+        )
+
+    def test_repeated_calls_are_served_from_cache(self):
+        url = reverse('transaction-summary')
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(analytics_cache_stats.as_dict(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_transaction_write_invalidates(self):
+        url = reverse('transaction-summary')
+        self.assertEqual(self.client.get(url).data['total_income'], 100.0)
+
+        transaction = self.create_transaction(Decimal('50.00'))
+        self.assertEqual(self.client.get(url).data['total_income'], 150.0)
+
+        transaction.delete()
+        self.assertEqual(self.client.get(url).data['total_income'], 100.0)
+
+    def test_category_and_goal_writes_bump_version(self):
+        version = get_data_version(self.user.id)
+        Category.objects.create(user=self.user, name='Food')
+        self.assertNotEqual(get_data_version(self.user.id), version)
+
+        version = get_data_version(self.user.id)
+        Goal.objects.create(
+            user=self.user, title='Test Goal', target_amount=Decimal('1000.00'),
+            deadline=self.today + timedelta(days=30)
+        )
+        self.assertNotEqual(get_data_version(self.user.id), version)
+
+    def test_dashboard_stats_sees_new_goals(self):
+        url = reverse('dashboard-stats')
+        self.assertEqual(self.client.get(url).data['summary']['active_goals'], 0)
+        Goal.objects.create(
+            user=self.user, title='Test Goal', target_amount=Decimal('1000.00'),
+            deadline=self.today + timedelta(days=30)
+        )
+        self.assertEqual(self.client.get(url).data['summary']['active_goals'], 1)
+
+    def test_query_params_and_users_get_separate_entries(self):
+        url = reverse('transaction-by-category')
+        self.assertEqual(len(self.client.get(url).data), 0)
+        self.assertEqual(len(self.client.get(url, {'type': 'income'}).data), 1)
+
+        other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(len(self.client.get(url, {'type': 'income'}).data), 0)
+
+    def test_errors_are_not_cached(self):
+        url = reverse('transaction-by-category')
+        self.client.get(url, {'start_date': 'bad'})
+        response = self.client.get(url, {'start_date': 'bad'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(analytics_cache_stats.hits, 0)
+
+    def test_cache_stats_endpoint_is_admin_only(self):
+        url = reverse('dashboard-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['analytics']['misses'], 0)
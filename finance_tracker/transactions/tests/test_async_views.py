@@ -0,0 +1,108 @@
+from asgiref.sync import iscoroutinefunction
+from django.core.cache import cache
+from django.test import TestCase, AsyncClient, override_settings
+from django.urls import reverse, resolve
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from transactions.models import Transaction, Category
+from goals.models import Goal
+from notifications.models import Notification
+from decimal import Decimal
+from datetime import timedelta
+
+User = get_user_model()
+
+ASYNC_URLCONF = 'finance_tracker.asgi_urls'
+
+ENDPOINTS = (
+    'transaction-summary',
+    'transaction-trends',
+    'transaction-by-category',
+    'dashboard-stats',
+    'notification-list',
+)
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        today = timezone.now().date()
+        food = Category.objects.create(user=self.user, name='Food')
+        for i in range(3):
+            Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=40 * i), description='Pay',
+                amount=Decimal('1000.00'), type='income'
+            )
+            Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=40 * i), description='Lunch',
+                amount=Decimal('12.50'), type='expense', category=food if i else None
+            )
+        Goal.objects.create(
+            user=self.user, title='Test Goal', target_amount=Decimal('1000.00'),
+            deadline=today + timedelta(days=30)
+        )
+        Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE'
+        )
+
+    def test_asgi_urls_route_to_async_views(self):
+        for name in ENDPOINTS:
+            self.assertFalse(iscoroutinefunction(resolve(reverse(name)).func), name)
+            with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func), name)
+
+    def test_async_views_match_sync_views(self):
+        for name in ENDPOINTS:
+            cache.clear()
+            expected = self.client.get(reverse(name), {'type': 'expense'}).data
+            cache.clear()
+            with override_settings(ROOT_URLCONF=ASYNC_URLCONF):
+                response = self.client.get(reverse(name), {'type': 'expense'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+            self.assertEqual(response.data, expected, name)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    def test_caching_and_conditional_get(self):
+        url = reverse('transaction-summary')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data, response.data)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    def test_errors(self):
+        response = self.client.get(reverse('transaction-by-category'), {'start_date': 'bad'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('transaction-summary'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    def test_create_notification(self):
+        response = self.client.post(reverse('notification-list'), {
+            'title': 'New', 'message': 'Message', 'notification_type': 'BILL_DUE'
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_served_through_the_asgi_handler(self):
+        token = await Token.objects.acreate(user=self.user)
+        response = await AsyncClient().get(
+            reverse('transaction-summary'), headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total_income'], 3000.0)
@@ -0,0 +1,108 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from transactions.models import Transaction
+from goals.models import Goal
+from notifications.models import Notification
+from decimal import Decimal
+from datetime import timedelta
+
+User = get_user_model()
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.today = timezone.now().date()
+        self.create_transaction()
+
+    def create_transaction(self):
+        return Transaction.objects.create(
+            user=self.user, date=self.today, description='Test',
+            amount=Decimal('100.00'), type='income'
+        )
+
+    def revalidate(self, url, response, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_data_returns_304_without_queries(self):
+        for name in ('transaction-list', 'transaction-summary', 'transaction-trends',
+                     'transaction-by-category', 'dashboard-stats', 'goal-list', 'notification-list'):
+            url = reverse(name)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn('ETag', response)
+            self.assertIn('private', response['Cache-Control'])
+
+            with self.assertNumQueries(0):
+                response = self.revalidate(url, response)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED, name)
+            self.assertEqual(response.content, b'')
+
+    def test_writes_change_the_etag(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url)
+        self.create_transaction()
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+        url = reverse('goal-list')
+        response = self.client.get(url)
+        Goal.objects.create(
+            user=self.user, title='Test Goal', target_amount=Decimal('1000.00'),
+            deadline=self.today + timedelta(days=30)
+        )
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+
+    def test_query_params_have_their_own_etag(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url)
+        response = self.revalidate(url, response, type='expense')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_notifications_have_their_own_version(self):
+        url = reverse('notification-list')
+        response = self.client.get(url)
+
+        # Transaction writes don't invalidate the notification list
+        self.create_transaction()
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Notification.objects.create(
+            user=self.user, title='Test', message='Test', notification_type='GOAL_DEADLINE'
+        )
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.client.post(reverse('notification-mark-all-read'))
+        self.assertEqual(self.revalidate(url, response).status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_users_do_not_share_etags(self):
+        url = reverse('transaction-list')
+        response = self.client.get(url)
+        other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=other)
+        response = self.revalidate(url, response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+from django.test import TestCase, AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from transactions.exporters import astream
+from transactions.models import Transaction, Category
+from decimal import Decimal
+
+User = get_user_model()
+
+class TransactionExportTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Food')
+
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                date='2024-03-%02d' % (i + 1),
+                description=f'Transaction, "{i}"',
+                amount=Decimal('10.5') * (i + 1),
+                type='income' if i % 2 else 'expense',
+                category=self.category if i % 3 else None
+            )
+            for i in range(20)
+        ])
+        other_user = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Transaction.objects.create(
+            user=other_user, date='2024-03-01', description='Not mine',
+            amount=Decimal('1.00'), type='expense'
+        )
+        self.url = reverse('transaction-export')
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 20)
+        # Default list ordering is newest first
+        self.assertEqual(rows[0]['date'], '2024-03-20')
+        self.assertEqual(rows[0]['description'], 'Transaction, "19"')
+        self.assertEqual(rows[0]['amount'], '210.00')
+        self.assertEqual(rows[0]['category_name'], 'Food')
+
+    def test_ndjson_export_honors_list_filters(self):
+        response = self.client.get(self.url, {'file_format': 'ndjson', 'type': 'income', 'ordering': 'amount'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual({row['type'] for row in rows}, {'income'})
+        self.assertEqual(rows[0]['amount'], '21.00')
+
+    def test_export_uses_one_query(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.read(response)
+
+    def test_unsupported_format(self):
+        response = self.client.get(self.url, {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(ROOT_URLCONF='finance_tracker.asgi_urls')
+    async def test_streams_through_the_asgi_handler(self):
+        token = await Token.objects.acreate(user=self.user)
+        response = await AsyncClient().get(self.url, headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Sent as it is read rather than buffered by Django first
+        self.assertTrue(response.is_async)
+
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows[0]['description'], 'Transaction, "19"')
+
+    async def test_astream_reads_one_batch_at_a_time(self):
+        read = []
+
+        def chunks():
+            for i in range(5):
+                read.append(i)
+                yield str(i)
+
+        stream = astream(chunks(), batch_size=2)
+        self.assertEqual(await anext(stream), '01')
+        self.assertEqual(read, [0, 1])
+        self.assertEqual([chunk async for chunk in stream], ['23', '4'])
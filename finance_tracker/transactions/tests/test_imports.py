@@ -0,0 +1,183 @@
+import io
+import shutil
+import tempfile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction, Category, MonthlyRollup, TransactionImport
+from transactions.importers import TransactionImporter, parse_ofx, parse_qif
+from transactions.tasks import import_transactions
+from decimal import Decimal
+from datetime import date
+from unittest.mock import patch
+
+User = get_user_model()
+
+CSV_DATA = b"""Date,Description,Amount,Category
+2024-03-01,Salary,2500.00,Salary
+2024-03-02,Groceries,-54.20,Food
+2024-03-03,Coffee,-3.50,food
+not-a-date,Broken,-1.00,Food
+2024-03-04,Lunch,-12.00,Food
+"""
+
+OFX_DATA = b"""OFXHEADER:100
+DATA:OFXSGML
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240305120000
+<TRNAMT>-42.10
+<NAME>Gas Station
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240306<TRNAMT>100.00<NAME>Refund</NAME></STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF_DATA = b"""!Type:Bank
+D03/07/2024
+T-75.00
+PElectric Company
+LUtilities
+^
+D3/08'24
+T1,200.00
+PConsulting
+^
+"""
+
+
+class ImportParserTest(TestCase):
+    def test_parse_ofx_reads_sgml_and_xml_blocks(self):
+        rows = [fields for _, fields in parse_ofx(io.BytesIO(OFX_DATA))]
+        self.assertEqual([row['amount'] for row in rows], ['-42.10', '100.00'])
+        self.assertEqual([row['description'] for row in rows], ['Gas Station', 'Refund'])
+        self.assertEqual(rows[0]['date'], '20240305')
+
+    def test_parse_ofx_handles_tags_split_across_chunks(self):
+        with patch('transactions.importers.READ_CHUNK_SIZE', 7):
+            rows = [fields for _, fields in parse_ofx(io.BytesIO(OFX_DATA))]
+        self.assertEqual([row['description'] for row in rows], ['Gas Station', 'Refund'])
+
+    def test_parse_qif(self):
+        rows = list(parse_qif(io.BytesIO(QIF_DATA)))
+        self.assertEqual(rows[0][0], 2)
+        self.assertEqual(rows[0][1]['category'], 'Utilities')
+        self.assertEqual(rows[1][1]['date'], '3/08/24')
+        self.assertEqual(rows[1][1]['amount'], '1,200.00')
+
+
+class TransactionImporterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food')
+
+    def test_csv_import_in_batches(self):
+        progress = []
+        importer = TransactionImporter(
+            self.user, 'csv', batch_size=2,
+            on_progress=lambda importer: progress.append(importer.processed_rows)
+        )
+        importer.run(io.BytesIO(CSV_DATA))
+
+        self.assertEqual(progress, [2, 4, 5])
+        self.assertEqual(importer.imported_rows, 4)
+        self.assertEqual(importer.failed_rows, 1)
+        self.assertEqual(importer.errors, [{'row': 5, 'error': 'Invalid date "not-a-date"'}])
+
+        # "Food" and "food" resolve to the existing category; only Salary is new
+        self.assertEqual(importer.created_categories, 1)
+        self.assertEqual(Transaction.objects.filter(category=self.food).count(), 3)
+        salary = Transaction.objects.get(description='Salary')
+        self.assertEqual(salary.type, 'income')
+        self.assertEqual(salary.category.type, 'income')
+        self.assertEqual(Transaction.objects.get(description='Groceries').amount, Decimal('54.20'))
+
+    def test_import_updates_rollups(self):
+        TransactionImporter(self.user, 'csv').run(io.BytesIO(CSV_DATA))
+        rollup = MonthlyRollup.objects.get(user=self.user, type='expense', category=self.food)
+        self.assertEqual(rollup.total, Decimal('69.70'))
+        self.assertEqual(rollup.count, 3)
+
+    def test_category_lookups_are_cached(self):
+        rows = b"date,description,amount,category\n" + b"".join(
+            b"2024-03-01,Row %d,-1.00,Food\n" % i for i in range(50)
+        )
+        with CaptureQueriesContext(connection) as captured:
+            TransactionImporter(self.user, 'csv', batch_size=10).run(io.BytesIO(rows))
+
+        category_queries = [q for q in captured.captured_queries if 'transactions_category' in q['sql']]
+        transaction_inserts = [
+            q for q in captured.captured_queries
+            if q['sql'].startswith('INSERT INTO "transactions_transaction"')
+        ]
+        self.assertEqual(len(category_queries), 1)
+        self.assertEqual(len(transaction_inserts), 5)
+
+    def test_qif_import(self):
+        importer = TransactionImporter(self.user, 'qif').run(io.BytesIO(QIF_DATA))
+        self.assertEqual(importer.imported_rows, 2)
+        consulting = Transaction.objects.get(description='Consulting')
+        self.assertEqual(consulting.amount, Decimal('1200.00'))
+        self.assertEqual(consulting.date, date(2024, 3, 8))
+        self.assertIsNone(consulting.category)
+
+
+class TransactionImportTaskTest(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    @patch('transactions.views.import_transactions.delay')
+    def test_upload_schedules_import(self, mock_delay):
+        upload = SimpleUploadedFile('statement.ofx', OFX_DATA)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('transaction-import-list'), {'file': upload})
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['format'], 'ofx')
+        self.assertEqual(response.data['status'], 'pending')
+        mock_delay.assert_called_once_with(response.data['id'])
+
+    def test_unknown_format_is_rejected(self):
+        upload = SimpleUploadedFile('statement.txt', b'hello')
+        response = self.client.post(reverse('transaction-import-list'), {'file': upload})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_task_imports_and_reports(self):
+        transaction_import = TransactionImport.objects.create(
+            user=self.user,
+            format='csv',
+            file=SimpleUploadedFile('statement.csv', CSV_DATA)
+        )
+        import_transactions(transaction_import.id)
+
+        transaction_import.refresh_from_db()
+        self.assertEqual(transaction_import.status, 'completed')
+        self.assertEqual(transaction_import.imported_rows, 4)
+        self.assertEqual(transaction_import.failed_rows, 1)
+        self.assertEqual(len(transaction_import.errors), 1)
+        self.assertFalse(transaction_import.file)
+
+        response = self.client.get(reverse('transaction-import-detail', args=[transaction_import.id]))
+        self.assertEqual(response.data['imported_rows'], 4)
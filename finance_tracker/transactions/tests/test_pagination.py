@@ -0,0 +1,102 @@
+import base64
+import json
+from django.test import TestCase
+from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction, Category
+from decimal import Decimal
+from datetime import date, timedelta
+
+User = get_user_model()
+
+class TransactionCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name='Food')
+
+        # Several transactions share each date so the id tiebreaker matters
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                date=date(2024, 3, 1) + timedelta(days=i // 4),
+                description=f'Transaction {i}',
+                amount=Decimal(i % 7),
+                type='income' if i % 3 == 0 else 'expense',
+                category=self.category
+            )
+            for i in range(37)
+        ])
+        self.url = reverse('transaction-list')
+
+    def walk(self, params):
+        ids = []
+        response = self.client.get(self.url, {'pagination': 'cursor', **params})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_row_once_in_order(self):
+        ids, _ = self.walk({'page_size': 5})
+        expected = list(
+            Transaction.objects.order_by('-date', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 5})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_combines_with_filters_and_ordering(self):
+        ids, _ = self.walk({'page_size': 4, 'type': 'income', 'ordering': 'amount'})
+        expected = list(
+            Transaction.objects.filter(type='income')
+            .order_by('amount', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_deep_pages_cost_the_same_as_the_first(self):
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(self.url, {'pagination': 'cursor', 'page_size': 3})
+        for _ in range(6):
+            response = self.client.get(response.data['next'])
+        with CaptureQueriesContext(connection) as deep_page:
+            self.client.get(response.data['next'])
+
+        self.assertEqual(len(deep_page), len(first_page))
+        for query in deep_page.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_with_bad_values(self):
+        for values in (['garbage', 1], [None, 1], ['2024-03-01', 'x'], [['2024-03-01'], 1]):
+            payload = json.dumps({'o': ['-date', '-id'], 'v': values, 'r': 0}).encode()
+            response = self.client.get(self.url, {
+                'pagination': 'cursor',
+                'cursor': base64.urlsafe_b64encode(payload).decode(),
+            })
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND, values)
+
+    def test_page_number_pagination_is_default(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 37)
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from core.middleware import QueryBudgetMiddleware
+from core.queries import QueryBudgetExceeded, query_budget
+from core.testing import QueryBudgetAssertionsMixin
+from transactions import recurring
+from transactions.models import Category, RecurringTransaction, Transaction, TransactionImport
+
+User = get_user_model()
+
+class TransactionQueryBudgetTest(QueryBudgetAssertionsMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.rows = 0
+
+    def populate(self, size):
+        # Every row brings its own category, so per-row category reads show up
+        today = timezone.now().date()
+        while self.rows < size:
+            self.rows += 1
+            kind = 'expense' if self.rows % 3 else 'income'
+            category = Category.objects.create(user=self.user, name=f'Category {self.rows}', type=kind)
+            Transaction.objects.create(
+                user=self.user, date=today - timedelta(days=self.rows * 7), description=f'Item {self.rows}',
+                amount=Decimal('12.50'), type=kind, category=category
+            )
+            schedule = RecurringTransaction(
+                user=self.user, description=f'Schedule {self.rows}', amount=Decimal('5.00'), type=kind,
+                category=category, frequency='monthly', start_date=date(2024, 1, 1)
+            )
+            schedule.next_occurrence = recurring.pending_occurrence(schedule)
+            schedule.save()
+            TransactionImport.objects.create(user=self.user, format='csv', status='completed')
+
+    def test_endpoints_do_not_scale_with_rows(self):
+        get = self.client.get
+        self.assertQueriesDoNotScale({
+            'transactions': lambda: get(reverse('transaction-list')),
+            'transactions, cursor': lambda: get(reverse('transaction-list'), {'pagination': 'cursor'}),
+            'transactions, search': lambda: get(reverse('transaction-list'), {'search': 'item'}),
+            'transaction': lambda: get(reverse('transaction-detail', args=[Transaction.objects.first().id])),
+            'by-category': lambda: get(reverse('transaction-by-category')),
+            'summary': lambda: get(reverse('transaction-summary')),
+            'trends': lambda: get(reverse('transaction-trends')),
+            'compare': lambda: get(reverse('transaction-compare'), {
+                'start_date': (timezone.now() - timedelta(days=90)).date().isoformat(),
+                'end_date': timezone.now().date().isoformat(),
+            }),
+            'export': lambda: get(reverse('transaction-export')),
+            'categories': lambda: get(reverse('category-list')),
+            'recurring': lambda: get(reverse('recurring-transaction-list')),
+            'imports': lambda: get(reverse('transaction-import-list')),
+        }, self.populate)
+
+class QueryBudgetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.categories = [
+            Category.objects.create(user=self.user, name=f'Category {i}', type='expense') for i in range(6)
+        ]
+
+    def read_each_category(self):
+        for category in self.categories:
+            Category.objects.get(id=category.id)
+
+    def test_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'categories: 2 queries, over its budget of 1'):
+            with query_budget(1, name='categories'):
+                list(Category.objects.all())
+                list(Category.objects.all())
+
+        @query_budget(1)
+        def read_twice():
+            list(Category.objects.all())
+            list(Category.objects.all())
+
+        for _ in range(2):
+            # Each call has a budget of its own
+            with self.assertRaisesMessage(QueryBudgetExceeded, 'read_twice: 2 queries'):
+                read_twice()
+
+    def test_repeated_queries(self):
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            with query_budget():
+                self.read_each_category()
+        self.assertIn('the same query ran 6 times, from transactions/tests/test_query_budgets.py', str(raised.exception))
+        self.assertIn('in read_each_category', str(raised.exception))
+
+        # Repeats allowed, as in chunked loops
+        with query_budget(repeat_threshold=None):
+            self.read_each_category()
+
+    @override_settings(QUERY_BUDGET_MODE='log')
+    def test_log_mode(self):
+        with self.assertLogs('core.queries', level='WARNING') as logs:
+            with query_budget(1, name='categories'):
+                self.read_each_category()
+        self.assertIn('categories: 6 queries, over its budget of 1; the same query ran 6 times', logs.output[0])
+
+    def test_middleware_checks_every_request(self):
+        def view(request):
+            self.read_each_category()
+            return HttpResponse()
+
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'GET /categories/: the same query ran 6 times'):
+            QueryBudgetMiddleware(view)(RequestFactory().get('/categories/'))
@@ -0,0 +1,94 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.testing import QueryPlanAssertionsMixin
+from transactions.models import Transaction, Category
+from transactions import rollups
+from goals.models import Goal
+from decimal import Decimal
+from datetime import timedelta
+
+User = get_user_model()
+
+TABLES = ('transactions_transaction', 'transactions_monthlyrollup', 'goals_goal')
+
+class TransactionQueryPlanTest(QueryPlanAssertionsMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        cls.users = [
+            User.objects.create_user(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='testpass123'
+            )
+            for i in range(5)
+        ]
+        for user in cls.users:
+            categories = [
+                Category.objects.create(user=user, name=f'Category {i}')
+                for i in range(4)
+            ]
+            Transaction.objects.bulk_create([
+                Transaction(
+                    user=user,
+                    date=today - timedelta(days=i % 400),
+                    description=f'Transaction {i}',
+                    amount=Decimal('12.34'),
+                    type='income' if i % 5 == 0 else 'expense',
+                    category=categories[i % 4]
+                )
+                for i in range(400)
+            ])
+            Goal.objects.create(
+                user=user,
+                title='Test Goal',
+                target_amount=Decimal('1000.00'),
+                deadline=today + timedelta(days=30)
+            )
+        rollups.rebuild()
+        cls.user = cls.users[0]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list(self):
+        url = reverse('transaction-list')
+        self.assertNoSequentialScans(lambda: self.get(url), TABLES)
+
+    def test_list_filtered_by_type(self):
+        url = reverse('transaction-list')
+        self.assertNoSequentialScans(lambda: self.get(url, {'type': 'income'}), TABLES)
+
+    def test_list_filtered_by_category(self):
+        category = Category.objects.filter(user=self.user).first()
+        url = reverse('transaction-list')
+        self.assertNoSequentialScans(lambda: self.get(url, {'category': category.id}), TABLES)
+
+    def test_summary(self):
+        url = reverse('transaction-summary')
+        self.assertNoSequentialScans(lambda: self.get(url), TABLES)
+
+    def test_trends(self):
+        url = reverse('transaction-trends')
+        self.assertNoSequentialScans(lambda: self.get(url), TABLES)
+
+    def test_by_category(self):
+        url = reverse('transaction-by-category')
+        self.assertNoSequentialScans(lambda: self.get(url), TABLES)
+
+    def test_dashboard_stats(self):
+        url = reverse('dashboard-stats')
+        self.assertNoSequentialScans(lambda: self.get(url), TABLES)
+
+    def test_search(self):
+        url = reverse('transaction-list')
+        self.assertNoSequentialScans(lambda: self.get(url, {'search': 'transaction'}), TABLES)
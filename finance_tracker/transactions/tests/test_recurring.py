@@ -0,0 +1,236 @@
+import threading
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from transactions import recurring, rollups
+from transactions.models import Category, RecurringTransaction, Transaction
+
+User = get_user_model()
+
+class RecurringDataMixin:
+    def create_user(self, username='testuser'):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123'
+        )
+
+    def create_schedule(self, user=None, **kwargs):
+        fields = {
+            'user': user or self.user,
+            'description': 'Rent',
+            'amount': Decimal('800.00'),
+            'type': 'expense',
+            'frequency': 'monthly',
+            'start_date': date(2024, 1, 1),
+            **kwargs,
+        }
+        schedule = RecurringTransaction(**fields)
+        schedule.next_occurrence = recurring.pending_occurrence(schedule)
+        schedule.save()
+        return schedule
+
+    def occurrences(self, schedule):
+        return list(schedule.transactions.order_by('occurrence').values_list('occurrence', flat=True))
+
+class RecurrenceRuleTest(RecurringDataMixin, TestCase):
+    def setUp(self):
+        self.user = self.create_user()
+
+    def test_rules(self):
+        last_business_day = self.create_schedule(
+            start_date=date(2024, 8, 1), weekdays=[0, 1, 2, 3, 4], set_position=-1
+        )
+        recurring.materialize(today=date(2024, 11, 30))
+        # August 31 and November 30 are Saturdays
+        self.assertEqual(
+            self.occurrences(last_business_day),
+            [date(2024, 8, 30), date(2024, 9, 30), date(2024, 10, 31), date(2024, 11, 29)]
+        )
+
+        month_end = self.create_schedule(start_date=date(2024, 1, 1), month_day=-1)
+        fortnightly = self.create_schedule(frequency='weekly', interval=2, start_date=date(2024, 1, 3))
+        recurring.materialize(today=date(2024, 3, 1))
+        self.assertEqual(self.occurrences(month_end), [date(2024, 1, 31), date(2024, 2, 29)])
+        self.assertEqual(
+            self.occurrences(fortnightly),
+            [date(2024, 1, 3), date(2024, 1, 17), date(2024, 1, 31), date(2024, 2, 14), date(2024, 2, 28)]
+        )
+        fortnightly.refresh_from_db()
+        self.assertEqual(fortnightly.next_occurrence, date(2024, 3, 13))
+
+    def test_schedule_ends(self):
+        schedule = self.create_schedule(end_date=date(2024, 3, 15))
+        recurring.materialize(today=date(2024, 6, 1))
+        schedule.refresh_from_db()
+        self.assertEqual(len(self.occurrences(schedule)), 3)
+        self.assertIsNone(schedule.next_occurrence)
+
+class MaterializeTest(RecurringDataMixin, TestCase):
+    def setUp(self):
+        self.user = self.create_user()
+        self.category = Category.objects.create(user=self.user, name='Housing', type='expense')
+
+    def test_materialized_rows_update_rollups(self):
+        schedule = self.create_schedule(category=self.category)
+        self.assertEqual(recurring.materialize(today=date(2024, 3, 10)), 3)
+        transaction = schedule.transactions.get(occurrence=date(2024, 2, 1))
+        self.assertEqual(
+            (transaction.user, transaction.date, transaction.amount, transaction.category),
+            (self.user, date(2024, 2, 1), Decimal('800.00'), self.category)
+        )
+        months = rollups.monthly_totals(self.user)
+        self.assertEqual(months[date(2024, 3, 1)]['expense'], Decimal('800.00'))
+
+    def test_reruns_do_not_duplicate(self):
+        schedule = self.create_schedule()
+        recurring.materialize(today=date(2024, 3, 10))
+        self.assertEqual(recurring.materialize(today=date(2024, 3, 10)), 0)
+
+        # Even with the next occurrence set back by hand
+        RecurringTransaction.objects.filter(pk=schedule.pk).update(next_occurrence=date(2024, 1, 1))
+        self.assertEqual(recurring.materialize(today=date(2024, 4, 10)), 1)
+        self.assertEqual(len(self.occurrences(schedule)), 4)
+        self.assertEqual(rollups.monthly_totals(self.user)[date(2024, 2, 1)]['expense'], Decimal('800.00'))
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Transaction.objects.create(
+                user=self.user, date=date(2024, 2, 1), description='Rent', amount=Decimal('800.00'),
+                type='expense', recurring=schedule, occurrence=date(2024, 2, 1)
+            )
+
+    def test_occurrence_written_meanwhile_is_skipped(self):
+        schedule = self.create_schedule()
+        existing_occurrences = recurring._existing_occurrences
+
+        def write_meanwhile(schedules, since):
+            # Not there when first looked for, committed by another writer before the insert
+            found = existing_occurrences(schedules, since)
+            if not Transaction.objects.filter(recurring=schedule).exists():
+                Transaction.objects.create(
+                    user=self.user, date=date(2024, 2, 1), description='Rent', amount=Decimal('800.00'),
+                    type='expense', recurring=schedule, occurrence=date(2024, 2, 1)
+                )
+            return found
+
+        with patch.object(recurring, '_existing_occurrences', side_effect=write_meanwhile):
+            self.assertEqual(recurring.materialize(today=date(2024, 3, 10)), 2)
+        self.assertEqual(self.occurrences(schedule), [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)])
+        months = rollups.monthly_totals(self.user)
+        self.assertEqual([months[date(2024, month, 1)]['expense'] for month in (1, 2, 3)], [Decimal('800.00')] * 3)
+
+    def test_chunks_and_paused_schedules(self):
+        other = self.create_user('other')
+        schedules = [self.create_schedule(user=user) for user in (self.user, other, self.user)]
+        paused = self.create_schedule(active=False)
+        self.assertEqual(recurring.materialize(today=date(2024, 2, 10), chunk_size=2), 6)
+        for schedule in schedules:
+            self.assertEqual(len(self.occurrences(schedule)), 2)
+        self.assertEqual(self.occurrences(paused), [])
+
+    def test_catch_up_is_bounded(self):
+        schedule = self.create_schedule(frequency='daily', start_date=date(2023, 1, 1))
+        self.assertEqual(recurring.materialize(today=date(2024, 6, 1)), recurring.MAX_OCCURRENCES_PER_RUN)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.next_occurrence, date(2024, 1, 2))
+
+class RecurringTransactionAPITest(RecurringDataMixin, TestCase):
+    def setUp(self):
+        self.user = self.create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('recurring-transaction-list')
+        self.salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        patcher = patch('transactions.tasks.materialize_recurring_transactions.delay')
+        self.materialize = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_schedule(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {
+                'description': 'Salary', 'amount': '3000.00', 'type': 'income', 'category': self.salary.id,
+                'frequency': 'monthly', 'weekdays': [4, 3, 2, 1, 0], 'set_position': -1,
+                'start_date': '2024-08-01',
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['weekdays'], [0, 1, 2, 3, 4])
+        self.assertEqual(response.data['next_occurrence'], '2024-08-30')
+        self.materialize.assert_called_once_with([response.data['id']])
+
+    def test_validation(self):
+        other = self.create_user('other')
+        theirs = Category.objects.create(user=other, name='Salary', type='income')
+        valid = {
+            'description': 'Salary', 'amount': '3000.00', 'type': 'income',
+            'frequency': 'monthly', 'start_date': '2024-01-01',
+        }
+        for changes in (
+            {'category': theirs.id},
+            {'type': 'expense', 'category': self.salary.id},
+            {'end_date': '2023-12-01'},
+            {'amount': '0'},
+            {'month_day': 0},
+            {'weekdays': [7]},
+            {'frequency': 'hourly'},
+            # February 30th never comes
+            {'frequency': 'yearly', 'month_day': 30, 'start_date': '2024-02-01', 'end_date': '2024-02-28'},
+        ):
+            response = self.client.post(self.url, {**valid, **changes}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, changes)
+        self.assertFalse(RecurringTransaction.objects.exists())
+
+    def test_resumed_schedule_skips_missed_occurrences(self):
+        schedule = self.create_schedule(start_date=date(2024, 1, 1))
+        recurring.materialize(today=date(2024, 2, 10))
+        url = reverse('recurring-transaction-detail', args=[schedule.id])
+        self.client.patch(url, {'active': False}, format='json')
+
+        with patch('transactions.serializers.timezone.localdate', return_value=date(2024, 6, 10)):
+            response = self.client.patch(url, {'active': True}, format='json')
+        self.assertEqual(response.data['next_occurrence'], '2024-07-01')
+
+        # Editing the rule continues from there
+        response = self.client.patch(url, {'month_day': 15}, format='json')
+        self.assertEqual(response.data['next_occurrence'], '2024-07-15')
+
+    def test_materialized_transactions_link_their_schedule(self):
+        schedule = self.create_schedule()
+        recurring.materialize(today=date(2024, 1, 10))
+        response = self.client.get(reverse('transaction-list'))
+        self.assertEqual(response.data['results'][0]['recurring'], schedule.id)
+
+# SQLite allows a single writer at a time, so there is no contention to test
+@unittest.skipIf(connection.vendor == 'sqlite', 'SQLite does not support concurrent writers')
+class ConcurrentMaterializeTest(RecurringDataMixin, TransactionTestCase):
+    def test_overlapping_runs_create_each_occurrence_once(self):
+        self.user = self.create_user()
+        for _ in range(20):
+            self.create_schedule(frequency='weekly')
+        errors = []
+        barrier = threading.Barrier(4)
+
+        def worker():
+            try:
+                barrier.wait()
+                recurring.materialize(today=date(2024, 3, 31), chunk_size=3)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        # 13 Mondays from January 1st to March 31st
+        self.assertEqual(Transaction.objects.count(), 20 * 13)
+        self.assertEqual(rollups.monthly_totals(self.user)[date(2024, 1, 1)]['expense'], Decimal('800.00') * 20 * 5)
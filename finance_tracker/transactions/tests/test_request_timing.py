@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import re
+import tempfile
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.log import JSONFormatter, QueueFileHandler
+from transactions.models import Transaction
+from decimal import Decimal
+
+User = get_user_model()
+
+def server_timing(response):
+    """``{metric: (duration or None, description or None)}`` of a Server-Timing header."""
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        params = dict(param.split('=', 1) for param in params)
+        metrics[name] = (
+            float(params['dur']) if 'dur' in params else None,
+            params.get('desc', '').strip('"') or None,
+        )
+    return metrics
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0)
+class RequestTimingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(3):
+            Transaction.objects.create(
+                user=self.user, date=timezone.now().date(), description=f'Test {i}',
+                amount=Decimal('10.00'), type='expense'
+            )
+
+    def test_server_timing_header(self):
+        # A body big enough for its rendering to show in tenths of a millisecond
+        Transaction.objects.bulk_create(
+            Transaction(
+                user=self.user, date=timezone.now().date(), description=f'Bulk {i}',
+                amount=Decimal('10.00'), type='expense'
+            )
+            for i in range(200)
+        )
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('transaction-list'))
+        metrics = server_timing(response)
+        self.assertGreater(metrics['total'][0], 0)
+        self.assertEqual(metrics['db'][1], f'{len(captured)} queries')
+        self.assertGreater(metrics['serialize'][0], 0)
+        self.assertLessEqual(metrics['db'][0] + metrics['serialize'][0], metrics['total'][0])
+
+    def test_cache_lookups(self):
+        url = reverse('transaction-summary')
+        self.client.get(url)
+        metrics = server_timing(self.client.get(url))
+        self.assertEqual(metrics['cache-analytics'], (None, '1/1 hits'))
+
+    def test_structured_log_record(self):
+        with self.assertLogs('core.requests', level='INFO') as logs:
+            self.client.get(reverse('transaction-list'), {'token': 'secret'})
+        record = logs.records[0]
+        self.assertEqual(
+            (record.method, record.path, record.status, record.user_id),
+            ('GET', reverse('transaction-list'), 200, self.user.id)
+        )
+        self.assertGreater(record.db_queries, 0)
+        self.assertNotIn('secret', JSONFormatter().format(record))
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        with self.assertNoLogs('core.requests'):
+            response = self.client.get(reverse('transaction-list'))
+        self.assertNotIn('Server-Timing', response)
+
+class QueueFileHandlerTest(TestCase):
+    def test_writes_json_lines_in_the_background(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'requests.log')
+            handler = QueueFileHandler(path)
+            handler.setFormatter(JSONFormatter())
+            logger = logging.getLogger('core.tests.queue')
+            logger.addHandler(handler)
+            self.addCleanup(logger.removeHandler, handler)
+
+            logger.warning('slow %s', 'request', extra={'duration_ms': 1200})
+            try:
+                raise ValueError('boom')
+            except ValueError:
+                logger.exception('failed')
+            handler.close()
+
+            with open(path) as f:
+                first, second = (json.loads(line) for line in f)
+        self.assertEqual(
+            (first['message'], first['level'], first['duration_ms']),
+            ('slow request', 'WARNING', 1200)
+        )
+        self.assertTrue(re.search(r'ValueError: boom', second['exception']))
@@ -0,0 +1,149 @@
+from django.db import IntegrityError
+from django.db.transaction import atomic
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from transactions.models import Transaction, Category, MonthlyRollup
+from transactions import rollups
+from decimal import Decimal
+from datetime import date
+from io import StringIO
+
+User = get_user_model()
+
+class MonthlyRollupTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+
+    def rollup_values(self):
+        return {
+            (row.month, row.type, row.category_id): (row.total, row.count)
+            for row in MonthlyRollup.objects.filter(user=self.user)
+        }
+
+    def create(self, **kwargs):
+        values = {
+            'user': self.user,
+            'date': '2024-03-15',
+            'description': 'Test Transaction',
+            'amount': Decimal('10.00'),
+            'type': 'expense',
+            'category': self.food,
+        }
+        values.update(kwargs)
+        return Transaction.objects.create(**values)
+
+    def test_create_update_delete(self):
+        transaction = self.create()
+        self.create(amount=Decimal('5.50'))
+        self.assertEqual(
+            self.rollup_values(),
+            {(date(2024, 3, 1), 'expense', self.food.id): (Decimal('15.50'), 2)}
+        )
+
+        transaction.amount = Decimal('20.00')
+        transaction.save()
+        self.assertEqual(
+            self.rollup_values()[(date(2024, 3, 1), 'expense', self.food.id)],
+            (Decimal('25.50'), 2)
+        )
+
+        # Moving category and month moves the amount between rows
+        transaction.category = self.rent
+        transaction.date = date(2024, 4, 2)
+        transaction.save()
+        self.assertEqual(self.rollup_values(), {
+            (date(2024, 3, 1), 'expense', self.food.id): (Decimal('5.50'), 1),
+            (date(2024, 4, 1), 'expense', self.rent.id): (Decimal('20.00'), 1),
+        })
+
+        transaction.delete()
+        self.assertEqual(self.rollup_values(), {
+            (date(2024, 3, 1), 'expense', self.food.id): (Decimal('5.50'), 1),
+        })
+
+    def test_deleting_category_moves_rollups_to_uncategorized(self):
+        self.create(category=self.food)
+        self.create(category=None, amount=Decimal('1.00'))
+        self.food.delete()
+        self.assertEqual(self.rollup_values(), {
+            (date(2024, 3, 1), 'expense', None): (Decimal('11.00'), 2),
+        })
+
+    def test_one_row_per_key_uncategorized_included(self):
+        for category in (None, self.food):
+            rollups.apply_delta(self.user.id, date(2024, 3, 1), 'expense', category and category.id, Decimal('1.00'), 1)
+            with self.assertRaises(IntegrityError), atomic():
+                # What a concurrent writer's create would run into
+                MonthlyRollup.objects.create(
+                    user=self.user, month=date(2024, 3, 1), type='expense', category=category, total=1, count=1
+                )
+        self.assertEqual(self.rollup_values(), {
+            (date(2024, 3, 1), 'expense', None): (Decimal('1.00'), 1),
+            (date(2024, 3, 1), 'expense', self.food.id): (Decimal('1.00'), 1),
+        })
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.create()
+        self.create(type='income', category=None, amount=Decimal('100.00'))
+        self.create(date='2024-01-31', category=self.rent)
+        expected = self.rollup_values()
+
+        MonthlyRollup.objects.all().delete()
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup_values(), expected)
+
+    def test_period_totals_combine_rollups_and_partial_months(self):
+        self.create(date='2024-01-20', amount=Decimal('1.00'))
+        self.create(date='2024-01-05', amount=Decimal('50.00'))
+        self.create(date='2024-02-10', amount=Decimal('2.00'))
+        self.create(date='2024-03-03', amount=Decimal('4.00'))
+        self.create(date='2024-03-09', amount=Decimal('60.00'))
+
+        totals = rollups.period_totals(self.user, date(2024, 1, 15), date(2024, 3, 5))
+        self.assertEqual(totals['expense'], Decimal('7.00'))
+        self.assertEqual(totals['income'], Decimal('0'))
+
+
+@override_settings(ANALYTICS_SNAPSHOTS=False)
+class RollupBackedViewsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        today = timezone.now().date()
+        for amount, type in ((Decimal('1000.00'), 'income'), (Decimal('250.25'), 'expense')):
+            Transaction.objects.create(
+                user=self.user, date=today, description='Test',
+                amount=amount, type=type
+            )
+
+    def test_summary_reads_rollups(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('transaction-summary'))
+        self.assertEqual(response.data['total_income'], 1000.0)
+        self.assertEqual(response.data['total_expenses'], 250.25)
+        self.assertEqual(response.data['monthly_income'], 1000.0)
+
+    def test_trends_reads_rollups(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('transaction-trends'))
+        self.assertEqual(response.data, [{
+            'date': timezone.now().strftime('%Y-%m'),
+            'income': 1000.0,
+            'expense': 250.25,
+        }])
@@ -0,0 +1,86 @@
+import unittest
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction
+from transactions.search import has_trigram_support
+from decimal import Decimal
+
+User = get_user_model()
+
+requires_postgres = unittest.skipUnless(
+    connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL'
+)
+
+class TransactionSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+        for description in (
+            'Starbucks coffee',
+            'Coffee beans and coffee filters',
+            'Weekly groceries',
+            'Rent payment',
+        ):
+            Transaction.objects.create(
+                user=self.user, date='2024-03-15', description=description,
+                amount=Decimal('10.00'), type='expense'
+            )
+        self.url = reverse('transaction-list')
+
+    def search(self, term, **params):
+        response = self.client.get(self.url, {'search': term, **params})
+        return [item['description'] for item in response.data['results']]
+
+    def test_search_matches_description(self):
+        self.assertEqual(
+            set(self.search('coffee')),
+            {'Starbucks coffee', 'Coffee beans and coffee filters'}
+        )
+        self.assertEqual(self.search('rent'), ['Rent payment'])
+
+    @requires_postgres
+    def test_search_vector_is_kept_up_to_date(self):
+        transaction = Transaction.objects.get(description='Rent payment')
+        transaction.description = 'Electricity bill'
+        transaction.save()
+        self.assertEqual(self.search('electricity'), ['Electricity bill'])
+        self.assertEqual(self.search('rent'), [])
+
+    @requires_postgres
+    def test_search_is_stemmed_and_ranked(self):
+        self.assertEqual(self.search('grocery'), ['Weekly groceries'])
+        # More occurrences of the term rank higher than the default date ordering
+        self.assertEqual(
+            self.search('coffee'),
+            ['Coffee beans and coffee filters', 'Starbucks coffee']
+        )
+
+    @requires_postgres
+    def test_explicit_ordering_wins_over_rank(self):
+        Transaction.objects.filter(description='Starbucks coffee').update(amount=Decimal('5.00'))
+        results = self.search('coffee', ordering='amount')
+        self.assertEqual(results, ['Starbucks coffee', 'Coffee beans and coffee filters'])
+
+    @requires_postgres
+    def test_ranked_results_with_cursor_pagination(self):
+        response = self.client.get(self.url, {'search': 'coffee', 'pagination': 'cursor', 'page_size': 1})
+        second = self.client.get(response.data['next'])
+        self.assertEqual(
+            [response.data['results'][0]['description'], second.data['results'][0]['description']],
+            ['Coffee beans and coffee filters', 'Starbucks coffee']
+        )
+
+    @requires_postgres
+    def test_typos_match_with_trigrams(self):
+        if not has_trigram_support(connection.alias):
+            self.skipTest('pg_trgm is not installed')
+        self.assertEqual(self.search('starbuks'), ['Starbucks coffee'])
@@ -0,0 +1,64 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.contrib.auth import get_user_model
+from transactions.models import Transaction, Category
+from transactions.serializers import TransactionSerializer, TransactionListSerializer
+from decimal import Decimal
+
+User = get_user_model()
+
+class TransactionListSerializerTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.categories = [
+            Category.objects.create(user=self.user, name=f'Category {i}')
+            for i in range(5)
+        ]
+
+    def create_transactions(self, count):
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                date='2024-03-15',
+                description=f'Transaction {i}',
+                amount=Decimal('19.90'),
+                type='expense',
+                category=self.categories[i % 5] if i % 6 != 1 else None
+            )
+            for i in range(count)
+        ])
+
+    def test_output_matches_model_serializer(self):
+        self.create_transactions(12)
+        transactions = Transaction.objects.select_related('category')
+        self.assertEqual(
+            TransactionListSerializer(transactions, many=True).data,
+            TransactionSerializer(transactions, many=True).data
+        )
+
+    def test_list_query_count_is_constant(self):
+        url = reverse('transaction-list')
+        self.create_transactions(100)
+
+        # One COUNT for the page number pagination and one page query
+        for page_size in (1, 10, 100):
+            with self.assertNumQueries(2):
+                response = self.client.get(url, {'page_size': page_size})
+            self.assertEqual(len(response.data['results']), page_size)
+
+        with self.assertNumQueries(1):
+            self.client.get(url, {'pagination': 'cursor', 'page_size': 100})
+
+    def test_retrieve_loads_category_with_transaction(self):
+        self.create_transactions(1)
+        transaction = Transaction.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('transaction-detail', args=[transaction.id]))
+        self.assertEqual(response.data['category_name'], transaction.category.name)
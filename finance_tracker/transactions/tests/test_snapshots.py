@@ -0,0 +1,214 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth import get_user_model
+from core.cache import TRANSACTIONS_SCOPE, bump_data_version, get_data_version
+from transactions.aggregates import category_totals
+from transactions.models import Transaction, Category
+from transactions.snapshots import SnapshotCache, TransactionSnapshot, get_snapshot, snapshots
+from transactions import rollups
+from goals.models import Goal
+
+User = get_user_model()
+
+class SnapshotDataMixin:
+    def create_data(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.food = Category.objects.create(user=self.user, name='Food', type='expense')
+        self.rent = Category.objects.create(user=self.user, name='Rent', type='expense')
+        self.salary = Category.objects.create(user=self.user, name='Salary', type='income')
+        rows = [
+            (date(2024, 1, 5), '12.34', 'expense', self.food),
+            (date(2024, 1, 20), '800.00', 'expense', self.rent),
+            (date(2024, 1, 31), '2500.00', 'income', self.salary),
+            (date(2024, 2, 1), '7.66', 'expense', self.food),
+            (date(2024, 2, 14), '45.10', 'expense', None),
+            (date(2024, 2, 28), '2500.00', 'income', self.salary),
+            (date(2024, 3, 2), '0.01', 'expense', self.food),
+            (date(2024, 3, 15), '99.99', 'income', None),
+        ]
+        for day, amount, kind, category in rows:
+            self.create_transaction(day, amount, kind, category)
+
+    def create_transaction(self, day, amount, kind='expense', category=None):
+        return Transaction.objects.create(
+            user=self.user, date=day, description='Test', amount=Decimal(amount), type=kind, category=category
+        )
+
+    def assertMatchesDatabase(self, snapshot):
+        self.assertEqual(snapshot.monthly_totals(), rollups.monthly_totals(self.user))
+        queryset = Transaction.objects.filter(user=self.user)
+        for filters in ({}, {'type': 'expense'}, {'category_type': 'income'}, {'include_uncategorized': False}):
+            self.assertEqual(snapshot.category_totals(**filters), category_totals(queryset, **filters))
+
+@override_settings(ANALYTICS_SNAPSHOTS=True)
+class SnapshotReportsTest(SnapshotDataMixin, TestCase):
+    def setUp(self):
+        self.create_data()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_reports_match_the_database(self):
+        snapshot = get_snapshot(self.user.id)
+        self.assertEqual(len(snapshot), 8)
+        self.assertMatchesDatabase(snapshot)
+        self.assertEqual(
+            snapshot.monthly_totals(start_month=date(2024, 2, 10)),
+            rollups.monthly_totals(self.user, start_month=date(2024, 2, 1))
+        )
+        filters = {'start_date': date(2024, 1, 20), 'end_date': date(2024, 2, 14), 'type': 'expense'}
+        self.assertEqual(
+            snapshot.category_totals(**filters),
+            category_totals(Transaction.objects.filter(user=self.user), **filters)
+        )
+        self.assertEqual(
+            snapshot.period_totals(date(2024, 1, 15), date(2024, 3, 2)),
+            rollups.period_totals(self.user, date(2024, 1, 15), date(2024, 3, 2))
+        )
+
+    def test_load_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            TransactionSnapshot.load(self.user.id, 1)
+        for i in range(50):
+            self.create_transaction(date(2024, 4, 1) + timedelta(days=i), '1.00')
+        with self.assertNumQueries(2):
+            snapshot = TransactionSnapshot.load(self.user.id, 1)
+        self.assertEqual(len(snapshot), 58)
+
+    def test_compare_with_previous_period(self):
+        url = reverse('transaction-compare')
+        response = self.client.get(url, {'start_date': '2024-02-01', 'end_date': '2024-02-29'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Same length, just before
+        self.assertEqual(response.data['compare_period']['start_date'], date(2024, 1, 3))
+        self.assertEqual(response.data['compare_period']['end_date'], date(2024, 1, 31))
+        self.assertEqual(response.data['period']['expense'], Decimal('52.76'))
+        self.assertEqual(response.data['compare_period']['expense'], Decimal('812.34'))
+        self.assertEqual(response.data['change']['net'], Decimal('759.58'))
+
+        categories = {row['name']: row for row in response.data['categories']}
+        self.assertEqual(categories['Food']['change'], Decimal('-4.68'))
+        self.assertEqual(categories['Food']['change_percent'], Decimal('-37.93'))
+        self.assertEqual(categories['Rent']['amount'], Decimal('0'))
+        self.assertIsNone(categories['Uncategorized']['change_percent'])
+
+    def test_compare_with_explicit_period(self):
+        response = self.client.get(reverse('transaction-compare'), {
+            'start_date': '2024-03-01', 'end_date': '2024-03-31',
+            'compare_start_date': '2024-01-01', 'compare_end_date': '2024-01-31',
+            'type': 'income',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['name'], row['amount'], row['compare_amount']) for row in response.data['categories']],
+            [('Uncategorized', Decimal('99.99'), Decimal('0')), ('Salary', Decimal('0'), Decimal('2500.00'))]
+        )
+
+    def test_compare_without_snapshots(self):
+        params = {
+            'start_date': '2024-02-10', 'end_date': '2024-03-31',
+            'compare_start_date': '2024-01-01', 'compare_end_date': '2024-02-09',
+        }
+        expected = self.client.get(reverse('transaction-compare'), params).data
+        # Not served from the cached response
+        bump_data_version(self.user.id)
+        with override_settings(ANALYTICS_SNAPSHOTS=False), mock.patch('transactions.snapshots.get_snapshot') as load:
+            response = self.client.get(reverse('transaction-compare'), params)
+        load.assert_not_called()
+        self.assertEqual(response.data, expected)
+
+    def test_compare_validation(self):
+        url = reverse('transaction-compare')
+        for params in (
+            {},
+            {'start_date': '2024-03-01', 'end_date': '2024-02-01'},
+            {'start_date': '2024-03-01', 'end_date': '2024-03-31', 'compare_start_date': '2024-01-01'},
+            {'start_date': '2024-03-01', 'end_date': '2024-03-31', 'type': 'transfer'},
+        ):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+class SnapshotCacheTest(TestCase):
+    def snapshot(self, nbytes):
+        return SimpleNamespace(nbytes=nbytes)
+
+    def test_least_recently_used_are_evicted(self):
+        cache = SnapshotCache(max_bytes=100)
+        cache.put(1, self.snapshot(40))
+        cache.put(2, self.snapshot(40))
+        cache.get(1)
+        cache.put(3, self.snapshot(40))
+        self.assertIsNone(cache.peek(2))
+        self.assertEqual((len(cache), cache.nbytes, cache.evictions), (2, 80, 1))
+
+        # Replacing a user's snapshot frees the old one
+        cache.put(1, self.snapshot(10))
+        self.assertEqual(cache.nbytes, 50)
+
+    def test_oversized_snapshots_are_not_cached(self):
+        cache = SnapshotCache(max_bytes=100)
+        cache.put(1, self.snapshot(40))
+        cache.put(2, self.snapshot(150))
+        self.assertIsNone(cache.peek(2))
+        self.assertIsNotNone(cache.peek(1))
+
+# Snapshots read inside a transaction are not cached, so these run in autocommit
+@override_settings(ANALYTICS_SNAPSHOTS=True)
+class IncrementalSnapshotTest(SnapshotDataMixin, TransactionTestCase):
+    def setUp(self):
+        snapshots.clear()
+        self.addCleanup(snapshots.clear)
+        self.create_data()
+        get_snapshot(self.user.id)
+
+    def assertApplied(self):
+        snapshot = snapshots.peek(self.user.id)
+        self.assertIsNotNone(snapshot)
+        self.assertEqual(snapshot.version, get_data_version(self.user.id, TRANSACTIONS_SCOPE))
+        self.assertMatchesDatabase(snapshot)
+        # Served without reloading
+        with self.assertNumQueries(0):
+            self.assertIs(get_snapshot(self.user.id), snapshot)
+
+    def test_writes_are_applied_in_place(self):
+        transaction = self.create_transaction(date(2024, 3, 20), '15.00', category=self.rent)
+        self.assertApplied()
+
+        transaction.amount = Decimal('25.50')
+        transaction.category = self.food
+        transaction.date = date(2024, 4, 2)
+        transaction.save()
+        self.assertApplied()
+
+        transaction.delete()
+        self.assertApplied()
+        self.assertEqual(len(snapshots.peek(self.user.id)), 8)
+
+    def test_other_version_changes_drop_the_snapshot(self):
+        # As a transaction written by another process would
+        bump_data_version(self.user.id, TRANSACTIONS_SCOPE)
+        self.create_transaction(date(2024, 3, 20), '15.00')
+        self.assertIsNone(snapshots.peek(self.user.id))
+        self.assertMatchesDatabase(get_snapshot(self.user.id))
+
+    def test_other_models_keep_the_snapshot(self):
+        snapshot = snapshots.peek(self.user.id)
+        Goal.objects.create(user=self.user, title='Car', target_amount=Decimal('1000.00'), deadline=date(2030, 1, 1))
+        with self.assertNumQueries(0):
+            self.assertIs(get_snapshot(self.user.id), snapshot)
+
+    def test_category_changes_reload(self):
+        self.food.name = 'Groceries'
+        self.food.save()
+        snapshot = get_snapshot(self.user.id)
+        names = {row['id']: row['name'] for row in snapshot.category_totals()}
+        self.assertEqual(names[self.food.id], 'Groceries')
@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TransactionViewSet, CategoryViewSet
+from .views import TransactionViewSet, CategoryViewSet, TransactionImportViewSet, RecurringTransactionViewSet
 
 router = DefaultRouter()
 router.register('transactions', TransactionViewSet, basename='transaction')
 router.register('categories', CategoryViewSet, basename='category')
+router.register('imports', TransactionImportViewSet, basename='transaction-import')
+router.register('recurring', RecurringTransactionViewSet, basename='recurring-transaction')
 
 urlpatterns = [
     path('', include(router.urls)),
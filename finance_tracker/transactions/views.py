@@ -1,20 +1,39 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions, filters, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Transaction, Category
-from .serializers import TransactionSerializer, CategorySerializer
+from .models import Transaction, Category, TransactionImport, RecurringTransaction
+from .serializers import (
+    TransactionSerializer, TransactionListSerializer, CategorySerializer, TransactionImportSerializer,
+    RecurringTransactionSerializer
+)
+from .tasks import import_transactions, materialize_recurring_transactions
+from .exporters import EXPORT_FORMATS, astream
+from .search import TransactionSearchFilter, RankedOrderingFilter
+from .aggregates import (
+    user_category_totals, user_category_report, parse_aggregate_filters, parse_comparison,
+    summary_report, trends_report, monthly_totals, compare_report,
+    acategory_report, asummary_report, atrends_report
+)
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Sum
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.pagination import PageNumberPagination
+from core.pagination import KeysetPagination
+from core.authentication import CachedTokenAuthentication
+from core.cache import cache_per_user
+from core.queries import query_budget
+from core.views import ConditionalGetMixin, AsyncAPIView
 from rest_framework.views import APIView
 from rest_framework import status
-from django.utils import timezone
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.parsers import MultiPartParser, FormParser
+from decimal import Decimal
 
 # Create your views here.
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -29,148 +48,141 @@ class TransactionPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionCursorPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-date', '-id')
+
+# The count, the page, and the category of a ?category= filter
+@method_decorator(query_budget(3), name='list')
+class TransactionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     pagination_class = TransactionPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TransactionSearchFilter, RankedOrderingFilter]
     filterset_fields = ['type', 'category', 'date']
     search_fields = ['description']
     ordering_fields = ['date', 'amount']
     ordering = ['-date']
 
+    @property
+    def paginator(self):
+        # Keyset pagination is opt-in with ?pagination=cursor (or any ?cursor=)
+        if not hasattr(self, '_paginator'):
+            params = getattr(self.request, 'query_params', {})
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = TransactionCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user).order_by('-date')
+        queryset = Transaction.objects.filter(user=self.request.user).order_by('-date')
+        if self.action in ('list', 'retrieve'):
+            # category_name is read for every row
+            queryset = queryset.select_related('category')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'list' and not getattr(self, 'swagger_fake_view', False):
+            return TransactionListSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(detail=False, methods=['get'], url_path='by-category')
+    @query_budget(2)
+    @cache_per_user('transactions.by_category')
     def by_category(self, request):
-        transactions = self.get_queryset().filter(type='expense')
-        categories = {}
-        
-        for transaction in transactions:
-            category_name = transaction.category.name if transaction.category else 'Uncategorized'
-            if category_name not in categories:
-                categories[category_name] = 0
-            categories[category_name] += float(transaction.amount)
-        
+        filters = parse_aggregate_filters(request.query_params, default_type='expense')
         # Format response as a list for easier frontend handling
-        result = [
-            {'name': name, 'amount': amount}
-            for name, amount in categories.items()
-        ]
-        return Response(result)
+        return Response(user_category_report(request.user, **filters))
 
     @action(detail=False, methods=['get'])
+    @cache_per_user('transactions.summary')
     def summary(self, request):
-        transactions = self.get_queryset()
-        current_month = timezone.now().month
-        current_year = timezone.now().year
-        
-        # Calculate total income and expenses
-        total_income = transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        total_expenses = transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Calculate monthly totals
-        monthly_transactions = transactions.filter(
-            date__month=current_month,
-            date__year=current_year
-        )
-        monthly_income = monthly_transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        monthly_expenses = monthly_transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        
-        # Calculate previous month's data for comparison
-        prev_month = (timezone.now().replace(day=1) - timezone.timedelta(days=1))
-        prev_month_transactions = transactions.filter(
-            date__month=prev_month.month,
-            date__year=prev_month.year
-        )
-        prev_month_total = (
-            prev_month_transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        ) - (
-            prev_month_transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
-        )
-        current_month_total = monthly_income - monthly_expenses
-        monthly_change = ((current_month_total - prev_month_total) / prev_month_total * 100) if prev_month_total != 0 else 0
-        
-        return Response({
-            'total_income': float(total_income),
-            'total_expenses': float(total_expenses),
-            'balance': float(total_income - total_expenses),
-            'monthly_income': float(monthly_income),
-            'monthly_expenses': float(monthly_expenses),
-            'monthly_change': float(monthly_change),
-            'current_month': {
-                'name': timezone.now().strftime('%B'),
-                'income': float(monthly_income),
-                'expenses': float(monthly_expenses)
-            },
-            'previous_month': {
-                'name': prev_month.strftime('%B'),
-                'total': float(prev_month_total)
-            }
-        })
+        return Response(summary_report(request.user))
 
     @action(detail=False, methods=['get'])
+    @cache_per_user('transactions.trends')
     def trends(self, request):
-        from django.db.models.functions import TruncMonth
-        from django.db.models import Sum
-        from datetime import datetime, timedelta
-        
-        # Get the last 6 months of data
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=180)
-        
-        transactions = self.get_queryset().filter(date__gte=start_date)
-        
-        # Group by month and type
-        monthly_data = (
-            transactions
-            .annotate(month=TruncMonth('date'))
-            .values('month', 'type')
-            .annotate(total=Sum('amount'))
-            .order_by('month')
-        )
-        
-        # Format the data for the frontend
-        trends_data = []
-        current_month = None
-        month_data = {'income': 0, 'expense': 0}
-        
-        for item in monthly_data:
-            month = item['month'].strftime('%Y-%m')
-            
-            if current_month != month:
-                if current_month is not None:
-                    trends_data.append({
-                        'date': current_month,
-                        'income': float(month_data['income']),
-                        'expense': float(month_data['expense'])
-                    })
-                current_month = month
-                month_data = {'income': 0, 'expense': 0}
-            
-            month_data[item['type']] = float(item['total'])
-        
-        # Add the last month
-        if current_month is not None:
-            trends_data.append({
-                'date': current_month,
-                'income': float(month_data['income']),
-                'expense': float(month_data['expense'])
-            })
-        
-        return Response(trends_data)
+        return Response(trends_report(request.user))
+
+    @action(detail=False, methods=['get'])
+    @cache_per_user('transactions.compare')
+    def compare(self, request):
+        period, compare_period, transaction_type = parse_comparison(request.query_params)
+        return Response(compare_report(request.user, period, compare_period, transaction_type))
 
-class TransactionSummaryView(APIView):
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # "format" is reserved for DRF's renderer selection
+        export_format = request.query_params.get('file_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"Unsupported export format '{export_format}'. Use csv or ndjson."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stream, content_type, extension = EXPORT_FORMATS[export_format]
+
+        # Same filter, search and ordering params as the list view
+        transactions = self.filter_queryset(self.get_queryset())
+        content = stream(transactions)
+        if isinstance(request._request, ASGIRequest):
+            # A sync iterator would be buffered whole before the first byte is sent
+            content = astream(content)
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transactions.{extension}"'
+        return response
+
+class TransactionImportViewSet(mixins.CreateModelMixin,
+                               mixins.RetrieveModelMixin,
+                               mixins.ListModelMixin,
+                               viewsets.GenericViewSet):
+    serializer_class = TransactionImportSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get_queryset(self):
+        return TransactionImport.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        transaction_import = serializer.save(user=self.request.user)
+        transaction.on_commit(lambda: import_transactions.delay(transaction_import.id))
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        # Rows are imported in the background; poll the import for progress
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+class RecurringTransactionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    serializer_class = RecurringTransactionSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user).select_related('category')
+
+    def materialize(self, schedule):
+        # Occurrences already due are created right away instead of at the next scheduled run
+        transaction.on_commit(lambda: materialize_recurring_transactions.delay([schedule.id]))
+
+    def perform_create(self, serializer):
+        self.materialize(serializer.save(user=self.request.user))
+
+    def perform_update(self, serializer):
+        self.materialize(serializer.save())
+
+class TransactionSummaryView(ConditionalGetMixin, APIView):
+    @cache_per_user('transactions.total_summary')
     def get(self, request):
-        user_transactions = Transaction.objects.filter(user=request.user)
+        months = monthly_totals(request.user)
         
-        total_income = user_transactions.filter(type='income').aggregate(Sum('amount'))['amount__sum'] or 0
-        total_expenses = user_transactions.filter(type='expense').aggregate(Sum('amount'))['amount__sum'] or 0
+        total_income = sum((month['income'] for month in months.values()), Decimal('0'))
+        total_expenses = sum((month['expense'] for month in months.values()), Decimal('0'))
         
         return Response({
             'total_income': total_income,
@@ -178,34 +190,34 @@ class TransactionSummaryView(APIView):
             'balance': total_income - total_expenses
         })
 
-class TransactionByCategoryView(APIView):
-    authentication_classes = [TokenAuthentication]
+class TransactionByCategoryView(ConditionalGetMixin, APIView):
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
+    @cache_per_user('transactions.category_totals')
     def get(self, request):
-        try:
-            # Get all transactions for the authenticated user
-            transactions = Transaction.objects.filter(user=request.user)
-            
-            # Group transactions by category and calculate total
-            category_totals = transactions.values(
-                'category__id',
-                'category__name'
-            ).annotate(
-                total=Sum('amount')
-            ).order_by('-total')
-            
-            # Format the response
-            result = [{
-                'id': item['category__id'],
-                'name': item['category__name'],
-                'total': float(item['total']) if item['total'] else 0
-            } for item in category_totals if item['category__id'] is not None]
-            
-            return Response(result)
-            
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        filters = parse_aggregate_filters(request.query_params)
+        totals = user_category_totals(request.user, include_uncategorized=False, **filters)
+        return Response(totals)
+
+# Async versions of the analytics actions, routed by finance_tracker/asgi_urls.py
+
+class AsyncTransactionAnalyticsView(ConditionalGetMixin, AsyncAPIView):
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+class AsyncByCategoryView(AsyncTransactionAnalyticsView):
+    @cache_per_user('transactions.by_category')
+    async def get(self, request):
+        filters = parse_aggregate_filters(request.query_params, default_type='expense')
+        return Response(await acategory_report(Transaction.objects.filter(user=request.user), **filters))
+
+class AsyncSummaryView(AsyncTransactionAnalyticsView):
+    @cache_per_user('transactions.summary')
+    async def get(self, request):
+        return Response(await asummary_report(request.user))
+
+class AsyncTrendsView(AsyncTransactionAnalyticsView):
+    @cache_per_user('transactions.trends')
+    async def get(self, request):
+        return Response(await atrends_report(request.user))